@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Headless batch runner for many scenarios, feature sets and seeds.
+
+Runs every combination of input files, planner features, engine features, seeds
+and constant overrides across a process pool, one simulation per worker process,
+until all jobs are completed, a deadlock or ``--max-ticks``. Final KPIs are
+appended to one CSV results table as runs finish. Runs already in the table are
+skipped, so a batch cancelled with Ctrl-C (or SIGTERM) resumes where it stopped.
+
+    python batch_runner.py --features "" ga_diversity,ht_future_penalty --seeds 0 1 2
+    python batch_runner.py --matrix batch.json --workers 8 --results data/batch.csv
+
+A matrix file holds the same dimensions as lists, e.g.::
+
+    {"inputs": ["data/input.csv"], "planner_features": ["", "dual_cycle"],
+     "engine_features": [""], "seeds": [0, 1],
+     "overrides": [{}, {"JOB_PARAMETER.YARD_WORK_TIME_REQUIRED": 240}]}
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from logzero import logger
+
+from src.scenario import hash_file
+
+# One simulation of the batch; features are comma-separated flag lists as in the
+# JOB_PLANNER_FEATURES/OPERATION_ENGINE_FEATURES env vars
+BatchRun = namedtuple(
+    "BatchRun",
+    [
+        "run_id",
+        "input_path",
+        "planner_features",
+        "engine_features",
+        "seed",
+        "overrides",
+        "max_ticks",
+    ],
+)
+
+RESULT_COLUMNS = [
+    "run_id",
+    "input",
+    "planner_features",
+    "engine_features",
+    "seed",
+    "overrides",
+    "status",
+    "completed_jobs",
+    "total_jobs",
+    "makespan(secs)",
+    "deadlock",
+    "ticks",
+    "wall_time(secs)",
+    "ticks_per_sec",
+    "error",
+]
+
+# run statuses; only errored runs are run again on resume
+COMPLETED, DEADLOCK, TICK_LIMIT, ERROR = "completed", "deadlock", "tick_limit", "error"
+
+
+def make_runs(
+    input_paths: List[str],
+    planner_features: List[str],
+    engine_features: List[str],
+    seeds: List[int],
+    overrides: List[Dict[str, Any]],
+    max_ticks: int,
+) -> List[BatchRun]:
+    """
+    Every combination of the matrix dimensions. A run is identified by the content
+    of its input file and its settings, so renaming the file or editing it in place
+    is handled correctly.
+    """
+    input_hashes = {input_path: hash_file(input_path) for input_path in input_paths}
+    runs = list()
+    for input_path, planner, engine, seed, override in itertools.product(
+        input_paths, planner_features, engine_features, seeds, overrides
+    ):
+        settings = json.dumps(
+            [input_hashes[input_path], planner, engine, seed, override, max_ticks],
+            sort_keys=True,
+        )
+        runs.append(
+            BatchRun(
+                run_id=hashlib.sha1(settings.encode()).hexdigest()[:16],
+                input_path=input_path,
+                planner_features=planner,
+                engine_features=engine,
+                seed=seed,
+                overrides=override,
+                max_ticks=max_ticks,
+            )
+        )
+    return runs
+
+
+def load_finished_run_ids(results_path: str) -> Set[str]:
+    """Runs of the results table with a result (errored runs are retried)."""
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline="") as file:
+        return {row["run_id"] for row in csv.DictReader(file) if row["status"] != ERROR}
+
+
+def init_worker():
+    # the parent handles Ctrl-C and terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_simulation(run: BatchRun) -> Dict[str, Any]:
+    """Simulate one run in this (fresh) worker process and return its KPIs."""
+    result = {
+        "run_id": run.run_id,
+        "input": run.input_path,
+        "planner_features": run.planner_features,
+        "engine_features": run.engine_features,
+        "seed": run.seed,
+        "overrides": json.dumps(run.overrides, sort_keys=True),
+        "error": "",
+    }
+    logger.setLevel(logging.WARNING)
+    started = time.perf_counter()
+    ticks = 0
+    try:
+        from src.constant import override_constants
+
+        override_constants(run.overrides)
+        # imported once the overrides are in place, see override_constants
+        from src.simulation import Simulation
+        from src.utils.features import parse_feature_flags
+
+        sim = Simulation(
+            input_path=run.input_path,
+            seed=run.seed,
+            planner_features=parse_feature_flags(run.planner_features),
+            engine_features=parse_feature_flags(run.engine_features),
+        )
+        status = TICK_LIMIT
+        while ticks < run.max_ticks:
+            if sim.has_completed_all_jobs():
+                status = COMPLETED
+                break
+            if sim.has_deadlock():
+                status = DEADLOCK
+                break
+            sim.update()
+            ticks += 1
+        else:
+            if sim.has_completed_all_jobs():
+                status = COMPLETED
+        result.update(
+            {
+                "status": status,
+                "completed_jobs": sim.planning_engine.get_number_of_completed_jobs(),
+                "total_jobs": sim.planning_engine.get_number_of_jobs(),
+                "makespan(secs)": (
+                    sim.get_current_time() if status == COMPLETED else None
+                ),
+                "deadlock": status == DEADLOCK,
+            }
+        )
+    except Exception as error:
+        result.update({"status": ERROR, "error": f"{type(error).__name__}: {error}"})
+    wall_time = time.perf_counter() - started
+    result.update(
+        {
+            "ticks": ticks,
+            "wall_time(secs)": round(wall_time, 3),
+            "ticks_per_sec": round(ticks / wall_time, 1) if wall_time else None,
+        }
+    )
+    return result
+
+
+def run_batch(runs: Iterable[BatchRun], results_path: str, workers: int) -> int:
+    """
+    Run the batch across ``workers`` processes, appending each result to the table
+    as it arrives, and return the number of runs done. Ctrl-C or SIGTERM terminates
+    the workers; finished runs are already saved.
+    """
+    runs = list(runs)
+    if not runs:
+        return 0
+    Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+    is_new_table = not os.path.exists(results_path)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    previous_handler = signal.signal(signal.SIGTERM, terminate)
+    # spawn: every simulation starts from pristine constants and module state
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(
+        processes=min(workers, len(runs)), initializer=init_worker, maxtasksperchild=1
+    )
+    number_done = 0
+    try:
+        with open(results_path, "a", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+            if is_new_table:
+                writer.writeheader()
+            for result in pool.imap_unordered(run_simulation, runs):
+                writer.writerow(result)
+                file.flush()
+                number_done += 1
+                progress = f"[{number_done}/{len(runs)}] {result['run_id']}"
+                if result["status"] == ERROR:
+                    logger.warning(f"{progress} failed: {result['error']}")
+                    continue
+                logger.info(
+                    f"{progress} {result['status']}: {result['completed_jobs']} jobs, "
+                    f"makespan {result['makespan(secs)']} s, "
+                    f"{result['ticks_per_sec']} ticks/s"
+                )
+        pool.close()
+    except KeyboardInterrupt:
+        logger.warning(
+            f"Batch cancelled: {number_done}/{len(runs)} runs saved to {results_path}."
+        )
+        pool.terminate()
+    finally:
+        pool.join()
+        signal.signal(signal.SIGTERM, previous_handler)
+    return number_done
+
+
+def parse_override(value: str):
+    """``KEY=VALUE`` with a JSON value (plain strings are taken as they are)."""
+    key, separator, raw_value = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got {value!r}")
+    try:
+        return key, json.loads(raw_value)
+    except json.JSONDecodeError:
+        return key, raw_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--matrix", help="JSON file with the matrix dimensions")
+    parser.add_argument("--inputs", nargs="+", help="job manifest CSV files")
+    parser.add_argument(
+        "--features", nargs="+", help="JOB_PLANNER_FEATURES values to run"
+    )
+    parser.add_argument(
+        "--engine-features", nargs="+", help="OPERATION_ENGINE_FEATURES values to run"
+    )
+    parser.add_argument("--seeds", nargs="+", type=int, help="planner seeds")
+    parser.add_argument(
+        "--override",
+        action="append",
+        type=parse_override,
+        default=[],
+        help="constant override applied to every run, e.g. PLANNING_INTERVAL=120",
+    )
+    parser.add_argument(
+        "--max-ticks",
+        type=int,
+        help="simulation steps per run at most (default is 200000)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument(
+        "--results", default="data/batch_results.csv", help="CSV results table"
+    )
+    args = parser.parse_args()
+
+    matrix = dict()
+    if args.matrix:
+        with open(args.matrix) as file:
+            matrix = json.load(file)
+    common_overrides = dict(args.override)
+    runs = make_runs(
+        input_paths=args.inputs or matrix.get("inputs", ["data/input.csv"]),
+        planner_features=args.features or matrix.get("planner_features", [""]),
+        engine_features=args.engine_features or matrix.get("engine_features", [""]),
+        seeds=args.seeds or matrix.get("seeds", [0]),
+        overrides=[
+            {**overrides, **common_overrides}
+            for overrides in matrix.get("overrides", [{}])
+        ],
+        max_ticks=args.max_ticks or matrix.get("max_ticks", 200000),
+    )
+    finished_run_ids = load_finished_run_ids(args.results)
+    pending_runs = [run for run in runs if run.run_id not in finished_run_ids]
+    logger.info(
+        f"{len(runs)} runs, {len(runs) - len(pending_runs)} already in {args.results}, "
+        f"{len(pending_runs)} to run on {args.workers} workers."
+    )
+    if run_batch(pending_runs, args.results, args.workers) < len(pending_runs):
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
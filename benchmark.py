@@ -0,0 +1,804 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for planner and engine alternatives.
+
+Each subcommand runs the full simulation (or a recorded slice of it) and prints
+a small comparison table, so engine choices can be made from measurements.
+
+    python benchmark.py yard-engines --ticks 3000
+    python benchmark.py drive-kernel --ticks 2000 --fleet-sizes 800,8000
+    python benchmark.py idle-index --fleet-sizes 80,800,8000
+    python benchmark.py dual-cycle --jobs 2000
+    python benchmark.py buffer-slots --jobs 2000
+    python benchmark.py lanes --jobs 2000
+    python benchmark.py reservations --jobs 2000
+    python benchmark.py scaling --scales 1,2,4 --ticks 2000
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from logzero import logger
+
+from src.constant import CONSTANT, TerminalLayout, apply_layout
+from src.floor import Coordinate, SectorMap, SectorMapSnapshot
+from src.job import InstructionType, Status
+from src.operate.drive_kernel import (
+    resolve_drive_moves,
+    resolve_drive_moves_sequential,
+)
+from src.operator_state import OperatorStateStore
+from src.operators import HT_Coordinate_View, HTOperator
+from src.plan.job_planner import JobPlanner
+from src.simulation import Simulation
+from src.utils.features import parse_feature_flags
+
+YARD_ENGINES = ["ga", "local_search"]
+
+
+def run_simulation(sim: Simulation, ticks: int) -> int:
+    """Advance the simulation for at most ``ticks`` steps, return steps taken."""
+    iteration = 0
+    while iteration < ticks and not sim.has_completed_all_jobs():
+        if sim.has_deadlock():
+            break
+        sim.update()
+        iteration += 1
+    return iteration
+
+
+def benchmark_yard_engines(args: argparse.Namespace) -> dict:
+    """Record planning windows from one run and replay them through every engine."""
+    sim = Simulation()
+    recording_planner = sim.planning_engine.job_planner
+    windows = recording_planner.record_yard_windows()
+    ticks = run_simulation(sim, args.ticks)
+
+    results = dict()
+    scores_by_engine = dict()
+    for engine in YARD_ENGINES:
+        # a fresh planner per engine so RNG state and caches do not leak across runs
+        planner = JobPlanner(
+            ht_coord_tracker=recording_planner.ht_coord_tracker,
+            sector_map_snapshot=recording_planner.sector_map_snapshot,
+            feature_overrides=dict(recording_planner._features),
+        )
+        total_score, total_elapsed, total_evaluations = 0.0, 0.0, 0
+        scores = list()
+        for window in windows:
+            outcome = planner.replay_yard_window(window, engine)
+            scores.append(outcome["score"])
+            total_score += outcome["score"]
+            total_elapsed += outcome["elapsed"]
+            total_evaluations += outcome["evaluations"]
+        scores_by_engine[engine] = scores
+        results[engine] = {
+            "windows": len(windows),
+            "total_score": round(total_score, 2),
+            "mean_score": round(total_score / len(windows), 2) if windows else 0.0,
+            "time(secs)": round(total_elapsed, 4),
+            "evaluations": total_evaluations,
+            "evaluations_per_sec": (
+                round(total_evaluations / total_elapsed, 1) if total_elapsed else 0.0
+            ),
+        }
+
+    # count windows where each engine found a strictly better plan than the other
+    for engine in YARD_ENGINES:
+        others = [other for other in YARD_ENGINES if other != engine]
+        wins = 0
+        for i, score in enumerate(scores_by_engine[engine]):
+            if all(score < scores_by_engine[other][i] for other in others):
+                wins += 1
+        results[engine]["windows_won"] = wins
+
+    return {"ticks": ticks, "engines": results}
+
+
+def run_simulation_with_engine_features(features: str, ticks: int):
+    """Run ``ticks`` steps with the given OPERATION_ENGINE_FEATURES, return
+    (seconds per tick, hash of the HT trajectories)."""
+    previous = os.environ.get("OPERATION_ENGINE_FEATURES")
+    os.environ["OPERATION_ENGINE_FEATURES"] = features
+    try:
+        sim = Simulation()
+    finally:
+        if previous is None:
+            del os.environ["OPERATION_ENGINE_FEATURES"]
+        else:
+            os.environ["OPERATION_ENGINE_FEATURES"] = previous
+
+    HT_operators = [
+        HT_operator
+        for _, HT_operator in sorted(sim.operation_resources.HT_resource_group.items())
+    ]
+    trajectory = hashlib.sha1()
+    elapsed, iteration = 0.0, 0
+    while iteration < ticks and not sim.has_completed_all_jobs():
+        started = time.perf_counter()
+        sim.update()
+        elapsed += time.perf_counter() - started
+        iteration += 1
+        trajectory.update(
+            "|".join(str(HT.get_coordinate()) for HT in HT_operators).encode()
+        )
+    return elapsed / max(iteration, 1), trajectory.hexdigest()
+
+
+def synthetic_drive_inputs(number_of_HTs: int, rng: np.random.Generator):
+    """HTs spread over a one-way ring lane of capacity-1 cells (one third occupied),
+    each heading to the next cell; about half of them parked."""
+    number_of_cells = number_of_HTs * 3
+    current_cells = rng.choice(number_of_cells, size=number_of_HTs, replace=False)
+    target_cells = (current_cells + 1) % number_of_cells
+    is_awake = rng.random(number_of_HTs) < 0.5
+    occupancy = np.bincount(current_cells, minlength=number_of_cells)
+    capacity = np.ones(number_of_cells, dtype=np.int64)
+    return current_cells, target_cells, is_awake, occupancy, capacity
+
+
+def benchmark_drive_kernel(args: argparse.Namespace) -> dict:
+    """Compare the vectorized drive kernel with the sequential drive loop."""
+    results = dict()
+    loop_time, loop_trajectory = run_simulation_with_engine_features("", args.ticks)
+    kernel_time, kernel_trajectory = run_simulation_with_engine_features(
+        "vectorized_drive", args.ticks
+    )
+    results["simulation(per tick)"] = {
+        "HTs": len(CONSTANT.HT_FLEET.HT_NAMES),
+        "kernel(ms)": round(kernel_time * 1000, 3),
+        "sequential(ms)": round(loop_time * 1000, 3),
+        "speedup": round(loop_time / kernel_time, 2) if kernel_time else 0.0,
+        "identical": kernel_trajectory == loop_trajectory,
+    }
+
+    rng = np.random.default_rng(0)
+    for number_of_HTs in args.fleet_sizes:
+        inputs = synthetic_drive_inputs(number_of_HTs, rng)
+        timings = dict()
+        for name, resolve in [
+            ("kernel", resolve_drive_moves),
+            ("sequential", resolve_drive_moves_sequential),
+        ]:
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                resolution = resolve(*inputs)
+            timings[name] = ((time.perf_counter() - started) / args.repeats, resolution)
+        kernel_time, kernel_resolution = timings["kernel"]
+        loop_time, loop_resolution = timings["sequential"]
+        results[f"synthetic({number_of_HTs})"] = {
+            "HTs": number_of_HTs,
+            "kernel(ms)": round(kernel_time * 1000, 3),
+            "sequential(ms)": round(loop_time * 1000, 3),
+            "speedup": round(loop_time / kernel_time, 2) if kernel_time else 0.0,
+            "identical": all(
+                np.array_equal(a, b) for a, b in zip(kernel_resolution, loop_resolution)
+            ),
+        }
+
+    return {"ticks": args.ticks, "drive": results}
+
+
+def synthetic_HT_fleet(number_of_HTs: int, idle_share: float, rng: np.random.Generator):
+    """HTs parked on random buffer slots, all but ``idle_share`` of them busy."""
+    HT_names = [f"HT_{i:05}" for i in range(1, number_of_HTs + 1)]
+    state_store = OperatorStateStore(
+        work_operator_names=[], work_time_required=[], HT_names=HT_names
+    )
+    HT_resource_group = {
+        HT_name: HTOperator(
+            name=HT_name,
+            coord=Coordinate(int(rng.integers(2, 42)), 6),
+            state_store=state_store,
+        )
+        for HT_name in HT_names
+    }
+    for job_id, HT_operator in enumerate(HT_resource_group.values(), start=1):
+        if rng.random() >= idle_share:
+            HT_operator.lock(job_id)
+    return HT_resource_group
+
+
+def select_HT_by_scan(
+    planner: JobPlanner,
+    HT_resource_group: dict,
+    job_info: dict,
+    selected_HT_names: set,
+    assigned_yard: str,
+):
+    """Reference HT selection scoring every available HT of the fleet."""
+    best_choice, best_cost = None, float("inf")
+    for HT_name, HT_operator in HT_resource_group.items():
+        if not HT_operator.is_available() or HT_name in selected_HT_names:
+            continue
+        cost = planner._estimate_HT_assignment_cost(
+            HT_operator.get_coordinate(), job_info, assigned_yard
+        )
+        if cost < best_cost:
+            best_choice, best_cost = HT_name, cost
+    return best_choice
+
+
+def benchmark_idle_index(args: argparse.Namespace) -> dict:
+    """Time HT selection through the idle-HT index against scoring the whole fleet,
+    over planning windows of synthetic fleets."""
+    results = dict()
+    rng = np.random.default_rng(0)
+    sector_map_snapshot = SectorMapSnapshot(SectorMap())
+    for number_of_HTs in args.fleet_sizes:
+        HT_resource_group = synthetic_HT_fleet(number_of_HTs, args.idle_share, rng)
+        planner = JobPlanner(
+            ht_coord_tracker=HT_Coordinate_View(HT_resource_group),
+            sector_map_snapshot=sector_map_snapshot,
+        )
+        windows = [
+            [
+                (
+                    {
+                        "job_type": rng.choice(
+                            [
+                                CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE,
+                                CONSTANT.JOB_PARAMETER.LOADED_JOB_TYPE,
+                            ]
+                        ),
+                        "QC_name": rng.choice(CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES),
+                    },
+                    str(rng.choice(CONSTANT.YARD_FLOOR.YARD_NAMES)),
+                )
+                for _ in range(args.window)
+            ]
+            for _ in range(args.repeats)
+        ]
+        timings, choices = dict(), dict()
+        for name, select in [
+            ("index", planner.select_HT),
+            (
+                "scan",
+                lambda job_info, selected, yard: select_HT_by_scan(
+                    planner, HT_resource_group, job_info, selected, yard
+                ),
+            ),
+        ]:
+            chosen = list()
+            started = time.perf_counter()
+            for window in windows:
+                selected_HT_names = set()
+                for job_info, assigned_yard in window:
+                    HT_name = select(job_info, selected_HT_names, assigned_yard)
+                    if HT_name is not None:
+                        selected_HT_names.add(HT_name)
+                    chosen.append(HT_name)
+            timings[name] = (time.perf_counter() - started) / len(windows)
+            choices[name] = chosen
+        results[f"synthetic({number_of_HTs})"] = {
+            "HTs": number_of_HTs,
+            "idle": len(planner.ht_coord_tracker.get_available_HTs()),
+            "index(ms)": round(timings["index"] * 1000, 3),
+            "scan(ms)": round(timings["scan"] * 1000, 3),
+            "speedup": (
+                round(timings["scan"] / timings["index"], 2)
+                if timings["index"]
+                else 0.0
+            ),
+            "identical": choices["index"] == choices["scan"],
+        }
+    return {"ticks": 0, "selection": results}
+
+
+def make_simulation_with_planner_features(features: str) -> Simulation:
+    previous = os.environ.get("JOB_PLANNER_FEATURES")
+    os.environ["JOB_PLANNER_FEATURES"] = features
+    try:
+        return Simulation()
+    finally:
+        if previous is None:
+            del os.environ["JOB_PLANNER_FEATURES"]
+        else:
+            os.environ["JOB_PLANNER_FEATURES"] = previous
+
+
+def count_drive_moves(sim: Simulation) -> dict:
+    """Moves of the DRIVE instructions of completed jobs, split into empty moves
+    (before the container is picked up or after it is dropped) and loaded moves."""
+    moves = {"empty": 0, "loaded": 0, "jobs": 0, "tours": 0}
+    for job in sim.planning_engine.job_tracker.job_sequence_map.values():
+        if job.get_job_info()["job_status"] != Status.COMPLETED:
+            continue
+        moves["jobs"] += 1
+        if job.get_next_tour_job_id() is not None:
+            moves["tours"] += 1
+        number_of_works = 0
+        for instruction in job.get_instructions():
+            instruction_type = instruction.get_instruction_type()
+            if instruction_type in (InstructionType.WORK_QC, InstructionType.WORK_YARD):
+                number_of_works += 1
+            elif instruction_type == InstructionType.DRIVE:
+                moves[
+                    "loaded" if number_of_works == 1 else "empty"
+                ] += instruction.get_path_length()
+    return moves
+
+
+def compare_empty_driving(args: argparse.Namespace, modes: list) -> dict:
+    """Run the simulation with the planner features of each (name, features) mode on
+    top of ``args.features`` and report empty driving and makespan."""
+    results = dict()
+    for name, features in modes:
+        features = ",".join(feature for feature in [args.features, features] if feature)
+        sim = make_simulation_with_planner_features(features)
+        iteration = 0
+        while (
+            iteration < args.ticks
+            and sim.planning_engine.get_number_of_completed_jobs() < args.jobs
+            and not sim.has_completed_all_jobs()
+        ):
+            if sim.has_deadlock():
+                break
+            sim.update()
+            iteration += 1
+        completed = sim.planning_engine.get_number_of_completed_jobs()
+        moves = count_drive_moves(sim)
+        results[name] = {
+            "completed": completed,
+            "makespan(secs)": (
+                sim.operation_engine.get_current_time()
+                if completed >= args.jobs
+                else None
+            ),
+            "tours": moves["tours"],
+            "repositions": sim.operation_engine.number_of_repositions,
+            "empty_moves": moves["empty"],
+            "loaded_moves": moves["loaded"],
+            "empty_per_job": round(moves["empty"] / max(moves["jobs"], 1), 1),
+            "empty_share": round(
+                moves["empty"] / max(moves["empty"] + moves["loaded"], 1), 3
+            ),
+        }
+    return results
+
+
+def benchmark_dual_cycle(args: argparse.Namespace) -> dict:
+    """Compare dual-cycle HT tours with single-cycling on empty driving and makespan."""
+    results = compare_empty_driving(
+        args, [("single", ""), ("dual_cycle", "dual_cycle")]
+    )
+    return {"ticks": args.ticks, "cycles": results}
+
+
+def benchmark_buffer_slots(args: argparse.Namespace) -> dict:
+    """Compare dynamic buffer-slot allocation, with and without idle-HT
+    repositioning, to fixed home slots on empty driving and makespan."""
+    results = compare_empty_driving(
+        args,
+        [
+            ("home_slots", ""),
+            ("buffer_slots", "buffer_slots"),
+            ("repositioning", "repositioning"),
+        ],
+    )
+    return {"ticks": args.ticks, "slots": results}
+
+
+HIGHWAY_LANES = range(7, 13)
+
+
+def benchmark_lanes(args: argparse.Namespace) -> dict:
+    """Compare lane-balanced highway routing with the fixed lanes on per-lane
+    utilization and makespan."""
+    results = dict()
+    for name, features in [("fixed", ""), ("lane_balancing", "lane_balancing")]:
+        features = ",".join(feature for feature in [args.features, features] if feature)
+        sim = make_simulation_with_planner_features(features)
+        HT_operators = list(sim.operation_resources.HT_resource_group.values())
+        lane_ticks = {lane_y: 0 for lane_y in HIGHWAY_LANES}
+        iteration = 0
+        while (
+            iteration < args.ticks
+            and sim.planning_engine.get_number_of_completed_jobs() < args.jobs
+            and not sim.has_completed_all_jobs()
+        ):
+            if sim.has_deadlock():
+                break
+            sim.update()
+            iteration += 1
+            for HT_operator in HT_operators:
+                lane_y = HT_operator.get_coordinate().y
+                if lane_y in lane_ticks:
+                    lane_ticks[lane_y] += 1
+        completed = sim.planning_engine.get_number_of_completed_jobs()
+        row = {
+            "completed": completed,
+            "makespan(secs)": (
+                sim.operation_engine.get_current_time()
+                if completed >= args.jobs
+                else None
+            ),
+        }
+        # mean number of HTs on each lane per tick
+        for lane_y, HT_ticks in lane_ticks.items():
+            row[f"y={lane_y}"] = round(HT_ticks / max(iteration, 1), 2)
+        results[name] = row
+    return {"ticks": args.ticks, "lanes": results}
+
+
+def make_simulation_with_engine_features(
+    planner_features: str, engine_features: str
+) -> Simulation:
+    previous = os.environ.get("OPERATION_ENGINE_FEATURES")
+    os.environ["OPERATION_ENGINE_FEATURES"] = engine_features
+    try:
+        return make_simulation_with_planner_features(planner_features)
+    finally:
+        if previous is None:
+            del os.environ["OPERATION_ENGINE_FEATURES"]
+        else:
+            os.environ["OPERATION_ENGINE_FEATURES"] = previous
+
+
+def benchmark_reservations(args: argparse.Namespace) -> dict:
+    """Compare arrival-time reservations on QCs and yards with booking-order service
+    on yard idle time, HT wait time and makespan."""
+    results = dict()
+    for name, engine_features in [
+        ("booking_order", ""),
+        ("arrival_reservations", "arrival_reservations"),
+    ]:
+        sim = make_simulation_with_engine_features(args.features, engine_features)
+        iteration = 0
+        while (
+            iteration < args.ticks
+            and sim.planning_engine.get_number_of_completed_jobs() < args.jobs
+            and not sim.has_completed_all_jobs()
+        ):
+            if sim.has_deadlock():
+                break
+            sim.update()
+            iteration += 1
+        completed = sim.planning_engine.get_number_of_completed_jobs()
+        statistics = sim.operation_engine.get_service_statistics()
+        results[name] = {
+            "completed": completed,
+            "makespan(secs)": (
+                sim.operation_engine.get_current_time()
+                if completed >= args.jobs
+                else None
+            ),
+            "yard_idle(secs)": statistics["YARD_IDLE_TIME(s)"],
+            "wait_at_yard(secs)": statistics["HT_WAIT_AT_YARD(s)"],
+            "wait_at_QC(secs)": statistics["HT_WAIT_AT_QC(s)"],
+            "wait_per_job(secs)": round(
+                (statistics["HT_WAIT_AT_YARD(s)"] + statistics["HT_WAIT_AT_QC(s)"])
+                / max(completed, 1),
+                1,
+            ),
+            "overtakes": statistics["OVERTAKES"],
+        }
+    return {"ticks": args.ticks, "service": results}
+
+
+def scale_manifest(job_df: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """
+    The manifest repeated on ``scale`` copies of the default terminal side by side.
+    Copy m serves QCs and yards 8m QCs and 16m yards further east (the names of the
+    scaled layout), so each copy keeps the QC-to-yard spread of the original.
+    """
+    default_layout = TerminalLayout()
+    QC_names = CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES
+    yard_names = CONSTANT.YARD_FLOOR.YARD_NAMES
+    QC_index = {
+        name: i for i, name in enumerate(QC_names[: default_layout.NUMBER_OF_QCS])
+    }
+    yard_index = {
+        name: i
+        for i, name in enumerate(yard_names[: 2 * default_layout.NUMBER_OF_YARD_BLOCKS])
+    }
+    yard_columns = [
+        "YARD_BLOCK",
+        "ALT_YARD_BLOCK_1",
+        "ALT_YARD_BLOCK_2",
+        "ALT_YARD_BLOCK_3",
+    ]
+    copies = list()
+    for copy_number in range(scale):
+        copy_df = job_df.copy()
+        QC_offset = copy_number * len(QC_index)
+        yard_offset = copy_number * len(yard_index)
+        copy_df["QC_M"] = copy_df["QC_M"].map(
+            lambda name: QC_names[QC_index[name] + QC_offset]
+        )
+        copy_df["QC_JOB_SEQ"] = [
+            f"{QC_name}_{job_seq.split('_')[1]}"
+            for QC_name, job_seq in zip(copy_df["QC_M"], copy_df["QC_JOB_SEQ"])
+        ]
+        for column in yard_columns:
+            copy_df[column] = copy_df[column].map(
+                lambda name: (
+                    yard_names[yard_index[name] + yard_offset]
+                    if name in yard_index
+                    else name
+                )
+            )
+        if copy_number > 0:
+            copy_df["JOB_ID"] = copy_df["JOB_ID"] + f"-{copy_number}"
+            copy_df["CONTAINER_NO"] = copy_df["CONTAINER_NO"] + f"-{copy_number}"
+        copies.append(copy_df)
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_calls(timings: Counter, key: str, method):
+    """``method`` adding its wall time to ``timings[key]``."""
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[key] += time.perf_counter() - started
+
+    return timed
+
+
+def run_scaled_terminal(scale: int, lane_pairs: int, features: str, ticks: int) -> dict:
+    """
+    Simulate the terminal ``scale`` times as large (QCs, yard blocks, HTs and jobs)
+    for ``ticks`` steps, timing the planning engine and the operation engine.
+    Runs in a fresh process: the layout is applied to the shared ``CONSTANT``.
+    """
+    logger.setLevel(logging.WARNING)
+    default_layout = TerminalLayout()
+    job_df = pd.read_csv("data/input.csv", header=0)
+    apply_layout(
+        TerminalLayout(
+            NUMBER_OF_QCS=default_layout.NUMBER_OF_QCS * scale,
+            NUMBER_OF_YARD_BLOCKS=default_layout.NUMBER_OF_YARD_BLOCKS * scale,
+            NUMBER_OF_HTS=default_layout.NUMBER_OF_HTS * scale,
+            NUMBER_OF_HIGHWAY_LANE_PAIRS=lane_pairs,
+        )
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "input.csv")
+        scale_manifest(job_df, scale).to_csv(input_path, index=False)
+        started = time.perf_counter()
+        sim = Simulation(
+            input_path=input_path,
+            planner_features=parse_feature_flags(features),
+        )
+        setup_time = time.perf_counter() - started
+
+    timings = Counter()
+    timed_methods = [
+        (
+            sim.planning_engine,
+            "planner",
+            ["fetch_job_status", "plan", "plan_repositions"],
+        ),
+        (
+            sim.operation_engine,
+            "engine",
+            ["add_new_jobs", "add_repositions", "operate"],
+        ),
+    ]
+    for engine, key, names in timed_methods:
+        for name in names:
+            setattr(engine, name, time_calls(timings, key, getattr(engine, name)))
+    ticks_run = run_simulation(sim, ticks)
+    return {
+        "HTs": len(CONSTANT.HT_FLEET.HT_NAMES),
+        "QCs": len(CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES),
+        "yards": len(CONSTANT.YARD_FLOOR.YARD_NAMES),
+        "columns": CONSTANT.COORDINATE_MAP.X_RANGE[1] + 1,
+        "jobs": sim.planning_engine.get_number_of_jobs(),
+        "ticks": ticks_run,
+        "completed": sim.planning_engine.get_number_of_completed_jobs(),
+        "setup(secs)": round(setup_time, 2),
+        "planner(ms/tick)": round(1000 * timings["planner"] / max(ticks_run, 1), 3),
+        "engine(ms/tick)": round(1000 * timings["engine"] / max(ticks_run, 1), 3),
+    }
+
+
+def benchmark_scaling(args: argparse.Namespace) -> dict:
+    """Time the planning and operation engines on 1x, 2x, 4x... terminals, each in
+    a fresh process, and their growth relative to the first scale."""
+    results = dict()
+    context = multiprocessing.get_context("spawn")
+    for scale in args.scales:
+        with context.Pool(processes=1) as pool:
+            row = pool.apply(
+                run_scaled_terminal, (scale, args.lane_pairs, args.features, args.ticks)
+            )
+        results[f"{scale}x"] = row
+    base = next(iter(results.values()))
+    for row in results.values():
+        for key in ["planner", "engine"]:
+            base_time = base[f"{key}(ms/tick)"]
+            row[f"{key}_growth"] = (
+                round(row[f"{key}(ms/tick)"] / base_time, 2) if base_time else None
+            )
+    return {"ticks": args.ticks, "scales": results}
+
+
+def print_table(rows: dict):
+    columns = list(next(iter(rows.values())).keys())
+    header = ["name"] + columns
+    lines = [header] + [
+        [name] + [str(row[col]) for col in columns] for name, row in rows.items()
+    ]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    for line in lines:
+        print(
+            "  ".join(cell.rjust(width) for cell, width in zip(line, widths)),
+            flush=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    yard_parser = subparsers.add_parser(
+        "yard-engines", help="compare GA and local-search yard assignment"
+    )
+    yard_parser.add_argument(
+        "--ticks",
+        type=int,
+        default=3000,
+        help="simulation steps used to record windows",
+    )
+    yard_parser.set_defaults(handler=benchmark_yard_engines, table_key="engines")
+
+    drive_parser = subparsers.add_parser(
+        "drive-kernel", help="compare the vectorized drive kernel with the drive loop"
+    )
+    drive_parser.add_argument(
+        "--ticks", type=int, default=2000, help="simulation steps run in each mode"
+    )
+    drive_parser.add_argument(
+        "--fleet-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[80, 800, 8000],
+        help="comma-separated synthetic fleet sizes for the kernel alone",
+    )
+    drive_parser.add_argument(
+        "--repeats", type=int, default=20, help="kernel calls timed per fleet size"
+    )
+    drive_parser.set_defaults(handler=benchmark_drive_kernel, table_key="drive")
+
+    index_parser = subparsers.add_parser(
+        "idle-index",
+        help="compare HT selection via the idle-HT index with a fleet scan",
+    )
+    index_parser.add_argument(
+        "--fleet-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[80, 800, 8000],
+        help="comma-separated synthetic fleet sizes",
+    )
+    index_parser.add_argument(
+        "--idle-share", type=float, default=0.2, help="share of idle HTs in each fleet"
+    )
+    index_parser.add_argument(
+        "--window", type=int, default=80, help="jobs given an HT per planning window"
+    )
+    index_parser.add_argument(
+        "--repeats", type=int, default=20, help="planning windows timed per fleet size"
+    )
+    index_parser.set_defaults(handler=benchmark_idle_index, table_key="selection")
+
+    cycle_parser = subparsers.add_parser(
+        "dual-cycle", help="compare dual-cycle HT tours with single-cycling"
+    )
+    cycle_parser.add_argument(
+        "--jobs", type=int, default=2000, help="completed jobs the makespan is taken at"
+    )
+    cycle_parser.add_argument(
+        "--ticks", type=int, default=20000, help="maximum simulation steps per mode"
+    )
+    cycle_parser.add_argument(
+        "--features",
+        default="",
+        help="JOB_PLANNER_FEATURES enabled in both modes, e.g. direct_legs",
+    )
+    cycle_parser.set_defaults(handler=benchmark_dual_cycle, table_key="cycles")
+
+    slot_parser = subparsers.add_parser(
+        "buffer-slots", help="compare dynamic buffer slots with fixed home slots"
+    )
+    slot_parser.add_argument(
+        "--jobs", type=int, default=2000, help="completed jobs the makespan is taken at"
+    )
+    slot_parser.add_argument(
+        "--ticks", type=int, default=20000, help="maximum simulation steps per mode"
+    )
+    slot_parser.add_argument(
+        "--features",
+        default="",
+        help="JOB_PLANNER_FEATURES enabled in both modes, e.g. direct_legs",
+    )
+    slot_parser.set_defaults(handler=benchmark_buffer_slots, table_key="slots")
+
+    lane_parser = subparsers.add_parser(
+        "lanes", help="compare lane-balanced highway routing with the fixed lanes"
+    )
+    lane_parser.add_argument(
+        "--jobs", type=int, default=2000, help="completed jobs the makespan is taken at"
+    )
+    lane_parser.add_argument(
+        "--ticks", type=int, default=20000, help="maximum simulation steps per mode"
+    )
+    lane_parser.add_argument(
+        "--features",
+        default="",
+        help="JOB_PLANNER_FEATURES enabled in both modes, e.g. direct_legs",
+    )
+    lane_parser.set_defaults(handler=benchmark_lanes, table_key="lanes")
+
+    reservation_parser = subparsers.add_parser(
+        "reservations", help="compare arrival-time reservations with booking order"
+    )
+    reservation_parser.add_argument(
+        "--jobs", type=int, default=2000, help="completed jobs the makespan is taken at"
+    )
+    reservation_parser.add_argument(
+        "--ticks", type=int, default=20000, help="maximum simulation steps per mode"
+    )
+    reservation_parser.add_argument(
+        "--features",
+        default="",
+        help="JOB_PLANNER_FEATURES enabled in both modes, e.g. direct_legs",
+    )
+    reservation_parser.set_defaults(handler=benchmark_reservations, table_key="service")
+
+    scaling_parser = subparsers.add_parser(
+        "scaling", help="time planner and engine on larger terminals and fleets"
+    )
+    scaling_parser.add_argument(
+        "--scales",
+        type=lambda value: [int(scale) for scale in value.split(",")],
+        default=[1, 2, 4],
+        help="comma-separated multiples of the QCs, yard blocks, HTs and jobs",
+    )
+    scaling_parser.add_argument(
+        "--ticks", type=int, default=2000, help="simulation steps per scale"
+    )
+    scaling_parser.add_argument(
+        "--lane-pairs",
+        type=int,
+        default=TerminalLayout().NUMBER_OF_HIGHWAY_LANE_PAIRS,
+        help="pairs of westbound/eastbound highway lanes at every scale",
+    )
+    scaling_parser.add_argument(
+        "--features",
+        default="",
+        help="JOB_PLANNER_FEATURES enabled at every scale, e.g. direct_legs",
+    )
+    scaling_parser.set_defaults(handler=benchmark_scaling, table_key="scales")
+
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    results = args.handler(args)
+    if args.json:
+        print(json.dumps(results), flush=True)
+    else:
+        print(f"Simulated ticks: {results['ticks']}", flush=True)
+        print_table(results[args.table_key])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compile job manifest CSVs to memory-mapped binary scenarios.
+
+A compiled scenario (``.scn``) holds the manifest as fixed-width records with QC,
+yard and job type codes, and is memory-mapped instead of parsed at load time.
+``Simulation`` loads a CSV manifest from the compiled scenario next to it as long as
+it is up to date with the CSV, and parses the CSV otherwise.
+
+    python compile_scenario.py data/input.csv
+    python compile_scenario.py data/manifest_1m.csv --output /tmp/manifest_1m.scn
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from logzero import logger
+
+from src.scenario import compile_scenario, find_compiled_scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="job manifest CSV files")
+    parser.add_argument(
+        "--output",
+        help="compiled scenario to write (one input only; default is next to the CSV)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="compile again even if the compiled scenario is up to date",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=65536, help="rows converted at a time"
+    )
+    args = parser.parse_args()
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output takes a single input")
+
+    for input_path in args.inputs:
+        if not (args.output or args.force) and find_compiled_scenario(input_path):
+            logger.info(f"{input_path} is already compiled.")
+            continue
+        started = time.perf_counter()
+        output_path = compile_scenario(input_path, args.output, args.chunk_size)
+        logger.info(
+            f"Compiled {input_path} to {output_path} "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+
+if __name__ == "__main__":
+    main()
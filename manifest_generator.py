@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Seeded generator of synthetic job manifests for stress and scaling runs.
+
+Writes manifests in the format of ``data/input.csv`` (and ``JobTracker``): every QC
+gets its jobs in sequence, DI jobs carry three alternative yards and LO jobs none.
+Rows are generated and written in chunks, so manifests of millions of jobs are
+produced in bounded memory. The same seed and options give the same file.
+
+    python manifest_generator.py --output data/manifest_1m.csv --qcs 8 --jobs-per-qc 125000
+    python manifest_generator.py --output - --jobs-per-qc 2500,2500,1000 --yard-skew 1.2
+
+Yard names follow the terminal layout (see ``apply_layout``): blocks A, B, ...,
+two yards each.
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from logzero import logger
+
+from src.constant import CONSTANT, get_yard_block_letters
+from src.job import JOB_SEQ_NUMBER_MASK
+
+MANIFEST_COLUMNS = [
+    "JOB_ID",
+    "JOB_TYPE",
+    "CONTAINER_NO",
+    "QC_M",
+    "QC_JOB_SEQ",
+    "YARD_BLOCK",
+    "ALT_YARD_BLOCK_1",
+    "ALT_YARD_BLOCK_2",
+    "ALT_YARD_BLOCK_3",
+]
+NUMBER_OF_ALT_YARDS = 3
+# redraws of an alternative yard before falling back to a uniform draw
+MAX_ALT_YARD_REDRAWS = 100
+LETTERS = np.array([chr(ord("A") + i) for i in range(26)])
+
+
+def get_yard_names(number_of_yard_blocks: int) -> List[str]:
+    return [
+        f"{get_yard_block_letters(block)}{number}"
+        for block in range(number_of_yard_blocks)
+        for number in (1, 2)
+    ]
+
+
+def get_yard_weights(
+    yard_names: Sequence[str],
+    skew: float,
+    weights: Optional[Dict[str, float]],
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Probability of each yard being preferred. Explicit ``weights`` (yards left out
+    weigh 0) take precedence; otherwise a Zipf law of exponent ``skew`` over a seeded
+    ranking of the yards, uniform for a skew of 0.
+    """
+    if weights:
+        unknown = set(weights) - set(yard_names)
+        if unknown:
+            raise ValueError(f"Unknown yards in weights: {sorted(unknown)}")
+        probabilities = np.array([weights.get(name, 0.0) for name in yard_names])
+    else:
+        ranks = rng.permutation(len(yard_names))
+        probabilities = 1.0 / (ranks + 1.0) ** skew
+    if (probabilities < 0).any() or probabilities.sum() <= 0:
+        raise ValueError("Yard weights must be non-negative and not all 0.")
+    return probabilities / probabilities.sum()
+
+
+def draw_alt_yards(
+    preferred: np.ndarray,
+    yard_probabilities: np.ndarray,
+    correlation: float,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    ``NUMBER_OF_ALT_YARDS`` distinct alternative yards (indices) per preferred yard,
+    all different from it. Each is, with probability ``correlation``, a yard of the
+    same or a neighbouring block as the preferred yard, otherwise drawn from the
+    preferred-yard distribution. After ``MAX_ALT_YARD_REDRAWS`` draws that are all
+    taken (e.g. fewer yards have a weight than alternatives are needed), it is drawn
+    uniformly from the yards not taken yet.
+    """
+    number_of_yards = len(yard_probabilities)
+    number_of_blocks = number_of_yards // 2
+    alts = np.empty((len(preferred), NUMBER_OF_ALT_YARDS), dtype=np.int64)
+    taken = preferred[:, None]
+    for column in range(NUMBER_OF_ALT_YARDS):
+        rows = np.arange(len(preferred))
+        for _ in range(MAX_ALT_YARD_REDRAWS):
+            if not len(rows):
+                break
+            near_block = np.clip(
+                preferred[rows] // 2 + rng.integers(-1, 2, len(rows)),
+                0,
+                number_of_blocks - 1,
+            )
+            near = near_block * 2 + rng.integers(0, 2, len(rows))
+            spread = rng.choice(number_of_yards, len(rows), p=yard_probabilities)
+            alts[rows, column] = np.where(
+                rng.random(len(rows)) < correlation, near, spread
+            )
+            # draw again where the yard is the preferred one or an earlier alternative
+            is_taken = (alts[rows, column][:, None] == taken[rows]).any(axis=1)
+            rows = rows[is_taken]
+        if len(rows):
+            scores = rng.random((len(rows), number_of_yards))
+            np.put_along_axis(scores, taken[rows], -1.0, axis=1)
+            alts[rows, column] = scores.argmax(axis=1)
+        taken = np.hstack([taken, alts[:, column : column + 1]])
+    return alts
+
+
+def iter_manifest_chunks(
+    jobs_per_QC: Sequence[int],
+    number_of_yard_blocks: int,
+    DI_share: float = 0.5,
+    yard_skew: float = 0.0,
+    yard_weights: Optional[Dict[str, float]] = None,
+    alt_correlation: float = 0.0,
+    seed: int = 0,
+    chunk_size: int = 65536,
+) -> Iterator[List[List[str]]]:
+    """
+    Rows of the manifest, QC by QC in job sequence, ``chunk_size`` at a time.
+
+    Parameters
+    ----------
+    jobs_per_QC : Sequence[int]
+        Number of jobs of QC1, QC2, ...
+    number_of_yard_blocks : int
+        Yard blocks of the terminal, two yards each.
+    DI_share : float, optional
+        Probability of a job being a discharge (DI) rather than a load (LO) job.
+    yard_skew : float, optional
+        Zipf exponent of the preferred-yard distribution, 0 for uniform.
+    yard_weights : Dict[str, float], optional
+        Relative weight of each yard being preferred, instead of ``yard_skew``.
+    alt_correlation : float, optional
+        Probability of an alternative yard being near the preferred one.
+    seed : int, optional
+        Seed of every random draw.
+    chunk_size : int, optional
+        Rows generated at a time.
+    """
+    if not 0 <= DI_share <= 1 or not 0 <= alt_correlation <= 1:
+        raise ValueError("DI_share and alt_correlation must be within [0, 1].")
+    if max(jobs_per_QC) > JOB_SEQ_NUMBER_MASK:
+        raise ValueError(f"A QC has at most {JOB_SEQ_NUMBER_MASK} jobs.")
+    yard_names = np.array(get_yard_names(number_of_yard_blocks))
+    if len(yard_names) <= NUMBER_OF_ALT_YARDS:
+        raise ValueError(f"DI jobs need {NUMBER_OF_ALT_YARDS + 1} yards at least.")
+    rng = np.random.default_rng(seed)
+    yard_probabilities = get_yard_weights(yard_names, yard_skew, yard_weights, rng)
+    seq_width = max(4, len(str(max(jobs_per_QC))))
+
+    job_number = 0
+    for QC_number, number_of_jobs in enumerate(jobs_per_QC, start=1):
+        QC_name = f"QC{QC_number}"
+        for first_seq in range(1, number_of_jobs + 1, chunk_size):
+            last_seq = min(first_seq + chunk_size, number_of_jobs + 1)
+            seq_numbers = range(first_seq, last_seq)
+            size = len(seq_numbers)
+            is_DI = rng.random(size) < DI_share
+            preferred = rng.choice(len(yard_names), size, p=yard_probabilities)
+            alts = draw_alt_yards(preferred, yard_probabilities, alt_correlation, rng)
+            letters = LETTERS[rng.integers(0, 26, (size, 2))]
+            rows = list()
+            for i, seq_number in enumerate(seq_numbers):
+                job_number += 1
+                alt_names = (
+                    list(yard_names[alts[i]])
+                    if is_DI[i]
+                    else [""] * NUMBER_OF_ALT_YARDS
+                )
+                rows.append(
+                    [
+                        f"JOB{job_number:07d}{letters[i, 0]}",
+                        "DI" if is_DI[i] else "LO",
+                        f"CONT{job_number:07d}{letters[i, 1]}",
+                        QC_name,
+                        f"{QC_name}_{seq_number:0{seq_width}d}",
+                        yard_names[preferred[i]],
+                    ]
+                    + alt_names
+                )
+            yield rows
+
+
+def write_manifest(file: TextIO, chunks: Iterator[List[List[str]]]) -> int:
+    """Write the header and rows to ``file``, return the number of jobs."""
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(MANIFEST_COLUMNS)
+    number_of_jobs = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        number_of_jobs += len(rows)
+    return number_of_jobs
+
+
+def parse_yard_weights(value: str) -> Dict[str, float]:
+    """``A1=3,B2=1``-style yard weights."""
+    weights = dict()
+    for item in value.split(","):
+        name, separator, weight = item.partition("=")
+        if not separator:
+            raise argparse.ArgumentTypeError(f"Expected YARD=WEIGHT, got {item!r}")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--output", required=True, help="manifest CSV to write, - for stdout"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--qcs",
+        type=int,
+        help="number of QCs (default is the layout's, or one per --jobs-per-qc count)",
+    )
+    parser.add_argument(
+        "--jobs-per-qc",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=[2500],
+        help="jobs of every QC, or a comma-separated count per QC",
+    )
+    parser.add_argument(
+        "--yard-blocks",
+        type=int,
+        default=len(CONSTANT.YARD_FLOOR.YARD_NAMES) // 2,
+        help="number of yard blocks, two yards each (default is the layout's)",
+    )
+    parser.add_argument(
+        "--di-share", type=float, default=0.5, help="share of DI jobs (default 0.5)"
+    )
+    parser.add_argument(
+        "--yard-skew",
+        type=float,
+        default=0.0,
+        help="Zipf exponent of the preferred-yard distribution (0 is uniform)",
+    )
+    parser.add_argument(
+        "--yard-weights",
+        type=parse_yard_weights,
+        help="preferred-yard weights instead of --yard-skew, e.g. A1=3,B2=1",
+    )
+    parser.add_argument(
+        "--alt-correlation",
+        type=float,
+        default=0.0,
+        help="probability of an alternative yard being near the preferred one",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=65536, help="rows generated at a time"
+    )
+    args = parser.parse_args()
+
+    jobs_per_QC = args.jobs_per_qc
+    if len(jobs_per_QC) == 1:
+        jobs_per_QC = jobs_per_QC * (
+            args.qcs or len(CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES)
+        )
+    elif args.qcs not in (None, len(jobs_per_QC)):
+        parser.error(f"--jobs-per-qc has {len(jobs_per_QC)} counts for {args.qcs} QCs")
+    chunks = iter_manifest_chunks(
+        jobs_per_QC=jobs_per_QC,
+        number_of_yard_blocks=args.yard_blocks,
+        DI_share=args.di_share,
+        yard_skew=args.yard_skew,
+        yard_weights=args.yard_weights,
+        alt_correlation=args.alt_correlation,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+    )
+    if args.output == "-":
+        number_of_jobs = write_manifest(sys.stdout, chunks)
+    else:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", newline="") as file:
+            number_of_jobs = write_manifest(file, chunks)
+        logger.info(
+            f"Wrote {number_of_jobs} jobs of {len(jobs_per_QC)} QCs to {args.output}."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Main simulation runner that integrates the full Python simulation engine
 Outputs JSON stats for the frontend to consume
 """
 
+import argparse
 import sys
 import json
 import time
@@ -15,17 +16,35 @@ sys.path.insert(0, str(Path(__file__).parent))
 from src.simulation import Simulation
 from src.constant import CONSTANT
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the full simulation engine")
+    parser.add_argument(
+        "--input", default="data/input.csv", help="job manifest CSV or compiled scenario"
+    )
+    parser.add_argument(
+        "--output", default="data/output.csv", help="job report CSV to write"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream the manifest QC by QC, in bounded memory",
+    )
+    return parser.parse_args()
+
 def main():
     """Run the full simulation with real-time stats output"""
+    args = parse_args()
     print("=" * 60, flush=True)
     print("CONTAINER TERMINAL SIMULATION - FULL ENGINE", flush=True)
     print("=" * 60, flush=True)
     
     try:
         # Initialize simulation with full engine
-        sim = Simulation()
+        sim = Simulation(
+            input_path=args.input, output_path=args.output, stream_input=args.stream
+        )
         print("\n✓ Simulation engine initialized", flush=True)
-        print(f"✓ Loaded job data from input.csv", flush=True)
+        print(f"✓ Loaded job data from {args.input}", flush=True)
         print(f"✓ Planning interval: {CONSTANT.PLANNING_INTERVAL} time units", flush=True)
         print(f"✓ System time step: {CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED} seconds", flush=True)
         print("\nStarting simulation...\n", flush=True)
@@ -70,13 +89,27 @@ def main():
         final_stats = sim.export_terminal_statistics()
         print(f"\n✓ Total jobs completed: {final_stats['JOBS']['COMPLETED']}", flush=True)
         print(f"✓ Total simulation time: {final_stats['JOBS']['TIME(secs)']} seconds", flush=True)
-        print(f"✓ Output saved to: output.csv", flush=True)
+        print(f"✓ Output saved to: {args.output}", flush=True)
+        gridlock_stats = sim.export_gridlock_statistics()
+        if gridlock_stats["DETECTED"]:
+            print(
+                f"✓ Gridlocks resolved: {gridlock_stats['RESOLVED']}/{gridlock_stats['DETECTED']} "
+                f"({gridlock_stats['REROUTED_HT']} HTs re-routed)",
+                flush=True,
+            )
+        service_stats = sim.export_service_statistics()
+        print(
+            f"✓ Yard idle time: {service_stats['YARD_IDLE_TIME(s)']} s, HT wait: "
+            f"{service_stats['HT_WAIT_AT_QC(s)']} s at QCs, "
+            f"{service_stats['HT_WAIT_AT_YARD(s)']} s at yards",
+            flush=True,
+        )
         
         # Output final stats as JSON
         print(json.dumps(final_stats), flush=True)
         
     except FileNotFoundError:
-        print("\n✗ ERROR: input.csv not found", file=sys.stderr, flush=True)
+        print(f"\n✗ ERROR: {args.input} not found", file=sys.stderr, flush=True)
         print("Please upload a CSV file first.", file=sys.stderr, flush=True)
         sys.exit(1)
     except Exception as e:
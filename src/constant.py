@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, List, Tuple, Union
+from typing import Any, Dict, List, Tuple, Union
 
 
 @dataclass(frozen=True)
@@ -170,6 +170,23 @@ class HTFleet:
     )
 
 
+@dataclass(frozen=True)
+class TerminalLayout:
+    """
+    Size of the terminal and its fleet, see ``apply_layout``. QCs along the quay and
+    yard blocks (of two yards each) along the yard row are set every
+    NUMBER_OF_SECTORS_BETWEEN_BLOCKS columns from the west; the highway between the
+    buffer lane and the yards has NUMBER_OF_HIGHWAY_LANE_PAIRS pairs of westbound and
+    eastbound lanes.
+    """
+
+    NUMBER_OF_QCS: int = 8
+    NUMBER_OF_YARD_BLOCKS: int = 8
+    NUMBER_OF_HTS: int = 80
+    NUMBER_OF_HIGHWAY_LANE_PAIRS: int = 3
+    NUMBER_OF_SECTORS_BETWEEN_BLOCKS: int = 5
+
+
 @dataclass(frozen=True)
 class UIConstant:
     SCREEN: Screen = Screen()
@@ -182,9 +199,147 @@ class UIConstant:
     YARD_FLOOR: YardFloor = YardFloor()
     JOB_TRACKER: JobTracker = JobTracker()
     JOB_PARAMETER: JobParameter = JobParameter()
+    LAYOUT: TerminalLayout = TerminalLayout()
 
     PLANNING_INTERVAL: int = 60  # one minute
     DEADLOCK_THRESHOLD: int = 3600  # one hour
+    # re-route an HT blocked this many ticks on a full sector (blocked_rerouting),
+    # unless the detour adds more than the given number of moves
+    BLOCKED_REROUTE_TICKS: int = 10
+    BLOCKED_REROUTE_MAX_EXTRA_MOVES: int = 0
+    # dual_cycle: an LO job only joins the tour of a DI job of the same QC this
+    # many sequence numbers ahead, so the QC does not idle while the HT is at the yards
+    DUAL_CYCLE_MIN_SEQ_GAP: int = 5
+    # repositioning: idle HTs are spread over the buffer lane after the first leg
+    # of the jobs this many sequence numbers ahead per QC, and only moved when it
+    # shortens that leg by at least the given number of moves
+    REPOSITION_FORECAST_JOBS: int = 20
+    REPOSITION_MIN_SAVING: int = 4
+    # arrival_reservations: a QC/yard serves a job whose HT has arrived ahead of
+    # queued jobs whose HTs are expected more than this many seconds later
+    RESERVATION_OVERTAKE_MARGIN: int = 0
 
 
 CONSTANT = UIConstant()
+
+
+def override_constants(overrides: Dict[str, Any]):
+    """
+    Replace values of ``CONSTANT`` in place, keyed by dotted attribute path, e.g.
+    ``{"JOB_PARAMETER.YARD_WORK_TIME_REQUIRED": 240, "PLANNING_INTERVAL": 120}``.
+
+    Modules share the ``CONSTANT`` instance, so its frozen dataclasses are updated
+    in place. Values copied at import time (e.g. default arguments) keep the original
+    value: apply overrides in a fresh process before importing the simulation, as
+    ``batch_runner.py`` does.
+    """
+    for key, value in overrides.items():
+        *owner_names, name = key.split(".")
+        owner = CONSTANT
+        for owner_name in owner_names:
+            owner = getattr(owner, owner_name, None)
+        if (owner is None) or not hasattr(owner, name):
+            raise KeyError(f"Unknown constant: {key}")
+        object.__setattr__(owner, name, value)
+    if any(key.startswith("LAYOUT.") for key in overrides):
+        apply_layout(CONSTANT.LAYOUT)
+
+
+def get_yard_block_letters(index: int) -> str:
+    """Letters of the yard block at ``index``: A to Z, then AA, AB, ..."""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def apply_layout(layout: TerminalLayout):
+    """
+    Set the terminal map, QC and yard names and HT fleet of ``CONSTANT`` from
+    ``layout``, in place (see ``override_constants``). The default layout gives the
+    default constants.
+
+    The map spans the widest of the quay and the yard row plus the two columns HTs
+    turn on east of them. HTs start two to a buffer lane cell from x = 2 eastwards.
+    """
+    if min(layout.NUMBER_OF_QCS, layout.NUMBER_OF_YARD_BLOCKS) < 1:
+        raise ValueError("A terminal needs at least one QC and one yard block.")
+    if layout.NUMBER_OF_HIGHWAY_LANE_PAIRS < 1:
+        raise ValueError("A terminal needs at least one pair of highway lanes.")
+    if layout.NUMBER_OF_SECTORS_BETWEEN_BLOCKS < 5:
+        raise ValueError("Blocks need 5 columns: 4 yard IN/OUT sectors and a gap.")
+
+    spacing = layout.NUMBER_OF_SECTORS_BETWEEN_BLOCKS
+    QC_floor, yard_floor = CONSTANT.QUAY_CRANE_FLOOR, CONSTANT.YARD_FLOOR
+    last_QC_out_x = QC_floor.START_SECTOR_X + spacing * (layout.NUMBER_OF_QCS - 1) + 1
+    last_yard_out_x = (
+        yard_floor.START_SECTOR_X + spacing * (layout.NUMBER_OF_YARD_BLOCKS - 1) + 3
+    )
+    last_x = max(last_QC_out_x, last_yard_out_x) + 2
+    first_highway_y = CONSTANT.TERMINAL_FLOOR.BUFFER_ZONE_LANE.SECTOR_RANGE_Y[-1] + 1
+    number_of_highway_lanes = 2 * layout.NUMBER_OF_HIGHWAY_LANE_PAIRS
+    highway_lanes = list(
+        range(first_highway_y, first_highway_y + number_of_highway_lanes)
+    )
+    yard_y = highway_lanes[-1] + 1
+
+    # buffer lane cells hold two HTs
+    buffer_y = CONSTANT.TERMINAL_FLOOR.BUFFER_ZONE_LANE.SECTOR_RANGE_Y[0]
+    HT_columns = [x for x in range(2, last_x) for _ in range(2)]
+    if layout.NUMBER_OF_HTS > len(HT_columns):
+        raise ValueError(
+            f"{layout.NUMBER_OF_HTS} HTs do not fit the buffer lane "
+            f"({len(HT_columns)} places)."
+        )
+    HT_columns = HT_columns[: layout.NUMBER_OF_HTS]
+    HT_name_width = max(2, len(str(layout.NUMBER_OF_HTS)))
+    sector_size_px = CONSTANT.SCREEN.SECTOR_SIZE_PX
+
+    def update(owner, **values):
+        for name, value in values.items():
+            object.__setattr__(owner, name, value)
+
+    update(CONSTANT, LAYOUT=layout)
+    update(
+        CONSTANT.SCREEN,
+        NUMBER_OF_SECTORS_X=last_x + 1,
+        WIDTH_PX=sector_size_px * (last_x + 1),
+    )
+    update(CONSTANT.TERMINAL_FLOOR.HIGHWAY_LANE, SECTOR_RANGE_Y=highway_lanes)
+    update(
+        CONSTANT.TERMINAL_FLOOR,
+        NUMBER_OF_SECTORS_X=last_x + 1,
+        NUMBER_OF_SECTORS_Y=yard_y - CONSTANT.TERMINAL_FLOOR.START_SECTOR_Y,
+        RIGHT_ARROW_SECTOR_X=CONSTANT.TERMINAL_FLOOR.QC_TRAVEL_LANE.SECTOR_RANGE_Y
+        + highway_lanes[1::2],
+        LEFT_ARROW_SECTOR_X=highway_lanes[0::2],
+    )
+    update(
+        QC_floor,
+        NUMBER_OF_SECTORS_BETWEEN_QC=spacing,
+        QC_NAMES=[f"QC{i}" for i in range(1, layout.NUMBER_OF_QCS + 1)],
+    )
+    update(
+        yard_floor,
+        START_SECTOR_Y=yard_y,
+        NUMBER_OF_SECTORS_BETWEEN_YARD_BLOCK=spacing,
+        YARD_NAMES=[
+            f"{get_yard_block_letters(block)}{number}"
+            for block in range(layout.NUMBER_OF_YARD_BLOCKS)
+            for number in (1, 2)
+        ],
+    )
+    update(CONSTANT.COORDINATE_MAP, X_RANGE=(0, last_x), Y_RANGE=(0, yard_y))
+    update(
+        CONSTANT.HT_FLEET,
+        HT_NAMES=[
+            f"HT_{i:0{HT_name_width}}" for i in range(1, layout.NUMBER_OF_HTS + 1)
+        ],
+        HT_INIT_COORDINATES=[(x, buffer_y) for x in HT_columns],
+        HT_INIT_PIXEL_LOCATION=[
+            ((x + 1 / 2) * sector_size_px, (buffer_y + 1 / 2) * sector_size_px)
+            for x in HT_columns
+        ],
+    )
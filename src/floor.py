@@ -1,5 +1,6 @@
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Callable, Collection, Dict, List, Optional, Sequence
 
 import numpy as np
 
@@ -24,6 +25,27 @@ class In_Out_Coord:
     out_coord: Coordinate
 
 
+def get_QC_gate_columns() -> List[int]:
+    """Columns of the QCs' IN and OUT sectors, QC by QC (see ``CONSTANT.LAYOUT``)."""
+    QC_floor = CONSTANT.QUAY_CRANE_FLOOR
+    return [
+        QC_floor.START_SECTOR_X + i * QC_floor.NUMBER_OF_SECTORS_BETWEEN_QC + j
+        for i in range(len(QC_floor.QC_NAMES))
+        for j in range(2)
+    ]
+
+
+def get_yard_gate_columns() -> List[int]:
+    """Columns of the yards' IN and OUT sectors, yard by yard, two yards per block."""
+    yard_floor = CONSTANT.YARD_FLOOR
+    spacing = yard_floor.NUMBER_OF_SECTORS_BETWEEN_YARD_BLOCK
+    return [
+        yard_floor.START_SECTOR_X + i * spacing + j
+        for i in range(len(yard_floor.YARD_NAMES) // 2)
+        for j in range(4)
+    ]
+
+
 class Sector:
     """Represents a sector within the terminal, defined by a coordinate and possible movement directions.
 
@@ -47,6 +69,8 @@ class Sector:
         List of identifiers for current occupators of this sector.
     __capacity : int
         Maximum number of occupators allowed in this sector.
+    __waiters : List[str]
+        HTs blocked on entering this sector, re-evaluated once an occupator leaves.
     """
 
     def __init__(
@@ -62,6 +86,7 @@ class Sector:
 
         self.__occupators: List[str] = list()
         self.__capacity: int = capacity
+        self.__waiters: List[str] = list()
 
     def __get_onscreen_movable_coordinates(
         self, moveable_directions: List[str]
@@ -82,15 +107,15 @@ class Sector:
                 next_x, next_y = self.__coordinate.x, self.__coordinate.y + 1
 
             # validate the sector is not out of the map
-            if (1 <= next_x <= 42) and (3 <= next_y <= 13):
+            last_x = CONSTANT.COORDINATE_MAP.X_RANGE[1]
+            yard_y = CONSTANT.YARD_FLOOR.START_SECTOR_Y
+            if (1 <= next_x <= last_x) and (3 <= next_y <= yard_y):
                 # if y = 3, they belongs to QC's IN and OUT
-                QC_valid_x = [i + j for i in range(3, 42, 5) for j in range(2)]
-                if (next_y == 3) and (next_x not in QC_valid_x):
+                if (next_y == 3) and (next_x not in get_QC_gate_columns()):
                     continue
 
-                # if y = 13, they belongs to Yard's IN and OUT
-                yard_valid_x = [i + j for i in range(2, 42, 5) for j in range(4)]
-                if (next_y == 13) and (next_x not in yard_valid_x):
+                # if y = yard row, they belongs to Yard's IN and OUT
+                if (next_y == yard_y) and (next_x not in get_yard_gate_columns()):
                     continue
 
                 onscreen_coordinates.append(Coordinate(next_x, next_y))
@@ -126,6 +151,22 @@ class Sector:
     def has_occupator(self, HT_name: str) -> bool:
         return HT_name in self.__occupators
 
+    def add_waiter(self, HT_name: str):
+        if HT_name not in self.__waiters:
+            self.__waiters.append(HT_name)
+
+    def remove_waiter(self, HT_name: str):
+        if HT_name in self.__waiters:
+            self.__waiters.remove(HT_name)
+
+    def get_waiters(self) -> List[str]:
+        return self.__waiters.copy()
+
+    def pop_waiters(self) -> List[str]:
+        waiters = self.__waiters
+        self.__waiters = list()
+        return waiters
+
     def __str__(self):
         return f"<{self.__class__.__name__}: {self.__coordinate}>"
 
@@ -217,6 +258,18 @@ class SectorMap:
         self.__QC_sector_map = self.__set_QC_sector_map()
         self.__buffer_sector_coords = self.__set_buffer_sector_coords()
         self.__yard_sector_map = self.__set_yard_sector_map()
+        self.__vacancy_listener: Optional[Callable[[str], None]] = None
+
+        # flat per-cell arrays (cell id = y * number of columns + x) for array kernels
+        self.__number_of_columns: int = CONSTANT.COORDINATE_MAP.X_RANGE[1] + 1
+        self.__capacity_array: np.ndarray = np.array(
+            [
+                sector.get_capacity() if sector else 0
+                for sector in self.__data.flatten()
+            ],
+            dtype=np.int64,
+        )
+        self.__occupancy_array: np.ndarray = np.zeros_like(self.__capacity_array)
 
     def __initialize_data(self):
         sector_type_map = list()
@@ -226,37 +279,34 @@ class SectorMap:
         sector_type_map.extend([[None] * CONSTANT.SCREEN.NUMBER_OF_SECTORS_X] * 3)
 
         # 1 QC in-out
-        qc_sectors = [None] * 3 + ["QC_IN", "QC_OUT", None, None, None] * 8
+        number_of_columns = CONSTANT.SCREEN.NUMBER_OF_SECTORS_X
+        qc_sectors = [None] * number_of_columns
+        for i, x in enumerate(get_QC_gate_columns()):
+            qc_sectors[x] = ["QC_IN", "QC_OUT"][i % 2]
         sector_type_map.append(qc_sectors)
 
         # 2 QC Travel lane
-        qc_travel_lane_sectors = [None] + ["QC_TRAVEL"] * 42
+        qc_travel_lane_sectors = [None] + ["QC_TRAVEL"] * (number_of_columns - 1)
         sector_type_map.extend([qc_travel_lane_sectors] * 2)
 
         # 1 Bufer lane
-        buffer_lane_sectors = [None] + ["BUFFER"] * 42
+        buffer_lane_sectors = [None] + ["BUFFER"] * (number_of_columns - 1)
         sector_type_map.append(buffer_lane_sectors)
 
-        # 6 Highway lane
-        highway_left_sectors = [None] + ["HIGHWAY_LEFT"] * 42
-        highway_right_sectors = [None] + ["HIGHWAY_RIGHT"] * 42
+        # Highway lanes, alternately westbound and eastbound (6 by default)
+        highway_left_sectors = [None] + ["HIGHWAY_LEFT"] * (number_of_columns - 1)
+        highway_right_sectors = [None] + ["HIGHWAY_RIGHT"] * (number_of_columns - 1)
+        number_of_lane_pairs = (
+            len(CONSTANT.TERMINAL_FLOOR.HIGHWAY_LANE.SECTOR_RANGE_Y) // 2
+        )
         sector_type_map.extend(
-            [
-                highway_left_sectors,
-                highway_right_sectors,
-                highway_left_sectors,
-                highway_right_sectors,
-                highway_left_sectors,
-                highway_right_sectors,
-            ]
+            [highway_left_sectors, highway_right_sectors] * number_of_lane_pairs
         )
 
         # 1 Yard in-out
-        yard_sectors = (
-            [None] * 2
-            + ["YARD_IN", "YARD_OUT", "YARD_IN", "YARD_OUT", None] * 8
-            + [None]
-        )
+        yard_sectors = [None] * number_of_columns
+        for i, x in enumerate(get_yard_gate_columns()):
+            yard_sectors[x] = ["YARD_IN", "YARD_OUT"][i % 2]
         sector_type_map.append(yard_sectors)
 
         # Follow sector type to create corresponding sectors
@@ -283,31 +333,31 @@ class SectorMap:
         return sector_map
 
     def __set_QC_sector_map(self) -> Dict[str, In_Out_Coord]:
+        gate_columns = get_QC_gate_columns()
         QC_sector_map = {
-            f"QC{i+1}": In_Out_Coord(
-                in_coord=Coordinate(x=3 + i * 5, y=3),
-                out_coord=Coordinate(x=4 + i * 5, y=3),
+            QC_name: In_Out_Coord(
+                in_coord=Coordinate(x=gate_columns[2 * i], y=3),
+                out_coord=Coordinate(x=gate_columns[2 * i + 1], y=3),
             )
-            for i in range(8)
+            for i, QC_name in enumerate(CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES)
         }
         return QC_sector_map
 
     def __set_buffer_sector_coords(self):
-        return [Coordinate(x=i, y=6) for i in range(1, 43, 1)]
+        buffer_y = CONSTANT.TERMINAL_FLOOR.BUFFER_ZONE_LANE.SECTOR_RANGE_Y[0]
+        last_x = CONSTANT.COORDINATE_MAP.X_RANGE[1]
+        return [Coordinate(x=i, y=buffer_y) for i in range(1, last_x + 1, 1)]
 
     def __set_yard_sector_map(self) -> Dict[str, In_Out_Coord]:
-        letters = ["A", "B", "C", "D", "E", "F", "G", "H"]
-        yard_sector_map = dict()
-        for i in range(8):
-            letter = letters[i]
-            yard_sector_map[f"{letter}1"] = In_Out_Coord(
-                in_coord=Coordinate(x=2 + i * 5, y=13),
-                out_coord=Coordinate(x=3 + i * 5, y=13),
-            )
-            yard_sector_map[f"{letter}2"] = In_Out_Coord(
-                in_coord=Coordinate(x=4 + i * 5, y=13),
-                out_coord=Coordinate(x=5 + i * 5, y=13),
+        gate_columns = get_yard_gate_columns()
+        yard_y = CONSTANT.YARD_FLOOR.START_SECTOR_Y
+        yard_sector_map = {
+            yard_name: In_Out_Coord(
+                in_coord=Coordinate(x=gate_columns[2 * i], y=yard_y),
+                out_coord=Coordinate(x=gate_columns[2 * i + 1], y=yard_y),
             )
+            for i, yard_name in enumerate(CONSTANT.YARD_FLOOR.YARD_NAMES)
+        }
 
         return yard_sector_map
 
@@ -324,6 +374,64 @@ class SectorMap:
     def get_yard_sector(self, yard_name: str) -> In_Out_Coord:
         return self.__yard_sector_map.get(yard_name, None)
 
+    def get_cell_id(self, coord: Coordinate) -> int:
+        return coord.y * self.__number_of_columns + coord.x
+
+    def get_capacity_array(self) -> np.ndarray:
+        """Capacity per cell id (0 outside the sectors)."""
+        return self.__capacity_array
+
+    def get_occupancy_array(self) -> np.ndarray:
+        """Number of occupators per cell id, kept in sync with the sectors."""
+        return self.__occupancy_array
+
+    def get_shortest_path(
+        self,
+        from_coord: Coordinate,
+        to_coord: Coordinate,
+        avoid_cell_ids: Collection[int] = (),
+    ) -> Optional[List[Coordinate]]:
+        """
+        Shortest path (fewest moves) from ``from_coord`` to ``to_coord`` following the
+        movable directions of the sectors, None if there is none.
+
+        The path excludes ``from_coord`` and ends at ``to_coord``. It only runs over the
+        travel, buffer and highway lanes: QC (y = 3) and yard (y = 13 by default)
+        sectors are not passed through, and neither are the cells in
+        ``avoid_cell_ids`` (except the destination).
+        """
+        QC_row, yard_row = 3, CONSTANT.YARD_FLOOR.START_SECTOR_Y
+        from_cell = self.get_cell_id(from_coord)
+        to_cell = self.get_cell_id(to_coord)
+        previous: Dict[int, Optional[int]] = {from_cell: None}
+        coords: Dict[int, Coordinate] = {from_cell: from_coord}
+        frontier = deque([from_coord])
+        while frontier:
+            coord = frontier.popleft()
+            if self.get_cell_id(coord) == to_cell:
+                break
+            for next_coord in self.get_sector(coord).get_movable_to_coordinates():
+                next_cell = self.get_cell_id(next_coord)
+                if next_cell in previous:
+                    continue
+                if next_cell != to_cell and (
+                    next_coord.y in (QC_row, yard_row) or next_cell in avoid_cell_ids
+                ):
+                    continue
+                previous[next_cell] = self.get_cell_id(coord)
+                coords[next_cell] = next_coord
+                frontier.append(next_coord)
+
+        if to_cell not in previous or to_cell == from_cell:
+            return None
+        path = list()
+        cell = to_cell
+        while cell != from_cell:
+            path.append(coords[cell])
+            cell = previous[cell]
+        path.reverse()
+        return path
+
     # support tracking HTs' operations
     def is_sector_available(self, coord: Coordinate) -> bool:
         sector = self.get_sector(coord)
@@ -333,6 +441,7 @@ class SectorMap:
         sector = self.get_sector(coord)
         if sector.is_available():
             sector.add_occupator(HT_name)
+            self.__occupancy_array[self.get_cell_id(coord)] += 1
         else:
             raise OverflowError(f"The sector {sector} cannot add more occupator.")
 
@@ -340,9 +449,30 @@ class SectorMap:
         sector = self.get_sector(coord)
         if sector:
             sector.remove_occupator(HT_name)
+            self.__occupancy_array[self.get_cell_id(coord)] -= 1
+            self.__notify_waiters(sector)
         else:
             raise ValueError(f"Sector at coordinate {coord} does not exist.")
 
+    # support blocked HTs waiting on a sector instead of re-checking it every tick
+    def set_vacancy_listener(self, listener: Callable[[str], None]):
+        self.__vacancy_listener = listener
+
+    def wait_for_sector(self, coord: Coordinate, HT_name: str):
+        self.get_sector(coord).add_waiter(HT_name)
+
+    def stop_waiting_for_sector(self, coord: Coordinate, HT_name: str):
+        self.get_sector(coord).remove_waiter(HT_name)
+
+    def get_waiters(self, coord: Coordinate) -> List[str]:
+        return self.get_sector(coord).get_waiters()
+
+    def __notify_waiters(self, sector: Sector):
+        """Hand HTs waiting on a sector to the listener once its occupancy drops."""
+        for HT_name in sector.pop_waiters():
+            if self.__vacancy_listener is not None:
+                self.__vacancy_listener(HT_name)
+
     def move_occupator(
         self, from_coord: Coordinate, to_coord: Coordinate, HT_name: str
     ):
@@ -359,6 +489,9 @@ class SectorMap:
         if from_coord_has_HT and to_coord_not_have_HT and is_movable:
             from_sector.remove_occupator(HT_name)
             to_sector.add_occupator(HT_name)
+            self.__occupancy_array[self.get_cell_id(from_coord)] -= 1
+            self.__occupancy_array[self.get_cell_id(to_coord)] += 1
+            self.__notify_waiters(from_sector)
         else:
             raise ValueError(
                 f"""Invalid occupator move: from_coord_has_HT={from_coord_has_HT}, 
@@ -366,6 +499,25 @@ class SectorMap:
                 """
             )
 
+    def move_occupators(
+        self,
+        HT_names: Sequence[str],
+        from_coords: Sequence[Coordinate],
+        to_coords: Sequence[Coordinate],
+    ):
+        """Apply a batch of moves already resolved against capacity, in the given order.
+
+        Unlike ``move_occupator`` this neither validates the moves nor notifies waiters:
+        the caller resolved them together and keeps the waiter lists up to date.
+        """
+        for HT_name, from_coord, to_coord in zip(HT_names, from_coords, to_coords):
+            self.get_sector(from_coord).remove_occupator(HT_name)
+            self.get_sector(to_coord).add_occupator(HT_name)
+        np.subtract.at(
+            self.__occupancy_array, [self.get_cell_id(c) for c in from_coords], 1
+        )
+        np.add.at(self.__occupancy_array, [self.get_cell_id(c) for c in to_coords], 1)
+
 
 class SectorMapSnapshot:
     def __init__(self, sector_map: SectorMap):
@@ -0,0 +1,76 @@
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from src.constant import CONSTANT
+from src.floor import Coordinate
+
+
+class IdleHTIndex:
+    """
+    Idle (available) HTs bucketed by column (x) of the terminal map, so the HTs
+    nearest to a QC or yard column are found without scanning the whole fleet.
+
+    Buckets span every lane, so HTs parked on the buffer lane and idle HTs driving
+    along the corridors (e.g. repositioning) are indexed alike. The index is kept up
+    to date by the HT operators' lock, release and move events (see
+    ``HT_Coordinate_View``).
+
+    Parameters
+    ----------
+    HT_names : Sequence[str]
+        The fleet, in the order used to break ties between equally near HTs.
+    """
+
+    def __init__(self, HT_names: Sequence[str]):
+        self.__rank: Dict[str, int] = {
+            HT_name: rank for rank, HT_name in enumerate(HT_names)
+        }
+        self.__column_of: Dict[str, int] = dict()
+        self.__columns: Dict[int, Dict[str, Coordinate]] = dict()
+
+    def __len__(self) -> int:
+        return len(self.__column_of)
+
+    def __contains__(self, HT_name: str) -> bool:
+        return HT_name in self.__column_of
+
+    def get_rank(self, HT_name: str) -> int:
+        return self.__rank[HT_name]
+
+    def get_HT_names(self) -> List[str]:
+        """Idle HTs in fleet order."""
+        return sorted(self.__column_of, key=self.__rank.__getitem__)
+
+    def update(self, HT_name: str, coord: Coordinate):
+        """Add the HT as idle at ``coord``, or move it there."""
+        self.remove(HT_name)
+        self.__column_of[HT_name] = coord.x
+        self.__columns.setdefault(coord.x, dict())[HT_name] = coord
+
+    def remove(self, HT_name: str):
+        """The HT is no longer idle (no-op if it was not)."""
+        column = self.__column_of.pop(HT_name, None)
+        if column is not None:
+            bucket = self.__columns[column]
+            del bucket[HT_name]
+            if not bucket:
+                del self.__columns[column]
+
+    def iter_by_distance(self, x: int) -> Iterator[Tuple[int, str, Coordinate]]:
+        """
+        Idle HTs as ``(column distance |HT x - x|, HT name, coordinate)``, nearest
+        column first and in fleet order within a column. Callers may stop early,
+        only the columns reached are visited.
+        """
+        number_left = len(self.__column_of)
+        min_x, max_x = CONSTANT.COORDINATE_MAP.X_RANGE
+        for distance in range(0, max(x - min_x, max_x - x) + 1):
+            if number_left == 0:
+                return
+            columns = (x,) if distance == 0 else (x - distance, x + distance)
+            for column in columns:
+                bucket = self.__columns.get(column)
+                if not bucket:
+                    continue
+                number_left -= len(bucket)
+                for HT_name in sorted(bucket, key=self.__rank.__getitem__):
+                    yield distance, HT_name, bucket[HT_name]
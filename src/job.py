@@ -1,8 +1,43 @@
+from collections import namedtuple
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
 
 from src.floor import Coordinate
 
+# A job ID packs (QC number, sequence number) into one int, e.g. QC3_0042 is
+# (3 << JOB_SEQ_NUMBER_BITS) | 42. Operators, queues and the tracker key on it;
+# QC_job_sequence strings are only formatted for reports, logs and the UI.
+JOB_SEQ_NUMBER_BITS = 20
+JOB_SEQ_NUMBER_MASK = (1 << JOB_SEQ_NUMBER_BITS) - 1
+
+
+def make_job_id(QC_name: str, seq_number: int) -> int:
+    return (int(QC_name[2:]) << JOB_SEQ_NUMBER_BITS) | seq_number
+
+
+def parse_job_seq(job_seq: str) -> int:
+    """Job ID of a QC job sequence string, e.g. QC3_0042."""
+    QC_name, seq_number = job_seq.split("_")
+    return make_job_id(QC_name, int(seq_number))
+
+
+def format_job_seq(job_id: int) -> str:
+    return f"QC{job_id >> JOB_SEQ_NUMBER_BITS}_{job_id & JOB_SEQ_NUMBER_MASK:04d}"
+
+
+def get_QC_number(job_id: int) -> int:
+    return job_id >> JOB_SEQ_NUMBER_BITS
+
+
+def get_seq_number(job_id: int) -> int:
+    return job_id & JOB_SEQ_NUMBER_MASK
+
+
+# Lazy DRIVE path: the route policy (e.g. "buffer_to_QC") with its origin and
+# destination (a coordinate or a QC/yard name), turned into coordinates by a path
+# resolver once the DRIVE starts
+DrivePathSpec = namedtuple("DrivePathSpec", ["route", "origin", "destination"])
+
 
 # Indicate progress status for Job and Resources
 class Status(Enum):
@@ -18,6 +53,21 @@ class InstructionType(Enum):
     BOOK_YARD = 2
     WORK_QC = 3
     WORK_YARD = 24
+    REPOSITION = 5  # an idle HT moving to another buffer slot, outside of any job
+
+
+class ResourceType(Enum):
+    HT = 0
+    QC = 1
+    YARD = 2
+
+
+# resources an instruction releases by default when it completes; the HT is also
+# released by the last instruction of a job
+DEFAULT_RELEASES: Dict[InstructionType, FrozenSet[ResourceType]] = {
+    InstructionType.WORK_QC: frozenset({ResourceType.QC}),
+    InstructionType.WORK_YARD: frozenset({ResourceType.YARD}),
+}
 
 
 class JobInstruction:
@@ -36,10 +86,23 @@ class JobInstruction:
         The name of yard operator involved (default is None).
     path : List[Coordinate], optional
         A list of coordinates representing the path associated with the DRIVE instruction (default is None).
+    path_spec : DrivePathSpec, optional
+        Route of a DRIVE instruction whose path is only built when it starts (default is None).
+    path_resolver : Callable[[DrivePathSpec], List[Coordinate]], optional
+        Builds the path from ``path_spec`` (default is None).
+    releases : Iterable[ResourceType], optional
+        Resources the job no longer needs once this instruction completes (default is
+        ``DEFAULT_RELEASES`` of the instruction type).
+    fallback : List[JobInstruction], optional
+        For a booking: instructions replacing it and the instruction after it (the leg
+        to the booked resource) when the booked resource is not near its turn yet
+        (default is None, i.e. wait in place).
     start_time : int or None
         The start time of the instruction, to be set later.
     end_time : int or None
         The end time of the instruction, to be set later.
+    cancelled : bool
+        Whether the instruction was cancelled before completing (REPOSITION only).
     """
 
     def __init__(
@@ -49,14 +112,29 @@ class JobInstruction:
         QC_name: str = None,
         yard_name: str = None,
         path: List[Coordinate] = None,
+        path_spec: DrivePathSpec = None,
+        path_resolver: Callable[[DrivePathSpec], List[Coordinate]] = None,
+        releases: Iterable[ResourceType] = None,
+        fallback: List["JobInstruction"] = None,
     ):
         self.instructor_type: InstructionType = instruction_type
         self.HT_name: str = HT_name
         self.QC_name: str = QC_name
         self.yard_name: str = yard_name
         self.path: List[Coordinate] = path
+        self.path_spec: Optional[DrivePathSpec] = path_spec
+        self.path_resolver: Optional[Callable[[DrivePathSpec], List[Coordinate]]] = (
+            path_resolver
+        )
+        if releases is None:
+            releases = DEFAULT_RELEASES.get(instruction_type, ())
+        self.releases: FrozenSet[ResourceType] = frozenset(releases)
+        self.fallback: Optional[List[JobInstruction]] = fallback
+        self.path_length: Optional[int] = None
         self.start_time: int = None
         self.end_time: int = None
+        self.cancelled: bool = False
+        self.__cancel_listener: Optional[Callable[[], None]] = None
 
     def has_started(self) -> bool:
         if self.start_time is not None:
@@ -69,6 +147,19 @@ class JobInstruction:
     def set_end_time(self, timestamp: int):
         self.end_time = timestamp
 
+    def set_cancel_listener(self, listener: Callable[[], None]):
+        self.__cancel_listener = listener
+
+    def cancel(self, timestamp: int):
+        """Stop the instruction before it completes and notify the cancel listener."""
+        self.cancelled = True
+        self.end_time = timestamp
+        if self.__cancel_listener is not None:
+            self.__cancel_listener()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled
+
     def get_instruction_type(self) -> str:
         return self.instructor_type
 
@@ -81,20 +172,56 @@ class JobInstruction:
     def get_yard_name(self) -> str:
         return self.yard_name
 
+    def get_releases(self) -> FrozenSet[ResourceType]:
+        return self.releases
+
+    def get_fallback(self) -> Optional[List["JobInstruction"]]:
+        return self.fallback
+
     def get_paths(self) -> List[Coordinate]:
         return self.path
 
+    def get_path_spec(self) -> Optional[DrivePathSpec]:
+        return self.path_spec
+
+    def materialize_path(self) -> List[Coordinate]:
+        """Build the path from the path spec if not done yet, and return it."""
+        if self.path is None and self.path_spec is not None:
+            self.path = self.path_resolver(self.path_spec)
+        return self.path
+
+    def release_path(self):
+        """Drop the path of a finished lazy DRIVE; its path spec still describes it."""
+        if self.path_spec is not None:
+            if self.path is not None:
+                self.path_length = len(self.path)
+            self.path = None
+
+    def get_path_length(self) -> Optional[int]:
+        """Number of cells of the DRIVE path, kept after a lazy path is released."""
+        if self.path is not None:
+            return len(self.path)
+        return self.path_length
+
+    def set_path(self, path: List[Coordinate]):
+        """Replace the DRIVE path, e.g. when the HT is re-routed around a gridlock."""
+        self.path = path
+
     def __str__(self):
         if self.instructor_type == InstructionType.BOOK_QC:
             return f"BOOK_QC({self.QC_name})"
         if self.instructor_type == InstructionType.BOOK_YARD:
             return f"BOOK_YARD({self.yard_name})"
         if self.instructor_type == InstructionType.DRIVE:
+            if self.path is None:
+                return f"DRIVE({self.HT_name}, Route={self.path_spec.route}[{self.path_spec.origin}...{self.path_spec.destination}])"
             return f"DRIVE({self.HT_name}, Path=({len(self.path)})[{self.path[0]}...{self.path[-1]}])"
         if self.instructor_type == InstructionType.WORK_QC:
             return f"WORK_QC({self.QC_name})"
         if self.instructor_type == InstructionType.WORK_YARD:
             return f"WORK_YARD({self.yard_name})"
+        if self.instructor_type == InstructionType.REPOSITION:
+            return f"REPOSITION({self.HT_name}, Path=({len(self.path)})[{self.path[0]}...{self.path[-1]}])"
 
 
 class Job:
@@ -113,6 +240,8 @@ class Job:
         QC involved.
     __QC_job_sequence : str
         QC job sequence identifier.
+    __job_id : int
+        Packed QC job sequence, see ``make_job_id``.
     __yard_name : str
         Primary candidated yard.
     __alt_yard_names : List[str]
@@ -137,6 +266,11 @@ class Job:
         Start time of the job.
     __end_time : int or None
         End time of the job.
+    __next_tour_job_id : int or None
+        Job the HT goes on with, without returning to its buffer, once this one
+        completes (dual-cycle tour).
+    __previous_tour_job_id : int or None
+        Job of the tour this one continues; it starts when that job completes.
     """
 
     def __init__(
@@ -155,6 +289,7 @@ class Job:
         self.__container_number: str = container_number
         self.__QC_name: str = QC_name
         self.__QC_job_sequence: str = QC_job_sequence
+        self.__job_id: int = parse_job_seq(QC_job_sequence)
         self.__yard_name: str = yard_name
         self.__alt_yard_names: List[str] = alt_yard_names
 
@@ -169,6 +304,8 @@ class Job:
         self.__instruction_stage: int = None
         self.__start_time: int = None
         self.__end_time: int = None
+        self.__next_tour_job_id: Optional[int] = None
+        self.__previous_tour_job_id: Optional[int] = None
 
     def assign_job(self, HT_name: str, yard_name: str):
         self.__assigned_HT_name = HT_name
@@ -181,6 +318,7 @@ class Job:
             "container_number": self.__container_number,
             "QC_name": self.__QC_name,
             "QC_job_sequence": self.__QC_job_sequence,
+            "job_id": self.__job_id,
             "yard_name": self.__yard_name,
             "alt_yard_names": self.__alt_yard_names,
             "assigned_yard_name": self.__assigned_yard_name,
@@ -193,6 +331,23 @@ class Job:
             "end_time": self.__end_time,
         }
 
+    def get_job_id(self) -> int:
+        return self.__job_id
+
+    def link_tour(self, next_job: "Job"):
+        """Chain ``next_job`` after this job in the tour of their (shared) HT."""
+        self.__next_tour_job_id = next_job.get_job_id()
+        next_job.__previous_tour_job_id = self.__job_id
+
+    def get_next_tour_job_id(self) -> Optional[int]:
+        return self.__next_tour_job_id
+
+    def get_previous_tour_job_id(self) -> Optional[int]:
+        return self.__previous_tour_job_id
+
+    def get_instructions(self) -> List[JobInstruction]:
+        return self.__instructions
+
     def set_instructions(self, instructions: List[JobInstruction]):
         self.__instructions = instructions
         self.__instruction_stage = 0
@@ -217,21 +372,26 @@ class Job:
     def get_latest_instruction(self) -> JobInstruction:
         return self.__instructions[self.__instruction_stage]
 
+    def replace_instructions(self, count: int, instructions: List[JobInstruction]):
+        """Replace the current instruction and the ``count - 1`` after it."""
+        stage = self.__instruction_stage
+        self.__instructions[stage : stage + count] = instructions
+
     def proceed_to_next_instruction(self, timestamp: int):
         current_instruction = self.get_latest_instruction()
         current_instruction.set_end_time(timestamp)
-        instruction_type = current_instruction.get_instruction_type()
-        current_instruction_stage = self.__instruction_stage
-
-        # when completed instruction was QC WORK/ YARD WORK, release them
-        if current_instruction_stage in [2, 6]:
-            if instruction_type == InstructionType.WORK_QC:
-                self.__QC_status = Status.COMPLETED
-            if instruction_type == InstructionType.WORK_YARD:
-                self.__yard_status = Status.COMPLETED
+        releases = current_instruction.get_releases()
+
+        # release the resources the rest of the job does not need
+        if ResourceType.QC in releases:
+            self.__QC_status = Status.COMPLETED
+        if ResourceType.YARD in releases:
+            self.__yard_status = Status.COMPLETED
+        if ResourceType.HT in releases:
+            self.__HT_status = Status.COMPLETED
 
         # when completed instruction is final stage
-        if current_instruction_stage >= 7:
+        if self.__instruction_stage >= len(self.__instructions) - 1:
             self.__HT_status = Status.COMPLETED
             self.__job_status = Status.COMPLETED
             self.__end_time = timestamp
@@ -0,0 +1,125 @@
+import heapq
+from collections import namedtuple
+from typing import Dict, List
+
+import numpy as np
+
+# Outcome of one drive phase for the HTs passed in (all arrays indexed like the input):
+#   moved       - the HT moves to its target cell in this tick
+#   awake_next  - the HT did not move but its target cell was vacated after its turn,
+#                 so it is re-evaluated next tick instead of staying parked
+DriveResolution = namedtuple("DriveResolution", ["moved", "awake_next"])
+
+
+def resolve_drive_moves(
+    current_cells: np.ndarray,
+    target_cells: np.ndarray,
+    is_awake: np.ndarray,
+    occupancy: np.ndarray,
+    capacity: np.ndarray,
+) -> DriveResolution:
+    """
+    Resolve one drive phase for all driving HTs at once.
+
+    HTs are given in priority order (index 0 moves first). The result is the one of
+    the sequential drive loop (see ``resolve_drive_moves_sequential``): an HT moves
+    when its target cell has room once every earlier HT has moved, and a parked
+    (not awake) HT only takes its turn if an earlier HT leaves its target cell.
+
+    An HT's outcome only depends on earlier HTs whose current or target cell is its
+    target cell, so the HTs are decided in rounds: an HT is decided as soon as it is
+    the earliest undecided HT touching its target cell. Chains where a leading HT
+    frees a cell for a follower take one round per link.
+
+    Parameters
+    ----------
+    current_cells, target_cells : np.ndarray
+        Cell ids (see ``SectorMap.get_cell_id``) of each HT now and after the move.
+    is_awake : np.ndarray
+        False for HTs parked on their target cell until an occupator leaves it.
+    occupancy, capacity : np.ndarray
+        Occupators and capacity per cell id, before the phase.
+    """
+    number_of_HTs = len(current_cells)
+    ranks = np.arange(number_of_HTs, dtype=np.int64)
+    moved = np.zeros(number_of_HTs, dtype=bool)
+    undecided = np.ones(number_of_HTs, dtype=bool)
+    # moves are counted per (cell, rank) through sorted keys cell * n + rank
+    stride = max(number_of_HTs, 1)
+
+    def count_moves(keys: np.ndarray, cells: np.ndarray, lower_ranks, upper_ranks):
+        """Number of keys with the given cell and a rank in [lower, upper)."""
+        return np.searchsorted(keys, cells * stride + upper_ranks) - np.searchsorted(
+            keys, cells * stride + lower_ranks
+        )
+
+    while undecided.any():
+        undecided_ranks = ranks[undecided]
+        first_touching = np.full(len(capacity), number_of_HTs, dtype=np.int64)
+        np.minimum.at(first_touching, current_cells[undecided_ranks], undecided_ranks)
+        np.minimum.at(first_touching, target_cells[undecided_ranks], undecided_ranks)
+        ready = undecided_ranks[
+            first_touching[target_cells[undecided_ranks]] == undecided_ranks
+        ]
+
+        mover_ranks = ranks[moved]
+        arrival_keys = np.sort(target_cells[mover_ranks] * stride + mover_ranks)
+        departure_keys = np.sort(current_cells[mover_ranks] * stride + mover_ranks)
+        cells = target_cells[ready]
+        arrivals_before = count_moves(arrival_keys, cells, 0, ready)
+        departures_before = count_moves(departure_keys, cells, 0, ready)
+
+        is_active = is_awake[ready] | (departures_before > 0)
+        has_room = (
+            occupancy[cells] + arrivals_before - departures_before < capacity[cells]
+        )
+        moved[ready] = is_active & has_room
+        undecided[ready] = False
+
+    mover_ranks = ranks[moved]
+    departure_keys = np.sort(current_cells[mover_ranks] * stride + mover_ranks)
+    departures_after = count_moves(
+        departure_keys, target_cells, ranks + 1, number_of_HTs
+    )
+    awake_next = ~moved & (departures_after > 0)
+    return DriveResolution(moved=moved, awake_next=awake_next)
+
+
+def resolve_drive_moves_sequential(
+    current_cells: np.ndarray,
+    target_cells: np.ndarray,
+    is_awake: np.ndarray,
+    occupancy: np.ndarray,
+    capacity: np.ndarray,
+) -> DriveResolution:
+    """
+    Reference implementation of ``resolve_drive_moves``: the drive loop of
+    ``OperationEngine.operate`` on plain arrays, one HT at a time in priority order.
+    """
+    number_of_HTs = len(current_cells)
+    occupancy = occupancy.copy()
+    moved = np.zeros(number_of_HTs, dtype=bool)
+    awake_next = np.zeros(number_of_HTs, dtype=bool)
+    waiters: Dict[int, List[int]] = dict()
+    for rank in range(number_of_HTs):
+        if not is_awake[rank]:
+            waiters.setdefault(int(target_cells[rank]), list()).append(rank)
+
+    heap = [rank for rank in range(number_of_HTs) if is_awake[rank]]
+    while heap:
+        rank = heapq.heappop(heap)
+        current_cell, target_cell = current_cells[rank], target_cells[rank]
+        if occupancy[target_cell] < capacity[target_cell]:
+            occupancy[current_cell] -= 1
+            occupancy[target_cell] += 1
+            moved[rank] = True
+            # a woken HT still moves in this tick if it comes later in priority
+            for waiter in waiters.pop(int(current_cell), list()):
+                if waiter > rank:
+                    heapq.heappush(heap, waiter)
+                else:
+                    awake_next[waiter] = True
+        else:
+            waiters.setdefault(int(target_cell), list()).append(rank)
+
+    return DriveResolution(moved=moved, awake_next=awake_next)
@@ -1,39 +1,156 @@
+import heapq
+import time
 from collections import namedtuple
-from typing import Dict, List
+from enum import Enum
+from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
 from logzero import logger
 
 from src.constant import CONSTANT
-from src.floor import SectorMap
-from src.job import InstructionType, Job, Status
+from src.floor import Coordinate, SectorMap
+from src.job import (
+    InstructionType,
+    Job,
+    JobInstruction,
+    Status,
+    format_job_seq,
+    get_QC_number,
+    get_seq_number,
+)
+from src.operate.drive_kernel import (
+    resolve_drive_moves,
+    resolve_drive_moves_sequential,
+)
+from src.operate.wait_for_graph import Gridlock, WaitForGraph
+from src.operator_state import OperatorStateStore
 from src.operators import (
     HT_Coordinate_View,
     HTOperator,
     QCOperator,
+    QueuedResourceOperator,
     ResourceOperator,
     YardOperator,
 )
+from src.reservation_scheduler import ReservationScheduler
+from src.utils.features import load_feature_flags
+
+
+class JobBucket(Enum):
+    NOT_STARTED = 0  # planned, waiting for its HT
+    BOOKING = 1  # at a BOOK_QC/BOOK_YARD instruction
+    DRIVING = 2  # at a DRIVE instruction
+    WORKING = 3  # at a WORK_QC/WORK_YARD instruction
+    COMPLETED = 4  # finished, to be removed from the queue
+    WAITING = 5  # parked on a QC/yard operator until it wakes the job up (or its task completes)
+
+
+def get_transit_columns() -> Tuple[int, ...]:
+    """
+    Columns HTs turn up/down on between the QC lanes, highways and yard lanes, (1,
+    41, 42) by default; the planned paths use each one in a single direction.
+    """
+    last_x = CONSTANT.COORDINATE_MAP.X_RANGE[1]
+    return (1, last_x - 1, last_x)
+
+
+# A gridlock and how it was broken: HTs given a detour, the moves it added to their
+# paths, and the wall-clock time spent resolving it (None when it was not resolved)
+GridlockIncident = namedtuple(
+    "GridlockIncident",
+    [
+        "formed_at",
+        "HT_names",
+        "rerouted_HT_names",
+        "extra_steps",
+        "resolution_secs",
+    ],
+)
 
 
 class JobQueue:
+    """
+    Jobs handed over to the operation engine, indexed by job ID and grouped in
+    per-state buckets so each phase of ``OperationEngine.operate`` only touches the jobs
+    it can act on.
+
+    Attributes
+    ----------
+    job_items : Dict[int, Job]
+        All queued jobs by job ID (see ``src.job.make_job_id``), in arrival order.
+    """
+
     def __init__(self):
-        self.job_items: List[Job] = list()
+        self.job_items: Dict[int, Job] = dict()
+        self.__arrival_index: Dict[int, int] = dict()
+        self.__number_of_arrivals: int = 0
+        self.__buckets: Dict[JobBucket, Dict[int, Job]] = {
+            bucket: dict() for bucket in JobBucket
+        }
+        self.__bucket_of: Dict[int, JobBucket] = dict()
+        self.__latest_seq_number_per_QC: Dict[int, int] = dict()
 
     def push(self, job: Job):
-        self.job_items.append(job)
+        job_id = job.get_job_id()
+        QC_number, seq_number = get_QC_number(job_id), get_seq_number(job_id)
+
+        # jobs of the same QC must arrive in job sequence order
+        latest_seq_number = self.__latest_seq_number_per_QC.get(QC_number, 0)
+        if seq_number <= latest_seq_number:
+            raise ValueError(
+                f"Job Sequence {format_job_seq(job_id)} arrived after "
+                f"QC{QC_number}_{latest_seq_number:04d}."
+            )
+        self.__latest_seq_number_per_QC[QC_number] = seq_number
+
+        self.job_items[job_id] = job
+        self.__arrival_index[job_id] = self.__number_of_arrivals
+        self.__number_of_arrivals += 1
+        self.__buckets[JobBucket.NOT_STARTED][job_id] = job
+        self.__bucket_of[job_id] = JobBucket.NOT_STARTED
+
+    def pop_by_job_id(self, job_id: int):
+        if job_id not in self.job_items:
+            raise ValueError(f"Job Sequence {format_job_seq(job_id)} not found.")
+        del self.job_items[job_id]
+        del self.__arrival_index[job_id]
+        bucket = self.__bucket_of.pop(job_id)
+        del self.__buckets[bucket][job_id]
+
+    def get_job_by_job_id(self, job_id: int):
+        job = self.job_items.get(job_id)
+        if job is None:
+            raise ValueError(f"Job Sequence {format_job_seq(job_id)} not found.")
+        return job
+
+    def move(self, job_id: int, bucket: JobBucket):
+        current_bucket = self.__bucket_of[job_id]
+        if current_bucket == bucket:
+            return
+        job = self.__buckets[current_bucket].pop(job_id)
+        self.__buckets[bucket][job_id] = job
+        self.__bucket_of[job_id] = bucket
 
-    def pop_by_job_seq(self, job_seq: str):
-        for i, job in enumerate(self.job_items):
-            if job_seq == job.get_job_info().get("QC_job_sequence"):
-                self.job_items.pop(i)
-                return
-        raise ValueError(f"Job Sequence {job_seq} not found.")
+    def get_arrival_index(self, job_id: int) -> int:
+        return self.__arrival_index[job_id]
 
-    def get_job_by_job_seq(self, job_seq: str):
-        for i, job in enumerate(self.job_items):
-            if job_seq == job.get_job_info().get("QC_job_sequence"):
-                return job
-        raise ValueError(f"Job Sequence {job_seq} not found.")
+    def get_bucket_job_ids(self, *buckets: JobBucket) -> List[Tuple[int, int]]:
+        """Snapshot of ``(arrival index, job ID)`` in the given buckets, in arrival order."""
+        arrivals = [
+            (self.__arrival_index[job_id], job_id)
+            for bucket in buckets
+            for job_id in self.__buckets[bucket]
+        ]
+        if len(buckets) > 1 or buckets[0] != JobBucket.NOT_STARTED:
+            # only NOT_STARTED is filled purely by push, others need re-ordering
+            arrivals.sort()
+        return arrivals
+
+    def get_bucket_jobs(self, *buckets: JobBucket) -> List[Job]:
+        """Snapshot of the jobs in the given buckets, in arrival order."""
+        return [
+            self.job_items[job_id] for _, job_id in self.get_bucket_job_ids(*buckets)
+        ]
 
     def is_empty(self):
         return len(self.job_items) == 0
@@ -42,7 +159,7 @@ class JobQueue:
         return len(self.job_items)
 
     def __iter__(self):
-        return iter(self.job_items)
+        return iter(self.job_items.values())
 
 
 class OperationEngine:
@@ -57,6 +174,11 @@ class OperationEngine:
         yard resource group, QC resource group, and the sector map.
     monitoring_resources : namedtuple
         A namedtuple containing monitoring resources such as HT coordinate tracker.
+    feature_overrides : Dict[str, bool], optional
+        Engine feature toggles, on top of the ``OPERATION_ENGINE_FEATURES`` env var.
+    blocked_reroute_ticks : int, optional
+        Ticks an HT waits on a full sector before ``blocked_rerouting`` gives it a
+        detour.
 
     Attributes
     ----------
@@ -68,8 +190,25 @@ class OperationEngine:
         Mapping of QC operator names to their instances.
     sector_map : SectorMap
         The sector map representing the operational environment.
+    operator_state_store : OperatorStateStore
+        Fleet-level QC/yard/HT state, used to advance all work tasks in one step.
     HT_coord_tracker : HT_Coordinate_View
         Tracker for HT coordinates.
+    wait_for_graph : WaitForGraph
+        Wait-for relation of blocked HTs, reporting gridlocks the tick they form.
+    gridlock_incidents : List[GridlockIncident]
+        Gridlocks detected so far and how they were resolved.
+    number_of_blocked_reroutes : int
+        HTs given a detour by ``blocked_rerouting`` so far.
+    number_of_repositions : int
+        REPOSITION instructions started so far.
+    number_of_cancelled_repositions : int
+        Of these, the ones cancelled because their HT got a job before leaving.
+    yard_idle_time : int
+        Seconds yards were free while a booked job was queued on them.
+    HT_wait_time : Dict[str, int]
+        Seconds HTs waited at a QC (``"QC"``) or yard (``"YARD"``) between their
+        arrival and the start of the service, the starting tick excluded.
     job_queue : JobQueue
         Queue managing jobs to be processed.
     time_counter : int
@@ -80,7 +219,20 @@ class OperationEngine:
         self,
         operation_resources: namedtuple,
         monitoring_resources: namedtuple,
+        feature_overrides: Optional[Dict[str, bool]] = None,
+        blocked_reroute_ticks: int = CONSTANT.BLOCKED_REROUTE_TICKS,
     ):
+        self.__features: Dict[str, bool] = load_feature_flags(
+            "OPERATION_ENGINE_FEATURES",
+            defaults={
+                "vectorized_drive": False,
+                "verify_drive_kernel": False,
+                "gridlock_rerouting": True,
+                "blocked_rerouting": False,
+                "arrival_reservations": False,
+            },
+            overrides=feature_overrides,
+        )
 
         self.HT_resource_group: Dict[str, HTOperator] = (
             operation_resources.HT_resource_group
@@ -92,34 +244,119 @@ class OperationEngine:
             operation_resources.QC_resource_group
         )
         self.sector_map: SectorMap = operation_resources.sector_map
+        self.operator_state_store: OperatorStateStore = (
+            operation_resources.operator_state_store
+        )
         self.HT_coord_tracker: HT_Coordinate_View = (
             monitoring_resources.HT_coord_tracker
         )
         self.job_queue: JobQueue = JobQueue()
         self.time_counter: int = 0
 
+        # booking/work pass in progress: heap of (arrival index, job ID) still to visit
+        self.__pass_heap: Optional[List[Tuple[int, int]]] = None
+        self.__pass_cursor: int = -1
+        for operator in list(self.QC_resource_group.values()) + list(
+            self.yard_resource_group.values()
+        ):
+            operator.set_wake_listener(self.wake_job)
+            if self.__features["arrival_reservations"]:
+                operator.set_reservation_scheduler(
+                    ReservationScheduler(
+                        clock=self.get_current_time,
+                        overtake_margin=CONSTANT.RESERVATION_OVERTAKE_MARGIN,
+                    )
+                )
+        # arrival_reservations: QC/yard a job booked for the DRIVE it starts next, and
+        # QC/yard each HT is driving to with a reservation
+        self.__booked_operators: Dict[int, QueuedResourceOperator] = dict()
+        self.__reserved_operators: Dict[str, QueuedResourceOperator] = dict()
+        self.yard_idle_time: int = 0
+        self.HT_wait_time: Dict[str, int] = {"QC": 0, "YARD": 0}
+
+        # drive phase: jobs whose DRIVE starts next tick, HTs to move, and the
+        # drive pass in progress (heap of HT names still to move)
+        self.__pending_drive_starts: List[int] = list()
+        self.__awake_drivers: Set[str] = set()
+        self.__parked_drivers: Set[str] = set()  # waiting on their planned sector
+        self.__drive_heap: Optional[List[str]] = None
+        self.__drive_cursor: str = ""
+        self.sector_map.set_vacancy_listener(self.wake_driver)
+        self.wait_for_graph: WaitForGraph = WaitForGraph(
+            self.sector_map, self.HT_coord_tracker.get_coordinate
+        )
+        self.__new_gridlocks: List[Gridlock] = list()
+        # blocked_rerouting: park time of each parked HT and a heap of
+        # (due time, HT name, park time) to re-route HTs still parked when due
+        self.__blocked_reroute_wait: int = (
+            blocked_reroute_ticks * CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
+        )
+        self.__parked_since: Dict[str, int] = dict()
+        self.__reroute_timers: List[Tuple[int, str, int]] = list()
+        self.number_of_blocked_reroutes: int = 0
+        # detours keep off the buffer lane, where idle HTs rest, and off the
+        # turn-up/turn-down columns, which HTs only use one way (a detour against
+        # that ends head-on), unless the HT's own path runs there
+        self.__detour_excluded_cell_ids: Set[int] = {
+            self.sector_map.get_cell_id(coord)
+            for coord in self.sector_map.get_buffer_sector_coords()
+        } | {
+            self.sector_map.get_cell_id(Coordinate(x, y))
+            for x in get_transit_columns()
+            for y in range(4, CONSTANT.YARD_FLOOR.START_SECTOR_Y)
+        }
+        self.gridlock_incidents: List[GridlockIncident] = list()
+        # idle HTs moving to another buffer slot, outside of any job
+        self.__repositions: Dict[str, JobInstruction] = dict()
+        self.number_of_repositions: int = 0
+        self.number_of_cancelled_repositions: int = 0
+
     def add_new_jobs(self, new_jobs: List[Job]):
         for job in new_jobs:
-            job_info = job.get_job_info()
             # logger.debug(f"New job pushed in queue: {job}")
             self.job_queue.push(job)
 
-    def operate(self):
-        # logger.info("Assign new job: First come first serve")
+    def add_repositions(self, repositions: List[JobInstruction]):
+        """Start the REPOSITION instructions of idle HTs; their HTs stay available."""
+        for instruction in repositions:
+            HT_name = instruction.get_HT_name()
+            HT_operator = self.HT_resource_group.get(HT_name)
+            if not HT_operator.is_available() or HT_name in self.__repositions:
+                continue
+            HT_operator.receive_task(planned_path=instruction.materialize_path())
+            instruction.set_start_time(timestamp=self.time_counter)
+            self.__repositions[HT_name] = instruction
+            self.__awake_drivers.add(HT_name)
+            self.number_of_repositions += 1
 
-        # Ensure all jobs sequences are in order by QC then by job_sequence
-        for i, j in zip(self.job_queue.job_items[:-1], self.job_queue.job_items[1:]):
-            QC_i, number_i = i.get_job_info()["QC_job_sequence"].split("_")
-            QC_j, number_j = j.get_job_info()["QC_job_sequence"].split("_")
-            if (QC_i == QC_j) and (number_i > number_j):
-                raise ValueError(f"This should not happen.")
+    def cancel_reposition(self, HT_name: str) -> bool:
+        """
+        Cancel the reposition of an HT that got a job, if it has not left its buffer
+        slot yet, and return whether it was cancelled. An HT already on its way
+        finishes the reposition first: stopping it on the highway would block the
+        lane while its job waits for a booking.
+        """
+        HT_operator = self.HT_resource_group[HT_name]
+        if HT_operator.path_step:
+            return False
+        if HT_name in self.__parked_drivers:
+            self.sector_map.stop_waiting_for_sector(
+                self.wait_for_graph.get_blocked_on(HT_name), HT_name
+            )
+            self.wake_driver(HT_name)
+        self.__awake_drivers.discard(HT_name)
+        HT_operator.clear_task()
+        self.__repositions.pop(HT_name).cancel(timestamp=self.time_counter)
+        self.number_of_cancelled_repositions += 1
+        return True
 
-        for job in self.job_queue:
+    def operate(self):
+        # logger.info("Assign new job: First come first serve")
+        for job in self.job_queue.get_bucket_jobs(JobBucket.NOT_STARTED):
             job_info = job.get_job_info()
 
-            # Skip if job has started
-            job_status = job_info["job_status"]
-            if job_status != Status.NOT_STARTED:
+            # Skip tour continuations: the previous job hands its HT over
+            if job.get_previous_tour_job_id() is not None:
                 continue
 
             # Skip if HT operator is not available
@@ -127,116 +364,190 @@ class OperationEngine:
             HT_operator = self.HT_resource_group.get(HT_name)
             if not HT_operator.is_available():
                 continue
+            # or still on its way to another buffer slot
+            if HT_name in self.__repositions and not self.cancel_reposition(HT_name):
+                continue
 
-            # Chope HT resource and kickstart the job
-            job_seq = job_info["QC_job_sequence"]
-            HT_operator.lock(job_seq)
-            job.start_job(self.time_counter)
-            job.chope_HT()
+            self.start_job(job, HT_operator)
 
         # logger.info("Pick up tasks in IN-PROGRESS jobs to execute.")
         # Emulate the passing of SYSTEM TIME
         self.time_counter += CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
         # logger.info(f"Time counter: {self.time_counter}")
-        HT_drive_operator_map: Dict[str, HTOperator] = (
-            dict()
-        )  # collect DRIVE tasks to execute separately in specific order
-        for job in self.job_queue:
+        # Start DRIVE instructions reached since last tick; their HTs join the
+        # drivers to move in the drive phase below
+        pending_drive_starts, self.__pending_drive_starts = (
+            self.__pending_drive_starts,
+            list(),
+        )
+        for job_id in pending_drive_starts:
+            job = self.job_queue.get_job_by_job_id(job_id)
+            instruction = job.get_latest_instruction()
+            HT_name = job.get_job_info()["assigned_HT_name"]
+            HT_operator = self.HT_resource_group.get(HT_name)
+            HT_operator.receive_task(planned_path=instruction.materialize_path())
+            instruction.set_start_time(timestamp=self.time_counter)
+            self.__awake_drivers.add(HT_name)
+            booked_operator = self.__booked_operators.pop(job_id, None)
+            if booked_operator is not None:
+                # DI drops at the yard may be served in any order
+                booked_operator.reserve(
+                    job_id,
+                    HT_name,
+                    eta=self.estimate_arrival_time(HT_operator),
+                    is_sequenced=(type(booked_operator) is QCOperator)
+                    or (
+                        job.get_job_info()["job_type"]
+                        == CONSTANT.JOB_PARAMETER.LOADED_JOB_TYPE
+                    ),
+                )
+                self.__reserved_operators[HT_name] = booked_operator
+
+        # Advance all QC/yard tasks in progress at once; jobs whose task completed
+        # join the booking/work pass below to release their operator in order
+        for slot in self.operator_state_store.advance_work(
+            CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
+        ):
+            self.wake_job(int(self.operator_state_store.work_locked_by[slot]))
+
+        # Booking and work tasks interact through the operators' queues, so they
+        # are processed together in arrival order. Jobs woken up by an operator
+        # during the pass join it if they come later in arrival order.
+        self.__pass_heap = self.job_queue.get_bucket_job_ids(
+            JobBucket.BOOKING, JobBucket.WORKING
+        )  # sorted, hence already a heap
+        while self.__pass_heap:
+            self.__pass_cursor, job_id = heapq.heappop(self.__pass_heap)
+            job = self.job_queue.get_job_by_job_id(job_id)
             job_info = job.get_job_info()
-            job_status = job_info["job_status"]
-            if job_status != Status.IN_PROGRESS:
-                continue
             instruction = job.get_latest_instruction()
             instruction_type = instruction.get_instruction_type()
             # logger.debug(
-            #     f"Assigned: job_seq={job_seq}, job_type={job_type}, instruction={instruction}"
+            #     f"Assigned: job_id={job_id}, job_type={job_type}, instruction={instruction}"
             # )
 
             # Retrieve corresponding resources
             QC_name = job_info["QC_name"]
             QC_operator = self.QC_resource_group.get(QC_name)
-            HT_name = job_info["assigned_HT_name"]
-            HT_operator = self.HT_resource_group.get(HT_name)
             yard_name = job_info["assigned_yard_name"]
             yard_operator = self.yard_resource_group.get(yard_name)
 
-            job_seq = job_info["QC_job_sequence"]
-
             # BOOKING TASKS:
             # Book, check its turn and proceed to next instruction if ready
             if instruction_type == InstructionType.BOOK_QC:
                 # book QC service: it is nullified if does not follow job sequence order
-                if not QC_operator.is_in_queue(job_seq):
-                    QC_operator.join_queue(job_seq)
+                if not QC_operator.is_in_queue(job_id):
+                    QC_operator.join_queue(job_id)
 
                 # when it's the second in queue, can proceed to next instruction
-                if QC_operator.is_near_turn(job_seq):
-                    job.proceed_to_next_instruction(timestamp=self.time_counter)
-                    continue
+                if QC_operator.is_near_turn(job_id):
+                    self.proceed_job_to_next_instruction(job)
+                    self.book_for_next_drive(job, QC_operator)
+                elif instruction.get_fallback() is not None:
+                    self.take_booking_fallback(job, instruction)
+                else:
+                    QC_operator.wait_for_turn(job_id)
+                    self.job_queue.move(job_id, JobBucket.WAITING)
+                continue
 
             if instruction_type == InstructionType.BOOK_YARD:
                 # book Yard service
-                if not yard_operator.is_in_queue(job_seq):
-                    yard_operator.join_queue(job_seq)
+                if not yard_operator.is_in_queue(job_id):
+                    yard_operator.join_queue(job_id)
 
                 # when it's the third in queue, can proceed to next instruction
-                if yard_operator.is_near_turn(job_seq):
-                    job.proceed_to_next_instruction(timestamp=self.time_counter)
-                    continue
+                if yard_operator.is_near_turn(job_id):
+                    self.proceed_job_to_next_instruction(job)
+                    self.book_for_next_drive(job, yard_operator)
+                elif instruction.get_fallback() is not None:
+                    self.take_booking_fallback(job, instruction)
+                else:
+                    yard_operator.wait_for_turn(job_id)
+                    self.job_queue.move(job_id, JobBucket.WAITING)
+                continue
 
-            # NON-BOOKING TASKS:
-            # Chope the resource once available (for new task) and start or resume tasks
+            # WORK TASKS:
+            # Chope the resource once available (for new task) and start the task.
+            # Started tasks advance in bulk before the pass; the job is parked until
+            # its operator reports the task completed.
             if not instruction.has_started():
-                if instruction_type == InstructionType.DRIVE:
-                    HT_operator.receive_task(planned_path=instruction.get_paths())
-                    instruction.set_start_time(timestamp=self.time_counter)
-
-                if (instruction_type == InstructionType.WORK_QC) and (
-                    QC_operator.is_available()
-                ):
-                    if QC_operator.is_ready_to_serve(job_seq):
-                        QC_operator.lock(job_seq)
+                if instruction_type == InstructionType.WORK_QC:
+                    if QC_operator.is_available() and QC_operator.is_ready_to_serve(
+                        job_id
+                    ):
+                        QC_operator.lock(job_id)
                         QC_operator.receive_task()
                         job.chope_QC()
+                        self.HT_wait_time["QC"] += self.get_service_wait(job)
                         instruction.set_start_time(timestamp=self.time_counter)
+                        # first work step happens on the tick the QC is choped
+                        QC_operator.execute_task()
+                    else:
+                        QC_operator.wait_for_service(job_id)
+                        self.job_queue.move(job_id, JobBucket.WAITING)
+                        continue
 
-                if (instruction_type == InstructionType.WORK_YARD) and (
-                    yard_operator.is_available()
-                ):
-                    if yard_operator.is_ready_to_serve(job_seq):
-                        yard_operator.lock(job_seq)
+                if instruction_type == InstructionType.WORK_YARD:
+                    if yard_operator.is_available() and yard_operator.is_ready_to_serve(
+                        job_id
+                    ):
+                        yard_operator.lock(job_id)
                         yard_operator.receive_task()
                         job.chope_yard()
+                        self.HT_wait_time["YARD"] += self.get_service_wait(job)
                         instruction.set_start_time(timestamp=self.time_counter)
+                        # first work step happens on the tick the yard is choped
+                        yard_operator.execute_task()
+                    else:
+                        yard_operator.wait_for_service(job_id)
+                        self.job_queue.move(job_id, JobBucket.WAITING)
+                        continue
 
-            # Execute task
-            # Exception: DRIVE operation to happen in code block right below
-            if instruction_type == InstructionType.DRIVE:
-                HT_drive_operator_map[HT_name] = HT_operator
-
-            # Execute if this is the job QC is locked by
             if instruction_type == InstructionType.WORK_QC:
-                if QC_operator.get_job_seq() == job_seq:
-                    QC_operator.execute_task()
-                    self.mark_instruction_progress_and_release_operator_if_applicable(
-                        QC_operator
-                    )
+                work_operator = QC_operator
+            else:
+                work_operator = yard_operator
+            if work_operator.has_completed_task():
+                self.mark_instruction_progress_and_release_operator_if_applicable(
+                    work_operator
+                )
+            else:
+                self.job_queue.move(job_id, JobBucket.WAITING)
 
-            # Execute if this is the job yard is locked by
-            if instruction_type == InstructionType.WORK_YARD:
-                if yard_operator.get_job_seq() == job_seq:
-                    yard_operator.execute_task()
-                    self.mark_instruction_progress_and_release_operator_if_applicable(
-                        yard_operator
-                    )
+        self.__pass_heap = None
+        for yard_operator in self.yard_resource_group.values():
+            if yard_operator.is_available() and yard_operator.queue:
+                self.yard_idle_time += CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
+
+        # HTs blocked for too long get a detour and drive again in this tick
+        if self.__features["blocked_rerouting"]:
+            self.reroute_long_blocked_drivers()
 
-        HT_sorted_names = sorted(HT_drive_operator_map.keys())
-        # logger.info(
-        #     f"Execute Drive task first, with priority for smaller serial no HT: {len(HT_sorted_names)} tasks."
-        # )
-        for HT_name in HT_sorted_names:
+        # Execute Drive task, with priority for smaller serial no HT. HTs blocked
+        # on a full sector wait on it and are only re-evaluated once an occupator
+        # leaves; one woken by a smaller serial no HT still moves in this tick.
+        if (
+            self.__features["vectorized_drive"]
+            or self.__features["verify_drive_kernel"]
+        ):
+            self.drive_with_kernel()
+        else:
+            self.drive_sequentially()
+        self.handle_new_gridlocks()
+
+        ### CLEAN UP QUEUE
+        for job in self.job_queue.get_bucket_jobs(JobBucket.COMPLETED):
+            job_id = job.get_job_id()
+            self.job_queue.pop_by_job_id(job_id)
+
+    def drive_sequentially(self):
+        """Move awake HTs one at a time in name order."""
+        self.__drive_heap = sorted(self.__awake_drivers)  # sorted, hence a heap
+        while self.__drive_heap:
+            HT_name = heapq.heappop(self.__drive_heap)
+            self.__drive_cursor = HT_name
             # check planned coordinate
-            HT_operator = HT_drive_operator_map.get(HT_name)
+            HT_operator = self.HT_resource_group.get(HT_name)
             current_coord = HT_operator.get_coordinate()
             planned_coord = HT_operator.get_planned_coordinate()
 
@@ -247,32 +558,464 @@ class OperationEngine:
                 self.sector_map.move_occupator(
                     from_coord=current_coord, to_coord=planned_coord, HT_name=HT_name
                 )
+                if HT_operator.has_completed_task():
+                    self.__awake_drivers.discard(HT_name)
                 self.mark_instruction_progress_and_release_operator_if_applicable(
                     HT_operator
                 )
+            else:
+                self.park_driver(HT_name, planned_coord)
+        self.__drive_heap = None
 
-        ### CLEAN UP QUEUE
-        for job in self.job_queue:
-            job_info = job.get_job_info()
-            job_seq = job_info["QC_job_sequence"]
-            if job.is_completed():
-                self.job_queue.pop_by_job_seq(job_seq)
+    def drive_with_kernel(self):
+        """Resolve the moves of all driving HTs at once and apply them in one batch.
+
+        Same outcome as ``drive_sequentially``; with ``verify_drive_kernel`` every tick
+        is also resolved by the sequential reference and compared.
+        """
+        # awake HTs plus every parked HT a move may wake: those waiting on the cell
+        # of an HT already included (transitively). Other parked HTs stay as they are.
+        drivers = set(self.__awake_drivers)
+        frontier = list(self.__awake_drivers)
+        while frontier:
+            HT_operator = self.HT_resource_group[frontier.pop()]
+            for waiter in self.sector_map.get_waiters(HT_operator.get_coordinate()):
+                if waiter not in drivers:
+                    drivers.add(waiter)
+                    frontier.append(waiter)
+        if not drivers:
+            return
+        driver_names = sorted(drivers)
+        HT_operators = [self.HT_resource_group[HT_name] for HT_name in driver_names]
+        current_coords = [HT_operator.get_coordinate() for HT_operator in HT_operators]
+        planned_coords = [
+            HT_operator.get_planned_coordinate() for HT_operator in HT_operators
+        ]
+        get_cell_id = self.sector_map.get_cell_id
+        kernel_inputs = (
+            np.array([get_cell_id(coord) for coord in current_coords], dtype=np.int64),
+            np.array([get_cell_id(coord) for coord in planned_coords], dtype=np.int64),
+            np.array([HT_name in self.__awake_drivers for HT_name in driver_names]),
+            self.sector_map.get_occupancy_array(),
+            self.sector_map.get_capacity_array(),
+        )
+        resolution = resolve_drive_moves(*kernel_inputs)
+        if self.__features["verify_drive_kernel"]:
+            reference = resolve_drive_moves_sequential(*kernel_inputs)
+            if not (
+                np.array_equal(resolution.moved, reference.moved)
+                and np.array_equal(resolution.awake_next, reference.awake_next)
+            ):
+                raise RuntimeError(
+                    f"Drive kernel diverged from the sequential loop at time "
+                    f"{self.time_counter}: drivers={driver_names}, "
+                    f"kernel={resolution}, reference={reference}"
+                )
+
+        moved_indices = np.flatnonzero(resolution.moved)
+        self.sector_map.move_occupators(
+            [driver_names[i] for i in moved_indices],
+            [current_coords[i] for i in moved_indices],
+            [planned_coords[i] for i in moved_indices],
+        )
+        # sectors are already updated but moved HTs still have to be unblocked, so the
+        # wait-for graph only sees newly parked HTs once the batch is fully applied
+        newly_parked = list()
+        for i, (HT_name, HT_operator) in enumerate(zip(driver_names, HT_operators)):
+            if resolution.moved[i] or resolution.awake_next[i]:
+                if HT_name in self.__parked_drivers:
+                    self.sector_map.stop_waiting_for_sector(planned_coords[i], HT_name)
+                    self.wake_driver(HT_name)
+                self.__awake_drivers.add(HT_name)
+            else:
+                if HT_name not in self.__parked_drivers:
+                    self.park_driver(HT_name, planned_coords[i], detect_gridlock=False)
+                    newly_parked.append(i)
+                continue
+
+            if resolution.moved[i]:
+                HT_operator.execute_task()
+                if HT_operator.has_completed_task():
+                    self.__awake_drivers.discard(HT_name)
+                self.mark_instruction_progress_and_release_operator_if_applicable(
+                    HT_operator
+                )
+        for i in newly_parked:
+            gridlock = self.wait_for_graph.block(
+                driver_names[i], planned_coords[i], self.time_counter
+            )
+            if gridlock is not None:
+                self.__new_gridlocks.append(gridlock)
+
+    def get_job_bucket(self, job: Job) -> JobBucket:
+        if job.is_completed():
+            return JobBucket.COMPLETED
+        if job.get_job_info()["job_status"] != Status.IN_PROGRESS:
+            return JobBucket.NOT_STARTED
+        instruction_type = job.get_latest_instruction().get_instruction_type()
+        if instruction_type in (InstructionType.BOOK_QC, InstructionType.BOOK_YARD):
+            return JobBucket.BOOKING
+        if instruction_type == InstructionType.DRIVE:
+            return JobBucket.DRIVING
+        return JobBucket.WORKING
+
+    def wake_job(self, job_id: int):
+        """Wake-up callback for QC/yard operators: the parked job can make progress."""
+        job = self.job_queue.get_job_by_job_id(job_id)
+        self.move_job_to_bucket(job_id, job)
+        arrival_index = self.job_queue.get_arrival_index(job_id)
+        if (self.__pass_heap is not None) and (arrival_index > self.__pass_cursor):
+            heapq.heappush(self.__pass_heap, (arrival_index, job_id))
+
+    def park_driver(
+        self, HT_name: str, coord: Coordinate, detect_gridlock: bool = True
+    ):
+        """Block the HT on the full sector at ``coord`` until an occupator leaves it."""
+        self.sector_map.wait_for_sector(coord, HT_name)
+        self.__awake_drivers.discard(HT_name)
+        self.__parked_drivers.add(HT_name)
+        self.__parked_since[HT_name] = self.time_counter
+        if self.__features["blocked_rerouting"]:
+            due_time = self.time_counter + self.__blocked_reroute_wait
+            heapq.heappush(
+                self.__reroute_timers, (due_time, HT_name, self.time_counter)
+            )
+        if detect_gridlock:
+            gridlock = self.wait_for_graph.block(HT_name, coord, self.time_counter)
+            if gridlock is not None:
+                self.__new_gridlocks.append(gridlock)
+        self.revise_reservation(HT_name)
+
+    def handle_new_gridlocks(self):
+        """Re-route HTs out of the gridlocks formed in this drive phase."""
+        new_gridlocks, self.__new_gridlocks = self.__new_gridlocks, list()
+        for gridlock in new_gridlocks:
+            if self.__features["gridlock_rerouting"]:
+                incident = self.resolve_gridlock(gridlock)
+            else:
+                incident = GridlockIncident(
+                    formed_at=gridlock.formed_at,
+                    HT_names=gridlock.HT_names,
+                    rerouted_HT_names=[],
+                    extra_steps=0,
+                    resolution_secs=None,
+                )
+            self.gridlock_incidents.append(incident)
+
+    def resolve_gridlock(self, gridlock: Gridlock) -> GridlockIncident:
+        """
+        Give HTs of the gridlock a detour (see ``get_detour``) around the full sectors,
+        one at a time in name order, until none of them is gridlocked anymore. An HT
+        that leaves the wait-for graph frees the HTs waiting on it, so a single detour
+        usually breaks a cycle.
+        """
+        started = time.perf_counter()
+        full_cell_ids = set(
+            np.flatnonzero(
+                self.sector_map.get_occupancy_array()
+                >= self.sector_map.get_capacity_array()
+            ).tolist()
+        )
+        rerouted_HT_names = list()
+        extra_steps = 0
+        for HT_name in gridlock.HT_names:
+            if not self.wait_for_graph.is_gridlocked(HT_name):
+                continue
+            HT_operator = self.HT_resource_group[HT_name]
+            detour = self.get_detour(HT_operator, full_cell_ids)
+            if detour is None:
+                continue
+            extra_steps += len(detour) - len(HT_operator.get_remaining_path())
+            self.reroute_parked_driver(HT_name, detour)
+            rerouted_HT_names.append(HT_name)
+
+        is_resolved = not any(
+            self.wait_for_graph.is_gridlocked(HT_name) for HT_name in gridlock.HT_names
+        )
+        incident = GridlockIncident(
+            formed_at=gridlock.formed_at,
+            HT_names=gridlock.HT_names,
+            rerouted_HT_names=rerouted_HT_names,
+            extra_steps=extra_steps,
+            resolution_secs=(time.perf_counter() - started) if is_resolved else None,
+        )
+        if is_resolved:
+            logger.info(
+                f"Gridlock at time {gridlock.formed_at} resolved: re-routed "
+                f"{rerouted_HT_names} ({extra_steps:+d} moves) in "
+                f"{incident.resolution_secs * 1000:.2f} ms."
+            )
+        else:
+            logger.warning(
+                f"Gridlock at time {gridlock.formed_at} could not be resolved: no "
+                f"detour for {sorted(self.wait_for_graph.get_gridlocked_HTs())}."
+            )
+        return incident
+
+    def reroute_long_blocked_drivers(self):
+        """
+        Give HTs parked for ``blocked_reroute_ticks`` a detour (see ``get_detour``)
+        over empty sectors, when it adds at most
+        ``CONSTANT.BLOCKED_REROUTE_MAX_EXTRA_MOVES`` moves and does not close a loop
+        with the paths of other HTs (see ``closes_traffic_loop``). HTs without such a
+        detour keep waiting and are checked again after the same delay.
+        """
+        occupied_cell_ids = None
+        while (
+            self.__reroute_timers and self.__reroute_timers[0][0] <= self.time_counter
+        ):
+            _, HT_name, parked_since = heapq.heappop(self.__reroute_timers)
+            if self.__parked_since.get(HT_name) != parked_since:
+                continue  # woken up (and maybe parked again) since
+            if occupied_cell_ids is None:
+                occupied_cell_ids = set(
+                    np.flatnonzero(self.sector_map.get_occupancy_array()).tolist()
+                )
+            HT_operator = self.HT_resource_group[HT_name]
+            detour = self.get_detour(HT_operator, occupied_cell_ids)
+            if (
+                (detour is not None)
+                and (
+                    len(detour) - len(HT_operator.get_remaining_path())
+                    <= CONSTANT.BLOCKED_REROUTE_MAX_EXTRA_MOVES
+                )
+                and not self.closes_traffic_loop(HT_operator, detour)
+            ):
+                self.reroute_parked_driver(HT_name, detour)
+                self.number_of_blocked_reroutes += 1
+            else:
+                heapq.heappush(
+                    self.__reroute_timers,
+                    (
+                        self.time_counter + self.__blocked_reroute_wait,
+                        HT_name,
+                        parked_since,
+                    ),
+                )
+
+    def get_detour(
+        self, HT_operator: HTOperator, avoid_cell_ids: Set[int]
+    ) -> Optional[List[Coordinate]]:
+        """Shortest path from the HT's coordinate to its destination around the given
+        cells, the buffer lane and the transit columns (except along its own path)."""
+        own_cell_ids = {
+            self.sector_map.get_cell_id(coord)
+            for coord in HT_operator.get_remaining_path()
+        }
+        return self.sector_map.get_shortest_path(
+            HT_operator.get_coordinate(),
+            HT_operator.get_destination(),
+            avoid_cell_ids=avoid_cell_ids
+            | (self.__detour_excluded_cell_ids - own_cell_ids),
+        )
+
+    def closes_traffic_loop(
+        self, HT_operator: HTOperator, detour: List[Coordinate]
+    ) -> bool:
+        """
+        Whether the detour leads back to itself over the paths the other HTs are
+        driving. HTs on such a loop can fill it and end up waiting on each other, a
+        cycle of the wait-for graph: two HTs crossing the same sectors in opposite
+        directions is the shortest one, and a lane change in the middle of the
+        highway closes one with the turns at its ends (x = 1, 41 and 42).
+        """
+        get_cell_id = self.sector_map.get_cell_id
+        predecessors: Dict[int, Set[int]] = dict()
+        for other_operator in self.HT_resource_group.values():
+            path = other_operator.get_remaining_path()
+            if (other_operator is HT_operator) or not path:
+                continue
+            previous = get_cell_id(other_operator.get_coordinate())
+            for coord in path:
+                cell_id = get_cell_id(coord)
+                predecessors.setdefault(cell_id, set()).add(previous)
+                previous = cell_id
+        cell_ids = [get_cell_id(HT_operator.get_coordinate())]
+        cell_ids.extend(get_cell_id(coord) for coord in detour)
+        for previous, cell_id in zip(cell_ids, cell_ids[1:]):
+            predecessors.setdefault(cell_id, set()).add(previous)
+
+        # label cells with the first detour cell they lead to: a detour cell leading
+        # to an earlier one closes a loop
+        first_reached: Dict[int, int] = dict()
+        for index, cell_id in enumerate(cell_ids):
+            if cell_id in first_reached:
+                return True
+            first_reached[cell_id] = index
+            stack = [cell_id]
+            while stack:
+                for previous in predecessors.get(stack.pop(), ()):
+                    if previous not in first_reached:
+                        first_reached[previous] = index
+                        stack.append(previous)
+        return False
+
+    def reroute_parked_driver(self, HT_name: str, detour: List[Coordinate]):
+        """Replace the rest of a parked HT's DRIVE path and let it move again."""
+        HT_operator = self.HT_resource_group[HT_name]
+        HT_operator.reroute(detour)
+        if HT_name in self.__repositions:
+            self.__repositions[HT_name].set_path(HT_operator.planned_path)
+        else:
+            job = self.job_queue.get_job_by_job_id(HT_operator.get_job_id())
+            job.get_latest_instruction().set_path(HT_operator.planned_path)
+        self.sector_map.stop_waiting_for_sector(
+            self.wait_for_graph.get_blocked_on(HT_name), HT_name
+        )
+        self.wake_driver(HT_name)
+        self.revise_reservation(HT_name)
+
+    def wake_driver(self, HT_name: str):
+        """Vacancy callback for the sector map: the blocked HT may be able to move."""
+        self.__parked_drivers.discard(HT_name)
+        self.__parked_since.pop(HT_name, None)
+        self.wait_for_graph.unblock(HT_name)
+        self.__awake_drivers.add(HT_name)
+        if (self.__drive_heap is not None) and (HT_name > self.__drive_cursor):
+            heapq.heappush(self.__drive_heap, HT_name)
+
+    def start_job(self, job: Job, HT_operator: HTOperator):
+        """Chope the HT resource and kickstart the job."""
+        job_id = job.get_job_id()
+        HT_operator.lock(job_id)
+        job.start_job(self.time_counter)
+        job.chope_HT()
+        self.move_job_to_bucket(job_id, job)
+
+    def hand_over_HT(self, job: Job):
+        """Start the next job of a completed job's tour with the same HT, so the HT
+        goes on from where it is instead of returning to its buffer."""
+        job_id = job.get_job_id()
+        HT_operator = self.HT_resource_group.get(job.get_job_info()["assigned_HT_name"])
+        if HT_operator.get_job_id() == job_id:
+            HT_operator.release(job_id)
+        next_job = self.job_queue.get_job_by_job_id(job.get_next_tour_job_id())
+        self.start_job(next_job, HT_operator)
+
+    def move_job_to_bucket(self, job_id: int, job: Job):
+        bucket = self.get_job_bucket(job)
+        self.job_queue.move(job_id, bucket)
+        if bucket == JobBucket.DRIVING:
+            self.__pending_drive_starts.append(job_id)
+
+    def book_for_next_drive(self, job: Job, operator: QueuedResourceOperator):
+        """With ``arrival_reservations``, the DRIVE the job proceeded to after
+        booking ``operator`` reserves it once started (and its path known)."""
+        if operator.reservation_scheduler is not None:
+            self.__booked_operators[job.get_job_id()] = operator
+
+    def estimate_arrival_time(self, HT_operator: HTOperator) -> int:
+        """When the HT reaches the end of its DRIVE if it is not delayed any more."""
+        return self.time_counter + (
+            len(HT_operator.get_remaining_path())
+            * CONSTANT.JOB_PARAMETER.HT_DRIVE_TIME_PER_SECTOR
+        )
+
+    def revise_reservation(self, HT_name: str):
+        """Push back the reservation of a delayed or re-routed HT."""
+        operator = self.__reserved_operators.get(HT_name)
+        if operator is not None:
+            HT_operator = self.HT_resource_group[HT_name]
+            operator.revise_reservation(
+                HT_operator.get_job_id(), eta=self.estimate_arrival_time(HT_operator)
+            )
+
+    def get_service_wait(self, job: Job) -> int:
+        """Seconds the job waited at its current WORK instruction before the
+        service started, the tick the service starts in excluded."""
+        instructions = job.get_instructions()
+        index = instructions.index(job.get_latest_instruction())
+        if index == 0:
+            return 0
+        return max(
+            0,
+            self.time_counter
+            - instructions[index - 1].end_time
+            - CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED,
+        )
+
+    def take_booking_fallback(self, job: Job, instruction: JobInstruction):
+        """
+        The booked resource is not near its turn: rather than waiting at a QC/yard
+        gate, replace the booking and the instruction after it (its direct leg) by
+        the booking's fallback.
+        """
+        job.replace_instructions(2, instruction.get_fallback())
+        self.move_job_to_bucket(job.get_job_id(), job)
+
+    def proceed_job_to_next_instruction(self, job: Job):
+        job.proceed_to_next_instruction(timestamp=self.time_counter)
+        job_id = job.get_job_id()
+        self.move_job_to_bucket(job_id, job)
 
     def mark_instruction_progress_and_release_operator_if_applicable(
         self,
         operator: ResourceOperator,
     ):
+        if (type(operator) is HTOperator) and (operator.name in self.__repositions):
+            self.mark_reposition_progress(operator)
+            return
         if operator.has_completed_task():
-            job_seq = operator.get_job_seq()
-            job = self.job_queue.get_job_by_job_seq(job_seq)
+            job_id = operator.get_job_id()
+            job = self.job_queue.get_job_by_job_id(job_id)
 
-            job.proceed_to_next_instruction(timestamp=self.time_counter)
+            if type(operator) is HTOperator:
+                # a lazy DRIVE path is only kept while it is driven
+                job.get_latest_instruction().release_path()
+                reserved_operator = self.__reserved_operators.pop(operator.name, None)
+                if reserved_operator is not None:
+                    reserved_operator.revise_reservation(job_id, eta=self.time_counter)
+            self.proceed_job_to_next_instruction(job)
             if (type(operator) is HTOperator) and (not job.is_HT_required()):
-                operator.release(job_seq)
+                operator.release(job_id)
             if (type(operator) is QCOperator) and (not job.is_QC_required()):
-                operator.release(job_seq)
+                operator.release(job_id)
             if (type(operator) is YardOperator) and (not job.is_yard_required()):
-                operator.release(job_seq)
+                operator.release(job_id)
+            if job.is_completed() and (job.get_next_tour_job_id() is not None):
+                self.hand_over_HT(job)
+
+    def mark_reposition_progress(self, HT_operator: HTOperator):
+        if HT_operator.has_completed_task():
+            instruction = self.__repositions.pop(HT_operator.name)
+            instruction.set_end_time(timestamp=self.time_counter)
+            HT_operator.clear_task()
+
+    def has_gridlock(self) -> bool:
+        return self.wait_for_graph.has_gridlock()
+
+    def get_gridlock_statistics(self) -> Dict[str, float]:
+        """Counts and timings of the gridlocks detected so far."""
+        resolved = [
+            incident
+            for incident in self.gridlock_incidents
+            if incident.resolution_secs is not None
+        ]
+        return {
+            "DETECTED": len(self.gridlock_incidents),
+            "RESOLVED": len(resolved),
+            "REROUTED_HT": sum(
+                len(incident.rerouted_HT_names) for incident in resolved
+            ),
+            "EXTRA_MOVES": sum(incident.extra_steps for incident in resolved),
+            "RESOLUTION_TIME(ms)": round(
+                sum(incident.resolution_secs for incident in resolved) * 1000.0, 3
+            ),
+        }
+
+    def get_service_statistics(self) -> Dict[str, int]:
+        """Yard idle time, HT wait time at QCs/yards and reservation overtakes."""
+        return {
+            "YARD_IDLE_TIME(s)": self.yard_idle_time,
+            "HT_WAIT_AT_QC(s)": self.HT_wait_time["QC"],
+            "HT_WAIT_AT_YARD(s)": self.HT_wait_time["YARD"],
+            "OVERTAKES": sum(
+                operator.reservation_scheduler.number_of_overtakes
+                for operator in list(self.QC_resource_group.values())
+                + list(self.yard_resource_group.values())
+                if operator.reservation_scheduler is not None
+            ),
+        }
 
     def get_number_of_in_progress_jobs(self):
         return self.job_queue.size()
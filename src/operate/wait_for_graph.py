@@ -0,0 +1,167 @@
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from logzero import logger
+
+from src.floor import Coordinate, SectorMap
+
+# HTs that can never move again on their current paths, with the sectors they wait on
+Gridlock = namedtuple("Gridlock", ["formed_at", "HT_names", "sector_coords"])
+
+
+class WaitForGraph:
+    """
+    Wait-for relation of blocked HTs. A blocked HT waits on the sector it needs next,
+    hence on every HT occupying it; any of them leaving lets it move (OR model). An HT
+    is gridlocked when all occupants of its sector are gridlocked themselves: the
+    largest set closed under that rule, which generalizes a cycle to sectors holding
+    more than one HT. Occupants that are not blocked (driving, working or idle) can
+    still leave, so HTs waiting on them are not gridlocked.
+
+    Detection is incremental. A gridlock only forms when an HT gets blocked, so each
+    block event explores the blocked HTs reachable from that HT, then the blocked HTs
+    queued behind whatever got stuck.
+
+    Parameters
+    ----------
+    sector_map : SectorMap
+        The sector map the HTs move on.
+    get_HT_coordinate : Callable[[str], Coordinate]
+        Current coordinate of an HT.
+
+    Attributes
+    ----------
+    gridlocks : List[Gridlock]
+        Gridlocks in order of formation. A gridlock that grows is reported again with
+        the newly stuck HTs only.
+    """
+
+    def __init__(
+        self, sector_map: SectorMap, get_HT_coordinate: Callable[[str], Coordinate]
+    ):
+        self.__sector_map: SectorMap = sector_map
+        self.__get_HT_coordinate = get_HT_coordinate
+        self.__blocked_on: Dict[str, Coordinate] = dict()
+        self.__blocked_on_cell: Dict[int, Set[str]] = dict()
+        self.__gridlocked: Set[str] = set()
+        self.gridlocks: List[Gridlock] = list()
+
+    def block(
+        self, HT_name: str, coord: Coordinate, timestamp: int
+    ) -> Optional[Gridlock]:
+        """Record that the HT waits on the sector at ``coord``; return the gridlock it
+        completes, if any."""
+        self.unblock(HT_name)
+        self.__blocked_on[HT_name] = coord
+        self.__blocked_on_cell.setdefault(
+            self.__sector_map.get_cell_id(coord), set()
+        ).add(HT_name)
+
+        stuck = self.__find_stuck([HT_name])
+        if not stuck:
+            return None
+        self.__gridlocked |= stuck
+
+        # HTs queued behind the stuck ones may have been blocked for a while already
+        newly_stuck = set(stuck)
+        frontier = list(stuck)
+        while frontier:
+            cell = self.__sector_map.get_cell_id(
+                self.__get_HT_coordinate(frontier.pop())
+            )
+            for waiter in list(self.__blocked_on_cell.get(cell, ())):
+                if waiter in self.__gridlocked:
+                    continue
+                more_stuck = self.__find_stuck([waiter])
+                self.__gridlocked |= more_stuck
+                newly_stuck |= more_stuck
+                frontier.extend(more_stuck)
+
+        gridlock = Gridlock(
+            formed_at=timestamp,
+            HT_names=sorted(newly_stuck),
+            sector_coords=[
+                coord
+                for _, coord in sorted(
+                    {
+                        (coord.x, coord.y): coord
+                        for coord in (self.__blocked_on[name] for name in newly_stuck)
+                    }.items()
+                )
+            ],
+        )
+        self.gridlocks.append(gridlock)
+        logger.warning(
+            f"Gridlock at time {timestamp}: HTs {gridlock.HT_names} wait on sectors "
+            f"{[str(coord) for coord in gridlock.sector_coords]}."
+        )
+        return gridlock
+
+    def unblock(self, HT_name: str):
+        """Forget the HT's wait (it moved, was woken up or got a new path)."""
+        coord = self.__blocked_on.pop(HT_name, None)
+        if coord is None:
+            return
+        self.__blocked_on_cell[self.__sector_map.get_cell_id(coord)].discard(HT_name)
+        if HT_name in self.__gridlocked:
+            # the rest of its gridlock is stuck only if it does not depend on this HT
+            self.__gridlocked.discard(HT_name)
+            self.__gridlocked = self.__greatest_stuck_set(self.__gridlocked)
+
+    def is_blocked(self, HT_name: str) -> bool:
+        return HT_name in self.__blocked_on
+
+    def get_blocked_on(self, HT_name: str) -> Optional[Coordinate]:
+        return self.__blocked_on.get(HT_name)
+
+    def get_waited_on_HTs(self, HT_name: str) -> List[str]:
+        """Occupants of the sector the HT waits on."""
+        coord = self.__blocked_on.get(HT_name)
+        if coord is None:
+            return list()
+        return self.__sector_map.get_sector(coord).get_occupators()
+
+    def is_gridlocked(self, HT_name: str) -> bool:
+        return HT_name in self.__gridlocked
+
+    def get_gridlocked_HTs(self) -> Set[str]:
+        return set(self.__gridlocked)
+
+    def has_gridlock(self) -> bool:
+        return len(self.__gridlocked) > 0
+
+    def __find_stuck(self, start_names: Iterable[str]) -> Set[str]:
+        """Newly gridlocked HTs among the blocked HTs reachable from ``start_names``."""
+        reachable: Set[str] = set()
+        stack = list(start_names)
+        while stack:
+            HT_name = stack.pop()
+            if (HT_name in reachable) or (HT_name not in self.__blocked_on):
+                continue
+            if HT_name in self.__gridlocked:
+                continue
+            reachable.add(HT_name)
+            stack.extend(self.get_waited_on_HTs(HT_name))
+        return self.__greatest_stuck_set(reachable)
+
+    def __greatest_stuck_set(self, candidates: Set[str]) -> Set[str]:
+        """Largest subset of ``candidates`` whose HTs only wait on gridlocked HTs or
+        on each other."""
+        waited_by: Dict[str, List[str]] = dict()
+        free = list()
+        for HT_name in candidates:
+            occupants = self.get_waited_on_HTs(HT_name)
+            if not occupants:
+                free.append(HT_name)
+            for occupant in occupants:
+                if (occupant not in candidates) and (occupant not in self.__gridlocked):
+                    free.append(HT_name)
+                waited_by.setdefault(occupant, list()).append(HT_name)
+
+        stuck = set(candidates)
+        while free:
+            HT_name = free.pop()
+            if HT_name in stuck:
+                stuck.discard(HT_name)
+                free.extend(waited_by.get(HT_name, ()))
+        return stuck
@@ -0,0 +1,80 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+# sentinels used in the integer arrays
+NO_JOB = -1  # resource is not locked by any job
+NO_TASK = -1  # resource has not received a task
+
+
+class OperatorStateStore:
+    """
+    Fleet-level operator state kept as NumPy arrays (one slot per operator), so that all
+    QC/yard work counters can be advanced in a single vectorized step per tick. Operator
+    classes are thin views over their slot.
+
+    Parameters
+    ----------
+    work_operator_names : Sequence[str]
+        Names of the QC and yard operators, in slot order.
+    work_time_required : Sequence[int]
+        Work time one task takes on each of those operators.
+    HT_names : Sequence[str], optional
+        Names of the HT operators, in slot order.
+
+    Attributes
+    ----------
+    work_locked_by : np.ndarray
+        Job ID holding each QC/yard operator, ``NO_JOB`` when available.
+    work_progress : np.ndarray
+        Work done on the current task of each QC/yard operator, ``NO_TASK`` when idle.
+    work_required : np.ndarray
+        Work time one task takes on each QC/yard operator.
+    HT_locked_by : np.ndarray
+        Job ID holding each HT, ``NO_JOB`` when available.
+    HT_path_step : np.ndarray
+        Index of the next path coordinate of each HT, ``NO_TASK`` when it has no path.
+    """
+
+    def __init__(
+        self,
+        work_operator_names: Sequence[str],
+        work_time_required: Sequence[int],
+        HT_names: Sequence[str] = (),
+    ):
+        if len(work_operator_names) != len(work_time_required):
+            raise ValueError("Each work operator needs its work time required.")
+
+        self.__work_slots: Dict[str, int] = {
+            name: slot for slot, name in enumerate(work_operator_names)
+        }
+        self.work_locked_by: np.ndarray = np.full(
+            len(work_operator_names), NO_JOB, dtype=np.int64
+        )
+        self.work_progress: np.ndarray = np.full(
+            len(work_operator_names), NO_TASK, dtype=np.int64
+        )
+        self.work_required: np.ndarray = np.array(work_time_required, dtype=np.int64)
+
+        self.__HT_slots: Dict[str, int] = {
+            name: slot for slot, name in enumerate(HT_names)
+        }
+        self.HT_locked_by: np.ndarray = np.full(len(HT_names), NO_JOB, dtype=np.int64)
+        self.HT_path_step: np.ndarray = np.full(len(HT_names), NO_TASK, dtype=np.int64)
+
+    def get_work_slot(self, name: str) -> int:
+        return self.__work_slots[name]
+
+    def get_HT_slot(self, name: str) -> int:
+        return self.__HT_slots[name]
+
+    def advance_work(self, time_passed: int) -> np.ndarray:
+        """
+        Advance every unfinished task by ``time_passed`` and return the slots of the
+        operators whose task completed in this step.
+        """
+        active = (self.work_progress != NO_TASK) & (
+            self.work_progress < self.work_required
+        )
+        self.work_progress[active] += time_passed
+        return np.flatnonzero(active & (self.work_progress >= self.work_required))
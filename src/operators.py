@@ -1,30 +1,72 @@
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
 
 from src.constant import CONSTANT
 from src.floor import Coordinate
+from src.idle_ht_index import IdleHTIndex
+from src.job import format_job_seq, get_seq_number
+from src.operator_state import NO_JOB, NO_TASK, OperatorStateStore
+from src.reservation_scheduler import ReservationScheduler
 
 
 class ResourceOperator:
-    def __init__(self, name: str):
+    """
+    A resource locked by one job at a time. The lock holder lives in one slot of a
+    fleet-level array (see ``OperatorStateStore``) shared with the other operators.
+
+    Parameters
+    ----------
+    name : str
+        Name of the resource.
+    locked_by_array : np.ndarray, optional
+        Fleet-level lock holder array, a private single-slot one by default.
+    slot : int, optional
+        Slot of this resource in ``locked_by_array``.
+    """
+
+    def __init__(self, name: str, locked_by_array: np.ndarray = None, slot: int = 0):
         self.name: str = name
-        self.locked_by: Optional[str] = None  # a job sequence. Ex: QC1_0001
+        if locked_by_array is None:
+            locked_by_array = np.full(1, NO_JOB, dtype=np.int64)
+        self.__locked_by_array: np.ndarray = locked_by_array
+        self.__slot: int = slot
+
+    @property
+    def locked_by(self) -> Optional[int]:
+        """Job ID holding the resource (see src.job.make_job_id), None if available."""
+        job_id = self.__locked_by_array[self.__slot]
+        return None if job_id == NO_JOB else int(job_id)
+
+    @locked_by.setter
+    def locked_by(self, job_id: Optional[int]):
+        self.__locked_by_array[self.__slot] = NO_JOB if job_id is None else job_id
 
     def is_available(self):
-        return self.locked_by is None
+        return self.__locked_by_array[self.__slot] == NO_JOB
 
-    def lock(self, job_seq: str):
+    def lock(self, job_id: int):
         if self.locked_by is not None:
             raise ValueError("Resource is being used. Cannot lock.")
-        self.locked_by = job_seq
+        self.locked_by = job_id
 
-    def release(self, job_seq: str):
-        if self.locked_by != job_seq:
-            raise ValueError(f"Job Seq {job_seq} is not active resource holder.")
+    def release(self, job_id: int):
+        if self.locked_by != job_id:
+            raise ValueError(
+                f"Job Seq {format_job_seq(job_id)} is not active resource holder."
+            )
         self.locked_by = None
 
-    def get_job_seq(self):
+    def get_job_id(self) -> Optional[int]:
         return self.locked_by
 
+    def get_locked_by_job_seq(self) -> Optional[str]:
+        """QC job sequence string of the holder, for logs and display."""
+        if self.locked_by is None:
+            return None
+        return format_job_seq(self.locked_by)
+
     def receive_task(self):
         raise NotImplementedError("Not implemented.")
 
@@ -39,64 +81,174 @@ class ResourceOperator:
 
 
 class QueuedResourceOperator(ResourceOperator):
-    def __init__(self, name: str):
-        super().__init__(name=name)
-        self.queue: List[str] = list()
+    """
+    A resource served in queue order. Jobs that cannot make progress yet register as
+    waiters and are handed to the wake listener once a queue change makes them eligible,
+    so blocked jobs do not need to poll the operator every tick.
+
+    Attributes
+    ----------
+    queue : Deque[int]
+        IDs of the jobs booked on this resource (packed QC job sequences, see
+        ``src.job.make_job_id``), in service order. Only mutate it through
+        ``join_queue``/``release`` so the membership set stays in sync.
+    near_turn_limit : int
+        Number of queue heads allowed to proceed past their booking.
+    waiters : Dict[int, str]
+        Parked job IDs mapped to what they wait for: ``"turn"`` (join the queue
+        or get near turn) or ``"service"`` (be served by the resource).
+    reservation_scheduler : Optional[ReservationScheduler]
+        Arrival-time reservations of the queued jobs, if enabled; lets a job whose
+        HT has arrived be served ahead of queue heads still on their way.
+    """
+
+    WAIT_FOR_TURN = "turn"
+    WAIT_FOR_SERVICE = "service"
+
+    def __init__(self, name: str, locked_by_array: np.ndarray = None, slot: int = 0):
+        super().__init__(name=name, locked_by_array=locked_by_array, slot=slot)
+        self.queue: Deque[int] = deque()
+        self.__queued: Set[int] = set()  # membership index of queue
         self.near_turn_limit: int = 1
+        self.waiters: Dict[int, str] = dict()
+        self.__wake_listener: Optional[Callable[[int], None]] = None
+        self.reservation_scheduler: Optional[ReservationScheduler] = None
+
+    def set_wake_listener(self, listener: Callable[[int], None]):
+        self.__wake_listener = listener
+
+    def set_reservation_scheduler(self, reservation_scheduler: ReservationScheduler):
+        self.reservation_scheduler = reservation_scheduler
+
+    def reserve(self, job_id: int, HT_name: str, eta: int, is_sequenced: bool = True):
+        """The HT of a queued job drives to the resource, expected at ``eta``."""
+        if self.reservation_scheduler is not None:
+            self.reservation_scheduler.reserve(job_id, HT_name, eta, is_sequenced)
+            self.notify_waiters()
+
+    def revise_reservation(self, job_id: int, eta: int):
+        """The HT of a queued job is now expected at ``eta``, e.g. once delayed."""
+        if (self.reservation_scheduler is not None) and (
+            self.reservation_scheduler.revise(job_id, eta)
+        ):
+            self.notify_waiters()
+
+    def can_join_queue(self, job_id: int) -> bool:
+        return job_id not in self.__queued
+
+    def join_queue(self, job_id: int):
+        if self.can_join_queue(job_id):
+            self.append_to_queue(job_id)
 
-    def join_queue(self, job_seq: str):
-        if job_seq not in self.queue:
-            self.queue.append(job_seq)
+    def append_to_queue(self, job_id: int):
+        self.queue.append(job_id)
+        self.__queued.add(job_id)
+        self.notify_waiters()
 
-    def is_in_queue(self, job_seq: str):
-        return job_seq in self.queue
+    def is_in_queue(self, job_id: int):
+        return job_id in self.__queued
 
-    def lock(self, job_seq: str):
+    def lock(self, job_id: int):
         if self.locked_by is not None:
             raise ValueError("Resource is being used. Cannot lock.")
 
-        if (len(self.queue) == 0) or (self.queue[0] != job_seq):
-            raise LookupError(
-                "Queue is empty or job sequence is not the first in queue."
+        if (len(self.queue) == 0) or (not self.is_ready_to_serve(job_id)):
+            raise LookupError("Queue is empty or job is not the first in queue.")
+        if self.reservation_scheduler is not None:
+            self.reservation_scheduler.start_service(
+                job_id, is_overtaking=self.queue[0] != job_id
             )
-        self.locked_by = job_seq
+        self.locked_by = job_id
 
-    def release(self, job_seq: str):
-        if self.locked_by != job_seq:
-            raise ValueError(f"Job Seq {job_seq} is not active resource holder.")
+    def release(self, job_id: int):
+        if self.locked_by != job_id:
+            raise ValueError(
+                f"Job Seq {format_job_seq(job_id)} is not active resource holder."
+            )
         self.locked_by = None
-        self.queue.pop(0)
-
-    def is_near_turn(self, job_seq: str) -> bool:
-        if job_seq in self.queue[: self.near_turn_limit]:
-            return True
+        # the holder is the queue head unless it was served ahead of it
+        if self.queue[0] == job_id:
+            self.queue.popleft()
+        else:
+            self.queue.remove(job_id)
+        self.__queued.discard(job_id)
+        self.notify_waiters()
+
+    def is_near_turn(self, job_id: int) -> bool:
+        if job_id not in self.__queued:
+            return False
+        for position in range(min(self.near_turn_limit, len(self.queue))):
+            if self.queue[position] == job_id:
+                return True
         return False
 
-    def is_ready_to_serve(self, job_seq: str):
+    def is_ready_to_serve(self, job_id: int):
         if len(self.queue) == 0:
             raise ValueError("No one in queue.")
-        return job_seq == self.queue[0]
+        if job_id == self.queue[0]:
+            return True
+        return (self.reservation_scheduler is not None) and (
+            self.reservation_scheduler.may_serve(job_id, self.queue)
+        )
+
+    def wait_for_turn(self, job_id: int):
+        """Park a booking job until it can join the queue or is near its turn."""
+        self.waiters[job_id] = self.WAIT_FOR_TURN
+
+    def wait_for_service(self, job_id: int):
+        """Park a job until the resource is free and the job is first in queue."""
+        self.waiters[job_id] = self.WAIT_FOR_SERVICE
+
+    def is_waiter_eligible(self, job_id: int) -> bool:
+        if self.waiters[job_id] == self.WAIT_FOR_TURN:
+            if self.is_in_queue(job_id):
+                return self.is_near_turn(job_id)
+            return self.can_join_queue(job_id)
+        return (
+            self.is_available()
+            and len(self.queue) > 0
+            and self.is_ready_to_serve(job_id)
+        )
+
+    def notify_waiters(self):
+        """Hand every waiter that became eligible to the wake listener."""
+        if not self.waiters:
+            return
+        woken = [job_id for job_id in self.waiters if self.is_waiter_eligible(job_id)]
+        for job_id in woken:
+            del self.waiters[job_id]
+            if self.__wake_listener is not None:
+                self.__wake_listener(job_id)
 
 
 class YardOperator(QueuedResourceOperator):
-    def __init__(self, name: str):
-        super().__init__(name=name)
+    def __init__(self, name: str, state_store: OperatorStateStore = None):
+        if state_store is None:
+            state_store = OperatorStateStore(
+                work_operator_names=[name],
+                work_time_required=[CONSTANT.JOB_PARAMETER.YARD_WORK_TIME_REQUIRED],
+            )
+        slot = state_store.get_work_slot(name)
+        super().__init__(
+            name=name, locked_by_array=state_store.work_locked_by, slot=slot
+        )
         self.near_turn_limit = 3
-        self.__handling_task_progress: int = None
+        self.state_store: OperatorStateStore = state_store
+        self.slot: int = slot
 
     def is_displayed_busy(self):
         is_choped = not self.is_available()
         return is_choped
 
-    def release(self, job_seq: str):
-        super().release(job_seq)
-        self.__handling_task_progress = None
+    def release(self, job_id: int):
+        self.state_store.work_progress[self.slot] = NO_TASK
+        super().release(job_id)
 
     def receive_task(self):
-        self.__handling_task_progress = 0
+        self.state_store.work_progress[self.slot] = 0
 
     def is_working_on_task(self) -> bool:
-        return True if self.__handling_task_progress is not None else False
+        return bool(self.state_store.work_progress[self.slot] != NO_TASK)
 
     def execute_task(self):
         # do nothing if receive no task
@@ -105,61 +257,76 @@ class YardOperator(QueuedResourceOperator):
 
         # execute the work
         if not self.has_completed_task():
-            self.__handling_task_progress += CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
+            self.state_store.work_progress[
+                self.slot
+            ] += CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
 
     def has_completed_task(self):
-        if (
-            self.__handling_task_progress
-            >= CONSTANT.JOB_PARAMETER.YARD_WORK_TIME_REQUIRED
-        ):
-            return True
-        return False
+        store, slot = self.state_store, self.slot
+        return bool(
+            (store.work_progress[slot] != NO_TASK)
+            and (store.work_progress[slot] >= store.work_required[slot])
+        )
+
+    def get_task_progress(self) -> Optional[int]:
+        progress = self.state_store.work_progress[self.slot]
+        return None if progress == NO_TASK else int(progress)
 
     def __str__(self):
-        return f"YardOperator(name={self.name}, locked_by={self.locked_by}, progress={self.__handling_task_progress})"
+        return f"YardOperator(name={self.name}, locked_by={self.get_locked_by_job_seq()}, progress={self.get_task_progress()})"
 
 
 class QCOperator(QueuedResourceOperator):
-    def __init__(self, name: str):
-        super().__init__(name=name)
+    def __init__(self, name: str, state_store: OperatorStateStore = None):
+        if state_store is None:
+            state_store = OperatorStateStore(
+                work_operator_names=[name],
+                work_time_required=[CONSTANT.JOB_PARAMETER.QC_WORK_TIME_REQUIRED],
+            )
+        slot = state_store.get_work_slot(name)
+        super().__init__(
+            name=name, locked_by_array=state_store.work_locked_by, slot=slot
+        )
         self.near_turn_limit = 2
-        self.__handling_task_progress: int = None
+        self.state_store: OperatorStateStore = state_store
+        self.slot: int = slot
         self.expected_minimum_seq_number: int = 0
+        self.__latest_queued_seq_number: int = 0
 
     def is_displayed_busy(self):
         is_choped = not self.is_available()
         return is_choped
 
-    def join_queue(self, job_seq: str):
-        new_seq_number = int(job_seq.split("_")[1])
+    def can_join_queue(self, job_id: int) -> bool:
+        new_seq_number = get_seq_number(job_id)
 
         # if queue is empty, only add if sequence number is right after most recent completed one
         if len(self.queue) == 0:
-            if self.expected_minimum_seq_number + 1 == new_seq_number:
-                self.queue.append(job_seq)
+            return self.expected_minimum_seq_number + 1 == new_seq_number
 
-        else:
-            # only add to queue if not already in queue
-            if job_seq not in self.queue:
-                latest_job_seq_in_queue = self.queue[-1]
-                QC_name = latest_job_seq_in_queue.split("_")[0]
-                latest_seq_number = int(latest_job_seq_in_queue.split("_")[1])
-                expected_job_seq = f"{QC_name}_{latest_seq_number+1:04d}"
-
-                # only add to queue when follow proper sequence
-                if job_seq == expected_job_seq:
-                    self.queue.append(job_seq)
-
-    def release(self, job_seq: str):
-        super().release(job_seq)
-        self.__handling_task_progress = None
-        self.expected_minimum_seq_number = int(job_seq.split("_")[1])
+        # only add to queue if not already in queue
+        if self.is_in_queue(job_id):
+            return False
+
+        # only add to queue when follow proper sequence
+        return new_seq_number == self.__latest_queued_seq_number + 1
+
+    def join_queue(self, job_id: int):
+        if self.can_join_queue(job_id):
+            self.__latest_queued_seq_number = get_seq_number(job_id)
+            self.append_to_queue(job_id)
+
+    def release(self, job_id: int):
+        # update expected sequence first: waiters are re-evaluated on release
+        self.expected_minimum_seq_number = get_seq_number(job_id)
+        self.state_store.work_progress[self.slot] = NO_TASK
+        super().release(job_id)
 
     def receive_task(self):
-        self.__handling_task_progress = 0
+        self.state_store.work_progress[self.slot] = 0
 
     def is_working_on_task(self) -> bool:
-        return True if self.__handling_task_progress is not None else False
+        return bool(self.state_store.work_progress[self.slot] != NO_TASK)
 
     def execute_task(self):
         # do nothing if receive no task
@@ -168,53 +335,113 @@ class QCOperator(QueuedResourceOperator):
 
         # execute the work
         if not self.has_completed_task():
-            self.__handling_task_progress += CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
+            self.state_store.work_progress[
+                self.slot
+            ] += CONSTANT.JOB_PARAMETER.SYSTEM_TIME_PASSED
 
     def has_completed_task(self):
-        if (
-            self.__handling_task_progress
-            >= CONSTANT.JOB_PARAMETER.QC_WORK_TIME_REQUIRED
-        ):
-            return True
-        return False
+        store, slot = self.state_store, self.slot
+        return bool(
+            (store.work_progress[slot] != NO_TASK)
+            and (store.work_progress[slot] >= store.work_required[slot])
+        )
+
+    def get_task_progress(self) -> Optional[int]:
+        progress = self.state_store.work_progress[self.slot]
+        return None if progress == NO_TASK else int(progress)
 
     def __str__(self):
-        return f"QCOperator(name={self.name}, locked_by={self.locked_by}, progress={self.__handling_task_progress}, expected_min_seq={self.expected_minimum_seq_number})"
+        return f"QCOperator(name={self.name}, locked_by={self.get_locked_by_job_seq()}, progress={self.get_task_progress()}, expected_min_seq={self.expected_minimum_seq_number})"
 
 
 class HTOperator(ResourceOperator):
-    def __init__(self, name: str, coord: Coordinate):
-        super().__init__(name=name)
+    def __init__(
+        self, name: str, coord: Coordinate, state_store: OperatorStateStore = None
+    ):
+        if state_store is None:
+            state_store = OperatorStateStore(
+                work_operator_names=[], work_time_required=[], HT_names=[name]
+            )
+        slot = state_store.get_HT_slot(name)
+        super().__init__(name=name, locked_by_array=state_store.HT_locked_by, slot=slot)
         self.coord: Coordinate = coord
         self.planned_path: List[Coordinate] = list()
-        self.path_step: int = None
+        self.state_store: OperatorStateStore = state_store
+        self.slot: int = slot
+        self.__idle_listener: Optional[Callable[["HTOperator"], None]] = None
+
+    @property
+    def path_step(self) -> Optional[int]:
+        """Index of the next coordinate in ``planned_path``, None without a task."""
+        path_step = self.state_store.HT_path_step[self.slot]
+        return None if path_step == NO_TASK else int(path_step)
+
+    @path_step.setter
+    def path_step(self, path_step: Optional[int]):
+        self.state_store.HT_path_step[self.slot] = (
+            NO_TASK if path_step is None else path_step
+        )
 
     def is_displayed_busy(self):
         is_choped = not self.is_available()
         return is_choped
 
-    def release(self, job_seq: str):
-        super().release(job_seq)
+    def set_idle_listener(self, listener: Callable[["HTOperator"], None]):
+        """Called with the HT when it is locked, released, or moves while idle."""
+        self.__idle_listener = listener
+
+    def lock(self, job_id: int):
+        super().lock(job_id)
+        if self.__idle_listener is not None:
+            self.__idle_listener(self)
+
+    def release(self, job_id: int):
+        super().release(job_id)
+        self.clear_task()
+        if self.__idle_listener is not None:
+            self.__idle_listener(self)
+
+    def clear_task(self):
+        """Drop the planned path, e.g. of a finished or cancelled reposition."""
         self.planned_path = list()
         self.path_step = None
 
     def receive_task(self, planned_path: List[Coordinate]):
         self.planned_path = planned_path
-        self.path_step = 0
+        self.state_store.HT_path_step[self.slot] = 0
 
     def is_working_on_task(self) -> bool:
-        return True if self.path_step is not None else False
+        return bool(self.state_store.HT_path_step[self.slot] != NO_TASK)
+
+    def reroute(self, remaining_path: List[Coordinate]):
+        """Replace the coordinates still ahead on the planned path."""
+        path_step = self.state_store.HT_path_step[self.slot]
+        self.planned_path = self.planned_path[:path_step] + list(remaining_path)
+
+    def get_remaining_path(self) -> List[Coordinate]:
+        path_step = self.state_store.HT_path_step[self.slot]
+        if path_step == NO_TASK:
+            return list()
+        return self.planned_path[path_step:]
+
+    def get_destination(self) -> Optional[Coordinate]:
+        if self.planned_path:
+            return self.planned_path[-1]
 
     def execute_task(self):
+        path_steps = self.state_store.HT_path_step
+        path_step = path_steps[self.slot]
         # do nothing if receive no task
-        if not self.is_working_on_task():
+        if path_step == NO_TASK:
             return
 
         # execute the work
         if not self.has_completed_task():
-            next_coord = self.planned_path[self.path_step]
-            self.coord = next_coord
-            self.path_step += 1
+            self.coord = self.planned_path[path_step]
+            path_steps[self.slot] = path_step + 1
+            # an idle HT on the move, e.g. repositioning
+            if (self.__idle_listener is not None) and self.is_available():
+                self.__idle_listener(self)
 
     def has_completed_task(self):
         if self.coord == self.planned_path[-1]:
@@ -226,7 +453,7 @@ class HTOperator(ResourceOperator):
 
     def get_planned_coordinate(self) -> Coordinate:
         if not self.has_completed_task():
-            return self.planned_path[self.path_step]
+            return self.planned_path[self.state_store.HT_path_step[self.slot]]
 
     def __str__(self):
         numb_steps = len(self.planned_path)
@@ -234,7 +461,7 @@ class HTOperator(ResourceOperator):
             plan = ""
         else:
             plan = f"[{self.planned_path[0]}, ..., {self.planned_path[-1]}]"
-        return f"HTOperator(name={self.name}, locked_by={self.locked_by}, path_step={self.path_step}, planned_path=({numb_steps}){plan})"
+        return f"HTOperator(name={self.name}, locked_by={self.get_locked_by_job_seq()}, path_step={self.path_step}, planned_path=({numb_steps}){plan})"
 
 
 class HT_Coordinate_View:
@@ -255,12 +482,24 @@ class HT_Coordinate_View:
         List of the previous coordinates of all HT, used to monitor movement.
     __no_HT_move_counter : int
         Counter tracking the number of consecutive cycles with no HT movement.
+    __idle_HT_index : IdleHTIndex
+        Available HTs by column, updated on the HT operators' idle events.
     """
 
     def __init__(self, HT_resource_group: Dict[str, HTOperator]):
         self.__HT_resource_group: Dict[str, HTOperator] = HT_resource_group
         self.__previous_HT_coords: List[Coordinate] = self.get_all_HT_coordinates()
         self.__no_HT_move_counter: int = 0
+        self.__idle_HT_index: IdleHTIndex = IdleHTIndex(list(HT_resource_group))
+        for HT_operator in HT_resource_group.values():
+            self.update_idle_HT_index(HT_operator)
+            HT_operator.set_idle_listener(self.update_idle_HT_index)
+
+    def update_idle_HT_index(self, HT_operator: HTOperator):
+        if HT_operator.is_available():
+            self.__idle_HT_index.update(HT_operator.name, HT_operator.get_coordinate())
+        else:
+            self.__idle_HT_index.remove(HT_operator.name)
 
     def get_coordinate(self, HT_name: str):
         HT = self.__HT_resource_group.get(HT_name, None)
@@ -268,11 +507,17 @@ class HT_Coordinate_View:
             return HT.get_coordinate()
 
     def get_available_HTs(self) -> List[str]:
-        available_HTs = list()
-        for HT_name, HT_operator in self.__HT_resource_group.items():
-            if HT_operator.is_available():
-                available_HTs.append(HT_name)
-        return available_HTs
+        return self.__idle_HT_index.get_HT_names()
+
+    def iter_nearest_available_HTs(
+        self, x: int
+    ) -> Iterator[Tuple[int, str, Coordinate]]:
+        """Available HTs, nearest to column ``x`` first (see ``IdleHTIndex``)."""
+        return self.__idle_HT_index.iter_by_distance(x)
+
+    def get_HT_rank(self, HT_name: str) -> int:
+        """Position of the HT in the fleet, the order ties between HTs are broken in."""
+        return self.__idle_HT_index.get_rank(HT_name)
 
     def get_all_HT_coordinates(self):
         coords = list()
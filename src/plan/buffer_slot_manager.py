@@ -0,0 +1,75 @@
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.floor import Coordinate
+
+
+class BufferSlotManager:
+    """
+    Tracks which HT parks in which buffer lane slot, so an HT returning to the buffer
+    can be given any free slot instead of the one it left.
+
+    An HT holds its slot from the moment its return leg is routed to it until it
+    leaves the buffer again; while on the road it holds none.
+
+    Parameters
+    ----------
+    slot_coords : Sequence[Coordinate]
+        Buffer lane cells HTs may park in.
+    HT_coords : Dict[str, Coordinate]
+        Slot each HT parks in at the start.
+    capacity : int, optional
+        Number of HTs a slot can hold (default is 2, the buffer sector capacity).
+    """
+
+    def __init__(
+        self,
+        slot_coords: Sequence[Coordinate],
+        HT_coords: Dict[str, Coordinate],
+        capacity: int = 2,
+    ):
+        self.__slot_coords: List[Coordinate] = sorted(
+            {(coord.x, coord.y): coord for coord in slot_coords}.values(),
+            key=lambda coord: (coord.x, coord.y),
+        )
+        self.__capacity: int = capacity
+        self.__slot_of: Dict[str, Coordinate] = dict()
+        # keyed by (x, y), Coordinate is not hashable
+        self.__number_of_holders: Counter = Counter()
+        for HT_name, coord in HT_coords.items():
+            self.assign(HT_name, coord)
+
+    def get_slot(self, HT_name: str) -> Optional[Coordinate]:
+        return self.__slot_of.get(HT_name)
+
+    def is_free(self, coord: Coordinate) -> bool:
+        return self.__number_of_holders[(coord.x, coord.y)] < self.__capacity
+
+    def get_free_slots(self) -> List[Coordinate]:
+        return [coord for coord in self.__slot_coords if self.is_free(coord)]
+
+    def assign(self, HT_name: str, coord: Coordinate):
+        self.release(HT_name)
+        self.__slot_of[HT_name] = coord
+        self.__number_of_holders[(coord.x, coord.y)] += 1
+
+    def release(self, HT_name: str):
+        """The HT leaves its slot (no-op if it holds none)."""
+        coord = self.__slot_of.pop(HT_name, None)
+        if coord is not None:
+            self.__number_of_holders[(coord.x, coord.y)] -= 1
+
+    def select_slot(
+        self, HT_name: str, cost_fn: Callable[[Coordinate], float]
+    ) -> Optional[Coordinate]:
+        """
+        Assign the HT the free slot of least ``cost_fn`` (ties to the westmost) and
+        return it, None if every slot is full.
+        """
+        self.release(HT_name)
+        free_slots = self.get_free_slots()
+        if not free_slots:
+            return None
+        slot = min(free_slots, key=lambda coord: (cost_fn(coord), coord.x))
+        self.assign(HT_name, slot)
+        return slot
@@ -1,9 +1,11 @@
 from collections import namedtuple
+from typing import Dict, Optional, Union
 
 import pandas as pd
 
 from src.plan.job_planner import JobPlanner
 from src.plan.job_tracker import JobTracker
+from src.scenario import CompiledScenario, CSVJobStream
 
 
 class PlanningEngine:
@@ -12,11 +14,16 @@ class PlanningEngine:
 
     Parameters
     ----------
-    job_df : pd.DataFrame
-        DataFrame containing job information used to initialize the job tracker.
+    job_df : pd.DataFrame, CompiledScenario or CSVJobStream
+        DataFrame containing job information used to initialize the job tracker, the
+        compiled scenario of the manifest, or the manifest streamed QC by QC.
     monitoring_resources : namedtuple
         A namedtuple containing monitoring resources required for planning, including
         HT coordinate tracker and sector map snapshot.
+    seed : int, optional
+        Seed of the job planner's random choices (default is 0).
+    feature_overrides : Dict[str, bool], optional
+        Planner feature toggles, on top of the ``JOB_PLANNER_FEATURES`` env var.
 
     Attributes
     ----------
@@ -28,14 +35,19 @@ class PlanningEngine:
 
     def __init__(
         self,
-        job_df: pd.DataFrame,
+        job_df: Union[pd.DataFrame, CompiledScenario, CSVJobStream],
         monitoring_resources: namedtuple,
+        seed: int = 0,
+        feature_overrides: Optional[Dict[str, bool]] = None,
     ):
         self.job_tracker: JobTracker = JobTracker(job_df)
         self.job_planner: JobPlanner = JobPlanner(
             ht_coord_tracker=monitoring_resources.HT_coord_tracker,
             sector_map_snapshot=monitoring_resources.sector_map_snapshot,
+            feature_overrides=feature_overrides,
+            seed=seed,
         )
+        self.job_planner.preplan_yards(self.job_tracker)
 
     def fetch_job_status(self):
         self.job_tracker.fetch_and_update_job_status()
@@ -52,8 +64,23 @@ class PlanningEngine:
     def get_number_of_completed_jobs(self):
         return self.job_tracker.get_number_of_completed_jobs()
 
+    def get_number_of_jobs(self):
+        return self.job_tracker.get_number_of_jobs()
+
+    def is_streaming(self):
+        return self.job_tracker.is_streaming()
+
+    def pop_retired_job_report(self):
+        return self.job_tracker.pop_retired_job_report()
+
     def export_job_report(self):
         return self.job_tracker.export_job_report()
 
+    def iter_unread_job_report(self):
+        return self.job_tracker.iter_unread_job_report()
+
     def plan(self):
         return self.job_planner.plan(self.job_tracker)
+
+    def plan_repositions(self):
+        return self.job_planner.plan_repositions(self.job_tracker)
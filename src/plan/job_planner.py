@@ -1,21 +1,62 @@
-import os
 import random
-from collections import Counter
-from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import time
+from collections import Counter, namedtuple
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from logzero import logger
 
 from src.constant import CONSTANT
 from src.floor import Coordinate, SectorMapSnapshot
-from src.job import InstructionType, Job, JobInstruction
+from src.job import (
+    DrivePathSpec,
+    InstructionType,
+    Job,
+    JobInstruction,
+    Status,
+    get_seq_number,
+)
 from src.operators import HT_Coordinate_View
+from src.plan.buffer_slot_manager import BufferSlotManager
 from src.plan.job_tracker import JobTracker
+from src.plan.yard_preplanner import YardPrePlanner
+from src.utils.features import load_feature_flags
+
+# A yard planning window as handed to the yard assignment engine, captured so it
+# can be replayed through every engine under identical planner state.
+YardPlanningWindow = namedtuple(
+    "YardPlanningWindow",
+    ["candidate_jobs", "base_di_counts", "recent_yard_usage", "corridor_history"],
+)
+
+# DRIVE route policies and the JobPlanner method building each path from the
+# (origin, destination) of a DrivePathSpec
+DRIVE_ROUTES = {
+    "buffer_to_QC": "get_path_from_buffer_to_QC",
+    "QC_to_buffer": "get_path_from_QC_to_buffer",
+    "buffer_to_yard": "get_path_from_buffer_to_yard",
+    "yard_to_buffer": "get_path_from_yard_to_buffer",
+    "QC_to_yard": "get_path_from_QC_to_yard",
+    "yard_to_QC": "get_path_from_yard_to_QC",
+    "yard_to_yard": "get_path_from_yard_to_yard",
+    "buffer_to_buffer": "get_path_from_buffer_to_buffer",
+}
+
+# routes leaving and reaching the buffer lane; with buffer_slots the slot of an HT
+# is only decided when such a DRIVE starts
+ROUTES_FROM_BUFFER = ("buffer_to_QC", "buffer_to_yard")
+ROUTES_TO_BUFFER = ("QC_to_buffer", "yard_to_buffer")
 
 
 class JobPlanner:
-    _CORRIDOR_SPLIT_X = 21
     _YARD_DI_CAPACITY = 700
     _YARD_CAPACITY_HARD_PENALTY = 1_000_000
     _YARD_CAPACITY_SOFT_THRESHOLD = 15
     _YARD_CAPACITY_SOFT_PENALTY = 750
+    _LOCAL_SEARCH_MAX_ITERATIONS = 25
+    _LOCAL_SEARCH_TABU_TENURE = 5
+    _LOCAL_SEARCH_PATIENCE = 4
+    _YARD_PREPLAN_DEVIATION_PENALTY = 25
     """
     Coordinates job planning activities using HT tracker and sector map data.
 
@@ -32,39 +73,131 @@ class JobPlanner:
         ht_coord_tracker: HT_Coordinate_View,
         sector_map_snapshot: SectorMapSnapshot,
         feature_overrides: Optional[Dict[str, bool]] = None,
+        seed: int = 0,
     ):
         self.ht_coord_tracker = ht_coord_tracker
         self.sector_map_snapshot = sector_map_snapshot
-        self._rng = random.Random(0)
-        self._latest_yard_plan: Dict[str, str] = dict()
+        self._rng = random.Random(seed)
+        # terminal geometry (see CONSTANT.LAYOUT): the east edge HTs turn down on from
+        # the QC lanes (x = 42 by default), the column west of it HTs climb on from
+        # the yard lane, the highway lanes and the yard row (y = 13)
+        self._east_edge_x: int = CONSTANT.COORDINATE_MAP.X_RANGE[1]
+        self._climb_x: int = self._east_edge_x - 1
+        highway_lanes = CONSTANT.TERMINAL_FLOOR.HIGHWAY_LANE.SECTOR_RANGE_Y
+        self._westbound_lanes: Tuple[int, ...] = tuple(highway_lanes[0::2])
+        self._eastbound_lanes: Tuple[int, ...] = tuple(highway_lanes[1::2])
+        self._yard_y: int = CONSTANT.YARD_FLOOR.START_SECTOR_Y
+        self._corridor_split_x: int = self._east_edge_x // 2
+        # parallel highway lanes (y) for lane_balancing. Besides driving along them,
+        # HTs cross lanes vertically: up to their buffer, down to a yard and, looping
+        # to a yard, down at x = 1. The lanes of each use are split so that no two HTs
+        # move in opposite directions in the same column and rows, which would end
+        # head-on (a single pair of lanes serves every use). Yard approaches stay on
+        # the southmost eastbound lane: a descent from a lane further north crosses
+        # the westbound lane fed by the climb on x = 41 and closes a short loop with
+        # it, which gridlocks.
+        # westbound lanes HTs climb to their buffer from, (7, 9) by default
+        self._buffer_return_lanes: Tuple[int, ...] = (
+            self._westbound_lanes[:-1] or self._westbound_lanes
+        )
+        # westbound lanes HTs move down at x = 1 from, (9, 11)
+        self._yard_loop_lanes: Tuple[int, ...] = (
+            self._westbound_lanes[1:] or self._westbound_lanes
+        )
+        # eastbound lane HTs move down to the yards from, (12,)
+        self._yard_approach_lanes: Tuple[int, ...] = self._eastbound_lanes[-1:]
+        self._latest_yard_plan: Dict[int, str] = dict()
         self._recent_yard_usage: Counter = Counter()
-        self._features: Dict[str, bool] = {
-            "dynamic_corridor_bias": False,
-            "ga_diversity": False,
-            "ht_future_penalty": False,
-            "path_cache": False,
-        }
-        env_flags = os.getenv("JOB_PLANNER_FEATURES", "")
-        if env_flags:
-            for token in env_flags.split(","):
-                flag = token.strip()
-                if not flag:
-                    continue
-                if flag.startswith("!"):
-                    name = flag[1:]
-                    if name in self._features:
-                        self._features[name] = False
-                elif flag in self._features:
-                    self._features[flag] = True
-        if feature_overrides:
-            self._features.update(feature_overrides)
+        # lane_balancing: paths recently routed over each highway lane, halved
+        # every planning pass
+        self._recent_lane_usage: Counter = Counter()
+        self._features: Dict[str, bool] = load_feature_flags(
+            "JOB_PLANNER_FEATURES",
+            defaults={
+                "buffer_slots": False,
+                "direct_legs": False,
+                "dual_cycle": False,
+                "dynamic_corridor_bias": False,
+                "ga_diversity": False,
+                "ht_future_penalty": False,
+                "lane_balancing": False,
+                "lazy_paths": False,
+                "path_cache": False,
+                "repositioning": False,
+                "yard_local_search": False,
+                "yard_preplan": False,
+            },
+            overrides=feature_overrides,
+        )
+        # repositioning moves HTs between the slots tracked by buffer_slots
+        if self._features["repositioning"]:
+            self._features["buffer_slots"] = True
         self._corridor_history: Counter = Counter()
         self._path_cache: Dict[Tuple, Tuple[Tuple[int, int], ...]] = dict()
         self._yard_di_allocation: Counter = Counter()
+        self._yard_plan_evaluations: int = 0
+        self._recorded_yard_windows: Optional[List[YardPlanningWindow]] = None
+        self._yard_preplan_targets: Dict[int, str] = dict()
+        # buffer_slots: slot held by each HT, expected next legs out of the buffer of
+        # the jobs left unplanned and memoised route lengths
+        self.buffer_slot_manager: Optional[BufferSlotManager] = None
+        if self._features["buffer_slots"]:
+            slot_coords = [
+                Coordinate(x, y) for x, y in CONSTANT.HT_FLEET.HT_INIT_COORDINATES
+            ]
+            self.buffer_slot_manager = BufferSlotManager(
+                slot_coords=slot_coords,
+                HT_coords={
+                    HT_name: self.ht_coord_tracker.get_coordinate(HT_name)
+                    for HT_name in CONSTANT.HT_FLEET.HT_NAMES
+                },
+                capacity=self.sector_map_snapshot.get_capacity(slot_coords[0]),
+            )
+        self._next_leg_demand: Counter = Counter()
+        self._route_lengths: Dict[Tuple, int] = dict()
+        # repositioning: REPOSITION instructions issued and not finished yet, by HT,
+        # and the HTs given a job by the latest planning pass (not started yet)
+        self._repositions: Dict[str, JobInstruction] = dict()
+        self._latest_selected_HT_names: Set[str] = set()
 
     def is_deadlock(self):
         return self.ht_coord_tracker.is_deadlock()
 
+    def preplan_yards(self, job_tracker: JobTracker):
+        """Compute whole-manifest yard targets used as priors by the online planner.
+
+        Runs once before the simulation starts when the ``yard_preplan`` feature is
+        enabled. Every DI job gets a target yard from a global min-cost assignment
+        that respects the per-yard DI capacity; results are cached by input hash.
+        """
+        if not self._features["yard_preplan"]:
+            return
+        if job_tracker.is_streaming():
+            logger.warning("Yard pre-plan skipped: it needs the whole manifest.")
+            return
+
+        started = time.perf_counter()
+        jobs = list()
+        for job_id, job in job_tracker.job_sequence_map.items():
+            job_info = job.get_job_info()
+            if job_info["job_type"] != CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
+                continue
+            options = self._enumerate_yard_options(job_info)
+            if options:
+                jobs.append((job_id, job_info, options))
+
+        # targets must not feed back into the costs they are computed from
+        self._yard_preplan_targets = dict()
+        preplanner = YardPrePlanner(
+            yard_capacity=self._YARD_DI_CAPACITY, cost_fn=self._yard_choice_cost
+        )
+        self._yard_preplan_targets = preplanner.plan(jobs)
+        logger.info(
+            f"Yard pre-plan for {len(jobs)} DI jobs ready in "
+            f"{time.perf_counter() - started:.2f}s "
+            f"({'cached' if preplanner.last_run_from_cache else 'computed'})."
+        )
+
     def get_non_moving_HT(self):
         return self.ht_coord_tracker.get_non_moving_HT()
 
@@ -85,18 +218,22 @@ class JobPlanner:
         # logger.info("Planning started.")
         if self._features["dynamic_corridor_bias"]:
             self._apply_corridor_history_decay()
-        plannable_job_seqs = job_tracker.get_plannable_job_sequences()
+        plannable_job_ids = job_tracker.get_plannable_job_sequences()
+        if self._features["lane_balancing"]:
+            self._apply_lane_usage_decay()
         self._latest_yard_plan = self._optimize_yard_assignments(
-            job_tracker, plannable_job_seqs
+            job_tracker, plannable_job_ids
         )
-        selected_HT_names = list()  # avoid selecting duplicated HT during the process
+        selected_HT_names = set()  # avoid selecting duplicated HT during the process
         new_jobs = list()  # container for newly created jobs
         used_yard_assignments: List[str] = []
+        # dual_cycle: DI jobs of this pass per QC, whose HT may go on to an LO job
+        open_tours: Dict[str, List[Job]] = dict()
 
         # create job loop: ranging from 0 to at most 16 jobs
-        for job_seq in plannable_job_seqs:
+        for job_id in plannable_job_ids:
             # parse job info
-            job = job_tracker.get_job(job_seq)
+            job = job_tracker.get_job(job_id)
             job_info = job.get_job_info()
             job_type, QC_name, yard_name, alt_yard_names = [
                 job_info[k]
@@ -106,17 +243,32 @@ class JobPlanner:
             assigned_yard = yard_name
 
             if job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
-                planned_yard = self.select_yard(job_seq, job_info)
+                planned_yard = self.select_yard(job_id, job_info)
                 if planned_yard:
                     assigned_yard = planned_yard
 
-            # select HT for the job based on job type, return None if no HT available or applicable
-            HT_name = self.select_HT(job_info, selected_HT_names, assigned_yard)
+            # an LO job far enough ahead in the QC sequence closes the dual-cycle
+            # tour of an earlier DI job of the same QC: the HT of the DI job goes on
+            # to it from its yard drop
+            tour_job = None
+            if (
+                self._features["dual_cycle"]
+                and job_type != CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE
+                and open_tours.get(QC_name)
+                and get_seq_number(job_id)
+                - get_seq_number(open_tours[QC_name][0].get_job_id())
+                >= CONSTANT.DUAL_CYCLE_MIN_SEQ_GAP
+            ):
+                tour_job = open_tours[QC_name].pop(0)
+                HT_name = tour_job.get_job_info()["assigned_HT_name"]
+            else:
+                # select HT for the job based on job type, return None if no HT available or applicable
+                HT_name = self.select_HT(job_info, selected_HT_names, assigned_yard)
 
-            # not proceed with job planning if no available HTs
-            if HT_name is None:
-                break
-            selected_HT_names.append(HT_name)
+                # not proceed with job planning if no available HTs
+                if HT_name is None:
+                    break
+                selected_HT_names.add(HT_name)
 
             # record the assigned HT and yard
             job.assign_job(HT_name=HT_name, yard_name=assigned_yard)
@@ -128,8 +280,29 @@ class JobPlanner:
             job_instructions = list()
             buffer_coord = self.ht_coord_tracker.get_coordinate(HT_name)
 
+            # Dual-cycle tour: re-plan the DI job to end at its yard drop, from where
+            # its HT drives on to this LO job
+            if tour_job is not None:
+                tour_job_instructions, job_instructions = (
+                    self.get_dual_cycle_instructions(
+                        HT_name,
+                        QC_name,
+                        tour_job.get_job_info()["assigned_yard_name"],
+                        assigned_yard,
+                        buffer_coord,
+                    )
+                )
+                tour_job.set_instructions(tour_job_instructions)
+                tour_job.link_tour(job)
+
+            # Direct legs between QC and yard, without stopping at the buffer
+            elif self._features["direct_legs"]:
+                job_instructions = self.get_direct_leg_instructions(
+                    job_type, HT_name, QC_name, assigned_yard, buffer_coord
+                )
+
             # For DI job
-            if job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
+            elif job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
 
                 # 1. Book QC resource
                 job_instructions.append(
@@ -140,12 +313,9 @@ class JobPlanner:
 
                 # 2. HT drives from Buffer to QC[IN]
                 buffer_coord = self.ht_coord_tracker.get_coordinate(HT_name)
-                path = self.get_path_from_buffer_to_QC(buffer_coord, QC_name)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_QC", buffer_coord, QC_name
                     )
                 )
 
@@ -159,12 +329,13 @@ class JobPlanner:
                 )
 
                 # 4. HT drives from QC to Buffer
-                path = self.get_path_from_QC_to_buffer(QC_name, buffer_coord)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name,
+                        "QC_to_buffer",
+                        QC_name,
+                        buffer_coord,
+                        next_leg=("buffer_to_yard", assigned_yard),
                     )
                 )
 
@@ -176,12 +347,9 @@ class JobPlanner:
                 )
 
                 # 6. HT drives from Buffer to Yard[IN]
-                path = self.get_path_from_buffer_to_yard(buffer_coord, assigned_yard)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_yard", buffer_coord, assigned_yard
                     )
                 )
 
@@ -195,12 +363,9 @@ class JobPlanner:
                 )
 
                 # 8. HT drives from Yard to Buffer
-                path = self.get_path_from_yard_to_buffer(assigned_yard, buffer_coord)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name, "yard_to_buffer", assigned_yard, buffer_coord
                     )
                 )
 
@@ -216,12 +381,9 @@ class JobPlanner:
 
                 # 2. HT drives from buffer to Yard[IN]
                 buffer_coord = self.ht_coord_tracker.get_coordinate(HT_name)
-                path = self.get_path_from_buffer_to_yard(buffer_coord, assigned_yard)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_yard", buffer_coord, assigned_yard
                     )
                 )
 
@@ -235,12 +397,13 @@ class JobPlanner:
                 )
 
                 # 4. HT drives from Yard to buffer
-                path = self.get_path_from_yard_to_buffer(assigned_yard, buffer_coord)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name,
+                        "yard_to_buffer",
+                        assigned_yard,
+                        buffer_coord,
+                        next_leg=("buffer_to_QC", QC_name),
                     )
                 )
 
@@ -252,12 +415,9 @@ class JobPlanner:
                 )
 
                 # 6. HT drives from buffer to QC[IN]
-                path = self.get_path_from_buffer_to_QC(buffer_coord, QC_name)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_QC", buffer_coord, QC_name
                     )
                 )
 
@@ -271,21 +431,20 @@ class JobPlanner:
                 )
 
                 # 8. HT drives from QC to buffer
-                path = self.get_path_from_QC_to_buffer(QC_name, buffer_coord)
                 job_instructions.append(
-                    JobInstruction(
-                        instruction_type=InstructionType.DRIVE,
-                        HT_name=HT_name,
-                        path=path,
+                    self.make_drive_instruction(
+                        HT_name, "QC_to_buffer", QC_name, buffer_coord
                     )
                 )
 
             job.set_instructions(job_instructions)
             new_jobs.append(job)
             if (
-                job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE
-                and assigned_yard
+                self._features["dual_cycle"]
+                and job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE
             ):
+                open_tours.setdefault(QC_name, list()).append(job)
+            if job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE and assigned_yard:
                 self._yard_di_allocation[assigned_yard] += 1
             # logger.debug(f"{job}")
 
@@ -297,13 +456,156 @@ class JobPlanner:
                     side = self._yard_side(yard_name)
                     self._corridor_history[side] += 1
 
+        self._latest_selected_HT_names = selected_HT_names
+        if self._features["buffer_slots"]:
+            planned_job_ids = {job.get_job_id() for job in new_jobs}
+            self._next_leg_demand = self._forecast_next_legs(
+                job_tracker,
+                [
+                    job_id
+                    for job_id in plannable_job_ids
+                    if job_id not in planned_job_ids
+                ],
+            )
+
         return new_jobs
 
+    def _forecast_next_legs(
+        self, job_tracker: JobTracker, job_ids: Sequence[int]
+    ) -> Counter:
+        """
+        First leg out of the buffer, as (route, destination), of each job yet to be
+        planned: to the QC for a DI job, to the (preferred) yard for an LO job.
+        """
+        next_legs = Counter()
+        for job_id in job_ids:
+            job_info = job_tracker.get_job(job_id).get_job_info()
+            if job_info["job_type"] == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
+                next_legs[("buffer_to_QC", job_info["QC_name"])] += 1
+            elif job_info["yard_name"]:
+                next_legs[("buffer_to_yard", job_info["yard_name"])] += 1
+        return next_legs
+
+    def is_repositioning(self, HT_name: str) -> bool:
+        instruction = self._repositions.get(HT_name)
+        return (instruction is not None) and (instruction.end_time is None)
+
+    def plan_repositions(self, job_tracker: JobTracker) -> List[JobInstruction]:
+        """
+        Fleet rebalancing (``repositioning``): REPOSITION instructions moving idle HTs
+        to free buffer slots, so that they spread over the buffer lane in proportion
+        to the demand expected next.
+
+        The demand is the first leg out of the buffer (see ``_forecast_next_legs``)
+        of the jobs not planned yet among the next ``CONSTANT.REPOSITION_FORECAST_JOBS``
+        of each QC. Each leg gets a share of the idle HTs; for each share, the idle HT
+        with the shortest leg moves to the free slot with the shortest leg, if that
+        saves at least ``CONSTANT.REPOSITION_MIN_SAVING`` moves.
+        """
+        if not self._features["repositioning"]:
+            return []
+        self._repositions = {
+            HT_name: instruction
+            for HT_name, instruction in self._repositions.items()
+            if instruction.end_time is None
+        }
+        # idle HTs parked in their slot
+        idle_HT_coords = {
+            HT_name: self.ht_coord_tracker.get_coordinate(HT_name)
+            for HT_name in self.ht_coord_tracker.get_available_HTs()
+            if HT_name not in self._repositions
+            and HT_name not in self._latest_selected_HT_names
+        }
+        idle_HT_coords = {
+            HT_name: coord
+            for HT_name, coord in idle_HT_coords.items()
+            if self.buffer_slot_manager.get_slot(HT_name) == coord
+        }
+        if not idle_HT_coords:
+            return []
+        upcoming_job_ids = list()
+        for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES:
+            for job_id in job_tracker.get_next_n_job_sequences(
+                QC_name, number_of_jobs=CONSTANT.REPOSITION_FORECAST_JOBS
+            ):
+                job = job_tracker.get_job(job_id)
+                if job and job.get_job_info()["job_status"] == Status.NOT_PLANNED:
+                    upcoming_job_ids.append(job_id)
+        demand = self._forecast_next_legs(job_tracker, upcoming_job_ids)
+        number_of_legs = sum(demand.values())
+        if not number_of_legs:
+            return []
+
+        # share of the idle HTs per leg, by largest remainder
+        number_of_HTs = min(len(idle_HT_coords), number_of_legs)
+        shares = {
+            leg: count * number_of_HTs // number_of_legs
+            for leg, count in demand.items()
+        }
+        by_remainder = sorted(
+            demand,
+            key=lambda leg: (-(demand[leg] * number_of_HTs % number_of_legs), leg),
+        )
+        for leg in by_remainder[: number_of_HTs - sum(shares.values())]:
+            shares[leg] += 1
+
+        repositions = list()
+        vacated_slots = list()  # left in this pass, the HT may still be in them
+        for (route, destination), share in sorted(shares.items()):
+            for _ in range(share):
+                HT_name = min(
+                    idle_HT_coords,
+                    key=lambda HT_name: (
+                        self._get_route_length(
+                            route, idle_HT_coords[HT_name], destination
+                        ),
+                        HT_name,
+                    ),
+                )
+                origin = idle_HT_coords.pop(HT_name)
+                free_slots = [
+                    slot
+                    for slot in self.buffer_slot_manager.get_free_slots()
+                    if slot not in vacated_slots
+                ]
+                if not free_slots:
+                    continue
+                slot = min(
+                    free_slots,
+                    key=lambda slot: (
+                        self._get_route_length(route, slot, destination),
+                        abs(slot.x - origin.x),
+                    ),
+                )
+                saving = self._get_route_length(
+                    route, origin, destination
+                ) - self._get_route_length(route, slot, destination)
+                if saving < CONSTANT.REPOSITION_MIN_SAVING:
+                    continue
+                instruction = JobInstruction(
+                    instruction_type=InstructionType.REPOSITION,
+                    HT_name=HT_name,
+                    path=self.resolve_drive_path(
+                        DrivePathSpec(
+                            route="buffer_to_buffer", origin=origin, destination=slot
+                        )
+                    ),
+                )
+                self.buffer_slot_manager.assign(HT_name, slot)
+                # a cancelled reposition leaves the HT in its slot
+                instruction.set_cancel_listener(
+                    partial(self.buffer_slot_manager.assign, HT_name, origin)
+                )
+                vacated_slots.append(origin)
+                self._repositions[HT_name] = instruction
+                repositions.append(instruction)
+        return repositions
+
     # HT ASSIGNMENT LOGIC
     def select_HT(
         self,
         job_info: Dict[str, object],
-        selected_HT_names: List[str],
+        selected_HT_names: Set[str],
         assigned_yard: str,
     ) -> Optional[str]:
         """Select an available HT using a distance-based heuristic.
@@ -312,6 +614,11 @@ class JobPlanner:
         unit that minimises the combined distance of the immediate trip and the
         following leg implied by the job type and yard assignment.
 
+        Idle HTs are visited nearest first from the column of the job's first stop
+        (see ``_get_HT_cost_anchor``) through the tracker's idle-HT index, until no
+        farther HT can cost less than the best one found. The choice is the same as
+        scoring every idle HT, ties going to the first HT of the fleet.
+
         Args:
             job_info: Metadata describing the job currently being planned.
             selected_HT_names: HTs already chosen in this planning pass.
@@ -320,25 +627,77 @@ class JobPlanner:
         Returns:
             The chosen HT name, or ``None`` if no idle HT is available.
         """
-        plannable_HTs = self.ht_coord_tracker.get_available_HTs()
+        anchor = self._get_HT_cost_anchor(job_info, assigned_yard)
+        if anchor is None:
+            return None
+        anchor_x, base_cost = anchor
         best_choice = None
         best_cost = float("inf")
 
-        for HT_name in plannable_HTs:
+        for (
+            distance,
+            HT_name,
+            ht_coord,
+        ) in self.ht_coord_tracker.iter_nearest_available_HTs(anchor_x):
+            # this HT and all farther ones cost at least base_cost + distance
+            if base_cost + distance > best_cost + 1e-6:
+                break
             if HT_name in selected_HT_names:
                 continue
 
-            ht_coord = self.ht_coord_tracker.get_coordinate(HT_name)
-            if ht_coord is None:
+            if self.is_repositioning(HT_name) and (
+                ht_coord.y != self.buffer_slot_manager.get_slot(HT_name).y
+            ):
+                # on its way to another buffer slot: only offered jobs once there
                 continue
 
             cost = self._estimate_HT_assignment_cost(ht_coord, job_info, assigned_yard)
-            if cost < best_cost:
+            if (cost < best_cost) or (
+                cost == best_cost
+                and self.ht_coord_tracker.get_HT_rank(HT_name)
+                < self.ht_coord_tracker.get_HT_rank(best_choice)
+            ):
                 best_cost = cost
                 best_choice = HT_name
 
         return best_choice
 
+    def _get_HT_cost_anchor(
+        self, job_info: Dict[str, object], assigned_yard: str
+    ) -> Optional[Tuple[int, float]]:
+        """
+        Column of the job's first stop and the part of
+        ``_estimate_HT_assignment_cost`` that does not depend on the HT: an HT
+        ``d`` columns away from the first stop costs at least that part plus ``d``.
+        None if the job cannot be costed.
+        """
+        qc_sector = self.sector_map_snapshot.get_QC_sector(job_info.get("QC_name"))
+        if qc_sector is None:
+            return None
+        yard_sector = (
+            self.sector_map_snapshot.get_yard_sector(assigned_yard)
+            if assigned_yard
+            else None
+        )
+        if job_info.get("job_type") == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
+            anchor_x = qc_sector.in_coord.x
+            base_cost = 0.0
+            if yard_sector:
+                onward = self._manhattan_distance(
+                    qc_sector.out_coord, yard_sector.in_coord
+                )
+                base_cost += onward * 0.7
+        elif yard_sector:
+            anchor_x = yard_sector.in_coord.x
+            onward = self._manhattan_distance(yard_sector.out_coord, qc_sector.in_coord)
+            base_cost = onward * 0.7
+        else:
+            anchor_x = qc_sector.in_coord.x
+            base_cost = 0.0
+        if assigned_yard:
+            base_cost += self._recent_yard_usage.get(assigned_yard, 0) * 0.3
+        return anchor_x, base_cost
+
     def _estimate_HT_assignment_cost(
         self, ht_coord: Coordinate, job_info: Dict[str, object], assigned_yard: str
     ) -> float:
@@ -378,7 +737,9 @@ class JobPlanner:
             cost += self._recent_yard_usage.get(assigned_yard, 0) * 0.3
             if self._features["ht_future_penalty"]:
                 yard_side = self._yard_side(assigned_yard)
-                corridor_diff = self._corridor_history["west"] - self._corridor_history["east"]
+                corridor_diff = (
+                    self._corridor_history["west"] - self._corridor_history["east"]
+                )
                 if yard_side == "west" and corridor_diff > 0:
                     cost += corridor_diff * 0.5
                 elif yard_side == "east" and corridor_diff < 0:
@@ -390,11 +751,11 @@ class JobPlanner:
         return cost
 
     # YARD ASSIGNMENT LOGIC
-    def select_yard(self, job_seq: str, job_info: Dict[str, object]) -> str:
+    def select_yard(self, job_id: int, job_info: Dict[str, object]) -> str:
         """Select the yard for a discharge job based on precomputed planning data."""
         yard_plan = getattr(self, "_latest_yard_plan", {})
-        if job_seq in yard_plan:
-            return yard_plan[job_seq]
+        if job_id in yard_plan:
+            return yard_plan[job_id]
 
         options = self._enumerate_yard_options(job_info)
         if not options:
@@ -402,7 +763,9 @@ class JobPlanner:
 
         return self._select_best_yard(job_info, options)
 
-    def _select_best_yard(self, job_info: Dict[str, object], options: Sequence[str]) -> str:
+    def _select_best_yard(
+        self, job_info: Dict[str, object], options: Sequence[str]
+    ) -> str:
         best_choice = None
         best_score = float("inf")
         for option in options:
@@ -413,14 +776,14 @@ class JobPlanner:
         return best_choice if best_choice is not None else options[0]
 
     def _optimize_yard_assignments(
-        self, job_tracker: JobTracker, job_seqs: List[str]
-    ) -> Dict[str, str]:
-        yard_plan: Dict[str, str] = dict()
+        self, job_tracker: JobTracker, job_ids: List[int]
+    ) -> Dict[int, str]:
+        yard_plan: Dict[int, str] = dict()
         candidate_jobs: List[tuple] = list()
         base_di_counts = Counter(self._yard_di_allocation)
 
-        for job_seq in job_seqs:
-            job = job_tracker.get_job(job_seq)
+        for job_id in job_ids:
+            job = job_tracker.get_job(job_id)
             if job is None:
                 continue
             job_info = job.get_job_info()
@@ -430,25 +793,59 @@ class JobPlanner:
             if not options:
                 continue
             if len(options) == 1:
-                yard_plan[job_seq] = options[0]
+                yard_plan[job_id] = options[0]
                 base_di_counts[options[0]] += 1
                 continue
-            candidate_jobs.append((job_seq, job_info, options))
+            candidate_jobs.append((job_id, job_info, options))
 
         if not candidate_jobs:
             return yard_plan
 
+        if self._recorded_yard_windows is not None:
+            self._recorded_yard_windows.append(
+                self._snapshot_yard_window(candidate_jobs, base_di_counts)
+            )
+
+        best_plan = self._run_yard_engine(
+            self._active_yard_engine(), candidate_jobs, base_di_counts
+        )
+        best_plan = self._enforce_capacity_limit(
+            best_plan, candidate_jobs, base_di_counts
+        )
+        yard_plan.update(best_plan)
+        return yard_plan
+
+    def _active_yard_engine(self) -> str:
+        if self._features["yard_local_search"]:
+            return "local_search"
+        return "ga"
+
+    def _run_yard_engine(
+        self, engine: str, candidate_jobs: List[tuple], base_di_counts: Counter
+    ) -> Dict[int, str]:
+        if engine == "local_search":
+            return self._local_search_yard_assignments(candidate_jobs, base_di_counts)
+        if engine == "ga":
+            return self._genetic_yard_assignments(candidate_jobs, base_di_counts)
+        raise ValueError(f"Unknown yard assignment engine: {engine}")
+
+    def _genetic_yard_assignments(
+        self, candidate_jobs: List[tuple], base_di_counts: Counter
+    ) -> Dict[int, str]:
         population_size = min(16, max(4, len(candidate_jobs) * 2))
         generations = 5
         elite_count = max(1, min(3, population_size // 3))
 
         if self._features["ga_diversity"]:
             base_plan = {
-                job_seq: self._diverse_seed_choice(job_info, options)
-                for job_seq, job_info, options in candidate_jobs
+                job_id: self._diverse_seed_choice(job_info, options)
+                for job_id, job_info, options in candidate_jobs
             }
         else:
-            base_plan = {job_seq: options[0] for job_seq, _, options in candidate_jobs}
+            base_plan = {
+                job_id: self._yard_preplan_targets.get(job_id, options[0])
+                for job_id, _, options in candidate_jobs
+            }
         population = [base_plan]
         while len(population) < population_size:
             population.append(self._random_assignment(candidate_jobs, base_di_counts))
@@ -512,16 +909,140 @@ class JobPlanner:
         if final_scored and final_scored[0][0] < best_score:
             best_score, best_plan = final_scored[0]
 
-        best_plan = self._enforce_capacity_limit(best_plan, candidate_jobs, base_di_counts)
-        yard_plan.update(best_plan)
-        return yard_plan
+        return best_plan
+
+    def _local_search_yard_assignments(
+        self, candidate_jobs: List[tuple], base_di_counts: Counter
+    ) -> Dict[int, str]:
+        """Deterministic tabu search over single-job yard reassignments.
+
+        Starts from the cheapest capacity-feasible option per job and, on every
+        iteration, applies the best-scoring move that reassigns one job to
+        another of its yard options. Reverting a move is tabu for a few
+        iterations unless it would beat the best plan found so far.
+        """
+        current_counts = Counter(base_di_counts)
+        current: Dict[int, str] = dict()
+        for job_id, job_info, options in candidate_jobs:
+            ranked = sorted(
+                options, key=lambda option: self._yard_choice_cost(job_info, option)
+            )
+            current[job_id] = self._pick_feasible_yard(tuple(ranked), current_counts)
+            current_counts[current[job_id]] += 1
+
+        best_plan = dict(current)
+        best_score = self._score_yard_plan(current, candidate_jobs, base_di_counts)
+        tabu_until: Dict[Tuple[str, str], int] = dict()
+        stagnant_iterations = 0
+
+        for iteration in range(self._LOCAL_SEARCH_MAX_ITERATIONS):
+            best_move = None
+            best_move_score = float("inf")
+            for job_id, _, options in candidate_jobs:
+                current_yard = current[job_id]
+                for option in options:
+                    if option == current_yard:
+                        continue
+                    if current_counts[option] >= self._YARD_DI_CAPACITY:
+                        continue
+                    current[job_id] = option
+                    score = self._score_yard_plan(
+                        current, candidate_jobs, base_di_counts
+                    )
+                    current[job_id] = current_yard
+                    is_tabu = tabu_until.get((job_id, option), -1) >= iteration
+                    if is_tabu and score >= best_score:
+                        continue
+                    if score < best_move_score:
+                        best_move_score = score
+                        best_move = (job_id, current_yard, option)
+
+            if best_move is None:
+                break
+
+            job_id, previous_yard, new_yard = best_move
+            current[job_id] = new_yard
+            current_counts[previous_yard] -= 1
+            current_counts[new_yard] += 1
+            tabu_until[(job_id, previous_yard)] = (
+                iteration + self._LOCAL_SEARCH_TABU_TENURE
+            )
+
+            if best_move_score < best_score:
+                best_score = best_move_score
+                best_plan = dict(current)
+                stagnant_iterations = 0
+            else:
+                stagnant_iterations += 1
+                if stagnant_iterations >= self._LOCAL_SEARCH_PATIENCE:
+                    break
+
+        return best_plan
+
+    def _snapshot_yard_window(
+        self, candidate_jobs: List[tuple], base_di_counts: Counter
+    ) -> YardPlanningWindow:
+        return YardPlanningWindow(
+            candidate_jobs=[
+                (job_id, dict(job_info), tuple(options))
+                for job_id, job_info, options in candidate_jobs
+            ],
+            base_di_counts=Counter(base_di_counts),
+            recent_yard_usage=Counter(self._recent_yard_usage),
+            corridor_history=Counter(self._corridor_history),
+        )
+
+    def record_yard_windows(self) -> List[YardPlanningWindow]:
+        """Start recording every yard planning window handed to the engine.
+
+        Returns the list the windows are appended to, so callers (e.g. the
+        benchmark) can replay them later through :meth:`replay_yard_window`.
+        """
+        if self._recorded_yard_windows is None:
+            self._recorded_yard_windows = list()
+        return self._recorded_yard_windows
+
+    def replay_yard_window(
+        self, window: YardPlanningWindow, engine: str
+    ) -> Dict[str, object]:
+        """Solve a recorded planning window with the given engine.
+
+        The planner's yard usage and corridor history are restored from the
+        window first, so every engine sees exactly the state of the original
+        planning cycle.
+
+        Returns:
+            A dict with the capacity-enforced ``plan``, its ``score``, the number
+            of objective ``evaluations`` and the engine ``elapsed`` seconds.
+        """
+        self._recent_yard_usage = Counter(window.recent_yard_usage)
+        self._corridor_history = Counter(window.corridor_history)
+        evaluations_before = self._yard_plan_evaluations
+        started = time.perf_counter()
+        plan = self._run_yard_engine(
+            engine, window.candidate_jobs, window.base_di_counts
+        )
+        plan = self._enforce_capacity_limit(
+            plan, window.candidate_jobs, window.base_di_counts
+        )
+        elapsed = time.perf_counter() - started
+        evaluations = self._yard_plan_evaluations - evaluations_before
+        score = self._score_yard_plan(
+            plan, window.candidate_jobs, window.base_di_counts
+        )
+        return {
+            "plan": plan,
+            "score": score,
+            "evaluations": evaluations,
+            "elapsed": elapsed,
+        }
 
     def _random_assignment(
         self, candidate_jobs: List[tuple], base_counts: Counter
-    ) -> Dict[str, str]:
-        assignment: Dict[str, str] = dict()
+    ) -> Dict[int, str]:
+        assignment: Dict[int, str] = dict()
         local_counts = Counter(base_counts)
-        for job_seq, job_info, options in candidate_jobs:
+        for job_id, job_info, options in candidate_jobs:
             preferred = job_info.get("yard_name")
             if self._features["ga_diversity"]:
                 weighted_options = sorted(
@@ -530,44 +1051,43 @@ class JobPlanner:
                     + self._rng.random() * 5.0,
                 )
                 choice = self._pick_feasible_yard(weighted_options, local_counts)
-                assignment[job_seq] = choice
+                assignment[job_id] = choice
             elif preferred in options and self._rng.random() < 0.6:
-                choice = self._pick_feasible_yard((preferred,) + tuple(options), local_counts)
-                assignment[job_seq] = choice
+                choice = self._pick_feasible_yard(
+                    (preferred,) + tuple(options), local_counts
+                )
+                assignment[job_id] = choice
             else:
                 shuffled = list(options)
                 self._rng.shuffle(shuffled)
                 choice = self._pick_feasible_yard(tuple(shuffled), local_counts)
-                assignment[job_seq] = choice
-            local_counts[assignment[job_seq]] += 1
+                assignment[job_id] = choice
+            local_counts[assignment[job_id]] += 1
         return assignment
 
     def _mutate_assignment(
         self,
-        baseline: Dict[str, str],
+        baseline: Dict[int, str],
         candidate_jobs: List[tuple],
         mutation_rate: float = 0.35,
         base_counts: Optional[Counter] = None,
-    ) -> Dict[str, str]:
+    ) -> Dict[int, str]:
         mutated = baseline.copy()
         current_counts = Counter(base_counts or Counter())
         for yard in mutated.values():
             current_counts[yard] += 1
-        for job_seq, _, options in candidate_jobs:
+        for job_id, _, options in candidate_jobs:
             if len(options) <= 1:
                 continue
             if self._rng.random() < mutation_rate:
-                current = mutated.get(job_seq, options[0])
+                current = mutated.get(job_id, options[0])
                 alternative_pool = [opt for opt in options if opt != current]
                 if not alternative_pool:
                     alternative_pool = list(options)
                 self._rng.shuffle(alternative_pool)
                 for candidate in alternative_pool:
-                    if (
-                        current_counts[candidate]
-                        < self._YARD_DI_CAPACITY
-                    ):
-                        mutated[job_seq] = candidate
+                    if current_counts[candidate] < self._YARD_DI_CAPACITY:
+                        mutated[job_id] = candidate
                         current_counts[current] -= 1
                         current_counts[candidate] += 1
                         break
@@ -585,19 +1105,20 @@ class JobPlanner:
 
     def _score_yard_plan(
         self,
-        plan: Dict[str, str],
+        plan: Dict[int, str],
         candidate_jobs: List[tuple],
         base_counts: Counter,
     ) -> float:
-        job_lookup = {job_seq: job_info for job_seq, job_info, _ in candidate_jobs}
+        self._yard_plan_evaluations += 1
+        job_lookup = {job_id: job_info for job_id, job_info, _ in candidate_jobs}
         yard_counts = Counter()
         corridor_counts = Counter()
         for yard_name, count in base_counts.items():
             corridor_counts[self._yard_side(yard_name)] += count
         total_cost = 0.0
 
-        for job_seq, yard_name in plan.items():
-            job_info = job_lookup[job_seq]
+        for job_id, yard_name in plan.items():
+            job_info = job_lookup[job_id]
             total_cost += self._yard_choice_cost(job_info, yard_name)
             yard_counts[yard_name] += 1
             corridor_counts[self._yard_side(yard_name)] += 1
@@ -632,16 +1153,18 @@ class JobPlanner:
 
     def _enforce_capacity_limit(
         self,
-        plan: Dict[str, str],
+        plan: Dict[int, str],
         candidate_jobs: List[tuple],
         base_counts: Counter,
-    ) -> Dict[str, str]:
+    ) -> Dict[int, str]:
         if not plan:
             return plan
 
         combined_counts = Counter(base_counts)
-        job_lookup = {job_seq: (job_info, options) for job_seq, job_info, options in candidate_jobs}
-        for job_seq, yard_name in plan.items():
+        job_lookup = {
+            job_id: (job_info, options) for job_id, job_info, options in candidate_jobs
+        }
+        for job_id, yard_name in plan.items():
             combined_counts[yard_name] += 1
 
         def capacity_overflow() -> Dict[str, int]:
@@ -660,8 +1183,8 @@ class JobPlanner:
             if excess <= 0:
                 break
             movable_jobs: List[Tuple[float, str, str]] = []
-            for job_seq, (job_info, options) in job_lookup.items():
-                if plan.get(job_seq) != yard:
+            for job_id, (job_info, options) in job_lookup.items():
+                if plan.get(job_id) != yard:
                     continue
                 alternatives = [opt for opt in options if opt != yard]
                 for alt in alternatives:
@@ -670,14 +1193,16 @@ class JobPlanner:
                     current_cost = self._yard_choice_cost(job_info, yard)
                     alt_cost = self._yard_choice_cost(job_info, alt)
                     delta = alt_cost - current_cost
-                    movable_jobs.append((delta, job_seq, alt))
+                    movable_jobs.append((delta, job_id, alt))
 
             if not movable_jobs:
                 break
 
-            movable_jobs.sort(key=lambda item: (item[0], job_lookup[item[1]][0]["QC_name"]))
-            _, job_seq, target_yard = movable_jobs[0]
-            plan[job_seq] = target_yard
+            movable_jobs.sort(
+                key=lambda item: (item[0], job_lookup[item[1]][0]["QC_name"])
+            )
+            _, job_id, target_yard = movable_jobs[0]
+            plan[job_id] = target_yard
             combined_counts[yard] -= 1
             combined_counts[target_yard] += 1
             overflow = capacity_overflow()
@@ -715,16 +1240,29 @@ class JobPlanner:
         if self._features["dynamic_corridor_bias"]:
             cost += self._corridor_pressure_penalty(yard_name)
 
+        target = self._yard_preplan_targets.get(job_info.get("job_id"))
+        if target is not None and yard_name != target:
+            cost += self._YARD_PREPLAN_DEVIATION_PENALTY
+
         return cost
 
     def _yard_side(self, yard_name: str) -> str:
-        if yard_name and yard_name[0] in {"A", "B", "C", "D"}:
+        yard_sector = yard_name and self.sector_map_snapshot.get_yard_sector(yard_name)
+        if yard_sector and yard_sector.in_coord.x <= self._corridor_split_x:
             return "west"
         return "east"
 
     def _manhattan_distance(self, start: Coordinate, end: Coordinate) -> int:
         return abs(start.x - end.x) + abs(start.y - end.y)
 
+    def _apply_lane_usage_decay(self):
+        for lane_y in list(self._recent_lane_usage.keys()):
+            decayed = self._recent_lane_usage[lane_y] // 2
+            if decayed > 0:
+                self._recent_lane_usage[lane_y] = decayed
+            else:
+                del self._recent_lane_usage[lane_y]
+
     def _apply_yard_usage_decay(self):
         if not self._recent_yard_usage:
             return
@@ -735,7 +1273,361 @@ class JobPlanner:
             else:
                 del self._recent_yard_usage[yard_name]
 
+    def get_direct_leg_instructions(
+        self,
+        job_type: str,
+        HT_name: str,
+        QC_name: str,
+        yard_name: str,
+        buffer_coord: Coordinate,
+    ) -> List[JobInstruction]:
+        """
+        Instructions of a job whose HT drives straight from the QC to the yard (DI) or
+        from the yard to the QC (LO), only returning to its buffer at the end:
+
+        DI: BOOK_QC, DRIVE(buffer -> QC), WORK_QC, BOOK_YARD, DRIVE(QC -> yard),
+            WORK_YARD, DRIVE(yard -> buffer)
+        LO: BOOK_YARD, DRIVE(buffer -> yard), WORK_YARD, BOOK_QC, DRIVE(yard -> QC),
+            WORK_QC, DRIVE(QC -> buffer)
+
+        Each booking comes right before the leg driving to the booked resource. When
+        the second booking is not near its turn yet, the HT does not wait at the gate
+        it just worked at (blocking the HTs queued behind it) but falls back to the
+        buffer round trip.
+        """
+        work_QC = JobInstruction(
+            instruction_type=InstructionType.WORK_QC, HT_name=HT_name, QC_name=QC_name
+        )
+        work_yard = JobInstruction(
+            instruction_type=InstructionType.WORK_YARD,
+            HT_name=HT_name,
+            yard_name=yard_name,
+        )
+        if job_type == CONSTANT.JOB_PARAMETER.DISCHARGE_JOB_TYPE:
+            book_yard = JobInstruction(
+                instruction_type=InstructionType.BOOK_YARD,
+                fallback=[
+                    self.make_drive_instruction(
+                        HT_name,
+                        "QC_to_buffer",
+                        QC_name,
+                        buffer_coord,
+                        next_leg=("buffer_to_yard", yard_name),
+                    ),
+                    JobInstruction(instruction_type=InstructionType.BOOK_YARD),
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_yard", buffer_coord, yard_name
+                    ),
+                ],
+            )
+            return [
+                JobInstruction(instruction_type=InstructionType.BOOK_QC),
+                self.make_drive_instruction(
+                    HT_name, "buffer_to_QC", buffer_coord, QC_name
+                ),
+                work_QC,
+                book_yard,
+                self.make_drive_instruction(HT_name, "QC_to_yard", QC_name, yard_name),
+                work_yard,
+                self.make_drive_instruction(
+                    HT_name, "yard_to_buffer", yard_name, buffer_coord
+                ),
+            ]
+        book_QC = JobInstruction(
+            instruction_type=InstructionType.BOOK_QC,
+            fallback=[
+                self.make_drive_instruction(
+                    HT_name,
+                    "yard_to_buffer",
+                    yard_name,
+                    buffer_coord,
+                    next_leg=("buffer_to_QC", QC_name),
+                ),
+                JobInstruction(instruction_type=InstructionType.BOOK_QC),
+                self.make_drive_instruction(
+                    HT_name, "buffer_to_QC", buffer_coord, QC_name
+                ),
+            ],
+        )
+        return [
+            JobInstruction(instruction_type=InstructionType.BOOK_YARD),
+            self.make_drive_instruction(
+                HT_name, "buffer_to_yard", buffer_coord, yard_name
+            ),
+            work_yard,
+            book_QC,
+            self.make_drive_instruction(HT_name, "yard_to_QC", yard_name, QC_name),
+            work_QC,
+            self.make_drive_instruction(HT_name, "QC_to_buffer", QC_name, buffer_coord),
+        ]
+
+    def get_dual_cycle_instructions(
+        self,
+        HT_name: str,
+        QC_name: str,
+        DI_yard_name: str,
+        LO_yard_name: str,
+        buffer_coord: Coordinate,
+    ) -> Tuple[List[JobInstruction], List[JobInstruction]]:
+        """
+        Instructions of a DI job and of the LO job chained after it in one HT tour
+        (QC -> yard drop -> yard pick-up -> QC):
+
+        DI: BOOK_QC, DRIVE(buffer -> QC), WORK_QC, BOOK_YARD, DRIVE(QC -> yard),
+            WORK_YARD
+        LO: BOOK_YARD, DRIVE(yard -> yard), WORK_YARD, BOOK_QC, DRIVE(yard -> QC),
+            WORK_QC, DRIVE(QC -> buffer)
+
+        When both jobs use the same yard, the LO job has no yard-to-yard DRIVE. As with
+        direct legs, a booking made at a QC/yard gate falls back to a buffer round
+        trip when it is not near its turn.
+        """
+        DI_instructions = [
+            JobInstruction(instruction_type=InstructionType.BOOK_QC),
+            self.make_drive_instruction(HT_name, "buffer_to_QC", buffer_coord, QC_name),
+            JobInstruction(
+                instruction_type=InstructionType.WORK_QC,
+                HT_name=HT_name,
+                QC_name=QC_name,
+            ),
+            JobInstruction(
+                instruction_type=InstructionType.BOOK_YARD,
+                fallback=[
+                    self.make_drive_instruction(
+                        HT_name,
+                        "QC_to_buffer",
+                        QC_name,
+                        buffer_coord,
+                        next_leg=("buffer_to_yard", DI_yard_name),
+                    ),
+                    JobInstruction(instruction_type=InstructionType.BOOK_YARD),
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_yard", buffer_coord, DI_yard_name
+                    ),
+                ],
+            ),
+            self.make_drive_instruction(HT_name, "QC_to_yard", QC_name, DI_yard_name),
+            JobInstruction(
+                instruction_type=InstructionType.WORK_YARD,
+                HT_name=HT_name,
+                yard_name=DI_yard_name,
+            ),
+        ]
+        LO_work_yard = JobInstruction(
+            instruction_type=InstructionType.WORK_YARD,
+            HT_name=HT_name,
+            yard_name=LO_yard_name,
+        )
+        to_buffer_and_back = [
+            self.make_drive_instruction(
+                HT_name,
+                "yard_to_buffer",
+                DI_yard_name,
+                buffer_coord,
+                next_leg=("buffer_to_yard", LO_yard_name),
+            ),
+            JobInstruction(instruction_type=InstructionType.BOOK_YARD),
+            self.make_drive_instruction(
+                HT_name, "buffer_to_yard", buffer_coord, LO_yard_name
+            ),
+        ]
+        if LO_yard_name == DI_yard_name:
+            # the HT is already at the yard: the pick-up directly follows the drop
+            LO_instructions = [
+                JobInstruction(
+                    instruction_type=InstructionType.BOOK_YARD,
+                    fallback=to_buffer_and_back + [LO_work_yard],
+                ),
+                LO_work_yard,
+            ]
+        else:
+            LO_instructions = [
+                JobInstruction(
+                    instruction_type=InstructionType.BOOK_YARD,
+                    fallback=to_buffer_and_back,
+                ),
+                self.make_drive_instruction(
+                    HT_name, "yard_to_yard", DI_yard_name, LO_yard_name
+                ),
+                LO_work_yard,
+            ]
+        LO_instructions += [
+            JobInstruction(
+                instruction_type=InstructionType.BOOK_QC,
+                fallback=[
+                    self.make_drive_instruction(
+                        HT_name,
+                        "yard_to_buffer",
+                        LO_yard_name,
+                        buffer_coord,
+                        next_leg=("buffer_to_QC", QC_name),
+                    ),
+                    JobInstruction(instruction_type=InstructionType.BOOK_QC),
+                    self.make_drive_instruction(
+                        HT_name, "buffer_to_QC", buffer_coord, QC_name
+                    ),
+                ],
+            ),
+            self.make_drive_instruction(HT_name, "yard_to_QC", LO_yard_name, QC_name),
+            JobInstruction(
+                instruction_type=InstructionType.WORK_QC,
+                HT_name=HT_name,
+                QC_name=QC_name,
+            ),
+            self.make_drive_instruction(HT_name, "QC_to_buffer", QC_name, buffer_coord),
+        ]
+        return DI_instructions, LO_instructions
+
     # NAVIGATION LOGIC
+    def make_drive_instruction(
+        self,
+        HT_name: str,
+        route: str,
+        origin: Any,
+        destination: Any,
+        next_leg: Optional[Tuple[str, Any]] = None,
+    ) -> JobInstruction:
+        """
+        DRIVE instruction along ``route`` (one of ``DRIVE_ROUTES``). With ``lazy_paths``
+        the path is only built by ``resolve_drive_path`` when the DRIVE starts.
+
+        With ``buffer_slots``, DRIVEs from and to the buffer are always lazy: see
+        ``resolve_buffer_leg``; ``next_leg`` is the (route, destination) the HT
+        takes out of the buffer after a DRIVE to it, if known at planning time.
+        """
+        path_spec = DrivePathSpec(route=route, origin=origin, destination=destination)
+        if self._features["buffer_slots"] and route in (
+            ROUTES_FROM_BUFFER + ROUTES_TO_BUFFER
+        ):
+            return JobInstruction(
+                instruction_type=InstructionType.DRIVE,
+                HT_name=HT_name,
+                path_spec=path_spec,
+                path_resolver=partial(self.resolve_buffer_leg, HT_name, next_leg),
+            )
+        if self._features["lazy_paths"]:
+            return JobInstruction(
+                instruction_type=InstructionType.DRIVE,
+                HT_name=HT_name,
+                path_spec=path_spec,
+                path_resolver=self.resolve_drive_path,
+            )
+        return JobInstruction(
+            instruction_type=InstructionType.DRIVE,
+            HT_name=HT_name,
+            path=self.resolve_drive_path(path_spec),
+        )
+
+    def resolve_drive_path(self, path_spec: DrivePathSpec) -> List[Coordinate]:
+        """Build the path of a DRIVE from its route policy, origin and destination."""
+        build_path = getattr(self, DRIVE_ROUTES[path_spec.route])
+        return build_path(path_spec.origin, path_spec.destination)
+
+    def resolve_buffer_leg(
+        self,
+        HT_name: str,
+        next_leg: Optional[Tuple[str, Any]],
+        path_spec: DrivePathSpec,
+    ) -> List[Coordinate]:
+        """
+        Build the path of a DRIVE from or to the buffer (``buffer_slots``).
+
+        Leaving the buffer, the HT starts from the slot it parks in and frees it.
+        Returning, it is given the free slot minimising the return leg plus the
+        leg out of the buffer after it: ``next_leg`` if known, otherwise the
+        expected first leg of the jobs yet to be planned.
+        """
+        if path_spec.route in ROUTES_FROM_BUFFER:
+            self.buffer_slot_manager.release(HT_name)
+            path_spec = path_spec._replace(
+                origin=self.ht_coord_tracker.get_coordinate(HT_name)
+            )
+        else:
+            slot = self.buffer_slot_manager.select_slot(
+                HT_name, partial(self._get_buffer_slot_cost, path_spec, next_leg)
+            )
+            if slot is not None:
+                path_spec = path_spec._replace(destination=slot)
+        return self.resolve_drive_path(path_spec)
+
+    def _get_buffer_slot_cost(
+        self,
+        path_spec: DrivePathSpec,
+        next_leg: Optional[Tuple[str, Any]],
+        slot: Coordinate,
+    ) -> float:
+        cost = self._get_route_length(path_spec.route, path_spec.origin, slot)
+        if next_leg is not None:
+            route, destination = next_leg
+            return cost + self._get_route_length(route, slot, destination)
+        number_of_legs = sum(self._next_leg_demand.values())
+        for (route, destination), count in self._next_leg_demand.items():
+            cost += (
+                self._get_route_length(route, slot, destination)
+                * count
+                / number_of_legs
+            )
+        return cost
+
+    def _get_route_length(self, route: str, origin: Any, destination: Any) -> int:
+        """Moves of the path along ``route``, without counting it as lane usage."""
+        cache_key = tuple(
+            (end.x, end.y) if isinstance(end, Coordinate) else end
+            for end in (route, origin, destination)
+        )
+        if cache_key not in self._route_lengths:
+            recent_lane_usage = self._recent_lane_usage.copy()
+            path = self.resolve_drive_path(
+                DrivePathSpec(route=route, origin=origin, destination=destination)
+            )
+            self._recent_lane_usage = recent_lane_usage
+            self._route_lengths[cache_key] = len(path)
+        return self._route_lengths[cache_key]
+
+    def select_lane(self, lanes: Sequence[int], default: int) -> int:
+        """
+        Highway lane (y) of a path among the parallel ``lanes`` of its direction.
+
+        With ``lane_balancing``, the lane with the fewest HTs on it plus paths
+        recently routed over it (ties to the northmost); otherwise ``default``, the
+        lane of the fixed routes.
+        """
+        if not self._features["lane_balancing"]:
+            return default
+        lane_loads = self._get_lane_loads()
+        lane_y = min(lanes, key=lambda y: (lane_loads[y], y))
+        self._recent_lane_usage[lane_y] += 1
+        return lane_y
+
+    def select_lanes_to_yard(self) -> Tuple[int, int]:
+        """
+        Westbound and eastbound lanes of a path looping to a yard: west, down at
+        x = 1, then east on the southmost eastbound lane, so HTs only move down at
+        x = 1; the westbound lane with the lowest load is chosen.
+        """
+        if not self._features["lane_balancing"]:
+            return self._westbound_lanes[-1], self._eastbound_lanes[-1]
+        lane_loads = self._get_lane_loads()
+        west_lane_y, east_lane_y = min(
+            [
+                (west_lane_y, east_lane_y)
+                for west_lane_y in self._yard_loop_lanes
+                for east_lane_y in self._yard_approach_lanes
+                if east_lane_y > west_lane_y
+            ],
+            key=lambda lanes: (lane_loads[lanes[0]] + lane_loads[lanes[1]], lanes),
+        )
+        self._recent_lane_usage.update([west_lane_y, east_lane_y])
+        return west_lane_y, east_lane_y
+
+    def _get_lane_loads(self) -> Counter:
+        """HTs on each lane (y) plus paths recently routed over it."""
+        lane_loads = Counter(
+            coord.y for coord in self.ht_coord_tracker.get_all_HT_coordinates()
+        )
+        lane_loads.update(self._recent_lane_usage)
+        return lane_loads
+
     def get_path_from_buffer_to_QC(
         self, buffer_coord: Coordinate, QC_name: str
     ) -> List[Coordinate]:
@@ -755,12 +1647,16 @@ class JobPlanner:
         Returns:
             List[Coordinate]: A list of coordinates representing the path from the buffer to the QC.
         """
+
         def build() -> List[Coordinate]:
             QC_in_coord = self.sector_map_snapshot.get_QC_sector(QC_name).in_coord
-            highway_lane_y = 7
+            highway_lane_y = self._westbound_lanes[0]
             path_local = [Coordinate(buffer_coord.x, highway_lane_y)]
             path_local.extend(
-                [Coordinate(x, highway_lane_y) for x in range(buffer_coord.x - 1, 0, -1)]
+                [
+                    Coordinate(x, highway_lane_y)
+                    for x in range(buffer_coord.x - 1, 0, -1)
+                ]
             )
             up_path_x = 1
             path_local.extend([Coordinate(up_path_x, y) for y in range(6, 3, -1)])
@@ -786,10 +1682,10 @@ class JobPlanner:
         The path follows a specific route:
         1. Moves north to the QC travel lane (y = 5).
         2. Travels east to the right boundary of the sector (x = 42).
-        3. Moves south to the Highway Left lane (y = 11).
+        3. Moves south to a westbound highway lane (y = 11, see ``select_lanes_to_yard``).
         4. Travels west along the highway to the left boundary (x = 1).
-        5. Moves south to the lower boundary (y = 12).
-        6. Travels east to the IN coordinate of the specified yard.
+        5. Moves south to an eastbound lane (y = 12).
+        6. Travels east to the yard and moves south to its IN coordinate.
 
         Args:
             buffer_coord (Coordinate): The starting coordinate in the buffer zone.
@@ -798,29 +1694,37 @@ class JobPlanner:
         Returns:
             List[Coordinate]: A list of coordinates representing the path from the buffer to the yard.
         """
+        west_lane_y, east_lane_y = self.select_lanes_to_yard()
+
         def build() -> List[Coordinate]:
             yard_in_coord = self.sector_map_snapshot.get_yard_sector(yard_name).in_coord
             path_local = [Coordinate(buffer_coord.x, buffer_coord.y - 1)]
             qc_lane_y = 5
-            path_local.extend(
-                [Coordinate(x, qc_lane_y) for x in range(buffer_coord.x + 1, 43, 1)]
-            )
-            down_path_x = 42
-            path_local.extend([Coordinate(down_path_x, y) for y in range(6, 12, 1)])
-            highway_lane_y = 11
-            path_local.extend([Coordinate(x, highway_lane_y) for x in range(41, 0, -1)])
-            highway_lane_y = 12
-            path_local.append(Coordinate(1, highway_lane_y))
             path_local.extend(
                 [
-                    Coordinate(x, highway_lane_y)
-                    for x in range(2, yard_in_coord.x + 1, 1)
+                    Coordinate(x, qc_lane_y)
+                    for x in range(buffer_coord.x + 1, self._east_edge_x + 1, 1)
                 ]
             )
-            path_local.append(yard_in_coord)
+            down_path_x = self._east_edge_x
+            path_local.extend(
+                [Coordinate(down_path_x, y) for y in range(6, west_lane_y + 1, 1)]
+            )
+            path_local.extend(
+                self._get_loop_to_yard(
+                    west_lane_y, east_lane_y, self._east_edge_x - 1, yard_in_coord
+                )
+            )
             return path_local
 
-        cache_key = ("buffer_to_yard", buffer_coord.x, buffer_coord.y, yard_name)
+        cache_key = (
+            "buffer_to_yard",
+            buffer_coord.x,
+            buffer_coord.y,
+            yard_name,
+            west_lane_y,
+            east_lane_y,
+        )
         return self._build_path_with_cache(cache_key, build)
 
     def get_path_from_yard_to_buffer(
@@ -832,8 +1736,8 @@ class JobPlanner:
         The path follows this route:
         1. Starts at the yard OUT coordinate.
         2. Moves east along the highway lane (y = 12) towards the second-to-right boundary.
-        3. Moves north to the Highway Left lane (y = 7).
-        4. Travels west along the highway left lane to the target buffer coordinate.
+        3. Moves north to a westbound highway lane (y = 7, see ``select_lane``).
+        4. Travels west along that lane and moves north to the target buffer coordinate.
 
         Args:
             yard_name (str): The name of the yard from which the path starts.
@@ -842,23 +1746,45 @@ class JobPlanner:
         Returns:
             List[Coordinate]: A list of coordinates representing the path from the yard to the buffer.
         """
+        west_lane_y = self.select_lane(
+            self._buffer_return_lanes, default=self._westbound_lanes[0]
+        )
+
         def build() -> List[Coordinate]:
-            yard_out_coord = self.sector_map_snapshot.get_yard_sector(yard_name).out_coord
+            yard_out_coord = self.sector_map_snapshot.get_yard_sector(
+                yard_name
+            ).out_coord
             path_local = [yard_out_coord]
-            highway_lane_y = 12
+            highway_lane_y = self._eastbound_lanes[-1]
+            path_local.extend(
+                [
+                    Coordinate(x, highway_lane_y)
+                    for x in range(yard_out_coord.x, self._climb_x + 1, 1)
+                ]
+            )
+            up_path_x = self._climb_x
             path_local.extend(
-                [Coordinate(x, highway_lane_y) for x in range(yard_out_coord.x, 42, 1)]
+                [
+                    Coordinate(up_path_x, y)
+                    for y in range(highway_lane_y - 1, west_lane_y - 1, -1)
+                ]
             )
-            up_path_x = 41
-            path_local.extend([Coordinate(up_path_x, y) for y in range(11, 6, -1)])
-            highway_lane_y = 7
             path_local.extend(
-                [Coordinate(x, highway_lane_y) for x in range(40, buffer_coord.x - 1, -1)]
+                [
+                    Coordinate(x, west_lane_y)
+                    for x in range(self._climb_x - 1, buffer_coord.x - 1, -1)
+                ]
             )
-            path_local.append(buffer_coord)
+            path_local.extend(self._get_climb_to_buffer(west_lane_y, buffer_coord))
             return path_local
 
-        cache_key = ("yard_to_buffer", yard_name, buffer_coord.x, buffer_coord.y)
+        cache_key = (
+            "yard_to_buffer",
+            yard_name,
+            buffer_coord.x,
+            buffer_coord.y,
+            west_lane_y,
+        )
         return self._build_path_with_cache(cache_key, build)
 
     def get_path_from_QC_to_buffer(
@@ -871,8 +1797,8 @@ class JobPlanner:
         1. Starts at the QC OUT coordinate.
         2. Moves south to the QC travel lane (y = 4).
         3. Travels east along the QC travel lane to the right boundary.
-        4. Moves south to the Highway Left lane (y = 7).
-        5. Travels west along the highway left lane to the buffer coordinate.
+        4. Moves south to a westbound highway lane (y = 7, see ``select_lane``).
+        5. Travels west along that lane and moves north to the buffer coordinate.
 
         Args:
             QC_name (str): The name of the Quay Crane from which the path starts.
@@ -881,26 +1807,301 @@ class JobPlanner:
         Returns:
             List[Coordinate]: A list of coordinates representing the path from the QC to the buffer.
         """
+        west_lane_y = self.select_lane(
+            self._buffer_return_lanes, default=self._westbound_lanes[0]
+        )
+
         def build() -> List[Coordinate]:
             QC_out_coord = self.sector_map_snapshot.get_QC_sector(QC_name).out_coord
             path_local = [QC_out_coord]
             qc_travel_lane_y = 4
             path_local.append(Coordinate(QC_out_coord.x, qc_travel_lane_y))
             path_local.extend(
-                [Coordinate(x, qc_travel_lane_y) for x in range(QC_out_coord.x + 1, 43, 1)]
+                [
+                    Coordinate(x, qc_travel_lane_y)
+                    for x in range(QC_out_coord.x + 1, self._east_edge_x + 1, 1)
+                ]
+            )
+            down_path_x = self._east_edge_x
+            path_local.extend(
+                [Coordinate(down_path_x, y) for y in range(5, west_lane_y + 1, 1)]
+            )
+            path_local.extend(
+                [
+                    Coordinate(x, west_lane_y)
+                    for x in range(self._east_edge_x - 1, buffer_coord.x - 1, -1)
+                ]
+            )
+            path_local.extend(self._get_climb_to_buffer(west_lane_y, buffer_coord))
+            return path_local
+
+        cache_key = (
+            "qc_to_buffer",
+            QC_name,
+            buffer_coord.x,
+            buffer_coord.y,
+            west_lane_y,
+        )
+        return self._build_path_with_cache(cache_key, build)
+
+    def get_path_from_QC_to_yard(
+        self, QC_name: str, yard_name: str
+    ) -> List[Coordinate]:
+        """
+        Generates a path from a Quay Crane (QC) OUT coordinate to a yard IN area's coordinate.
+
+        The path follows this route:
+        1. Starts at the QC OUT coordinate.
+        2. Moves south to the QC travel lane (y = 4).
+        3. Travels east along the QC travel lane to the right boundary (x = 42).
+        4. Moves south to a westbound highway lane (y = 11, see ``select_lanes_to_yard``).
+        5. Travels west along the highway to the left boundary (x = 1).
+        6. Moves south to an eastbound lane (y = 12).
+        7. Travels east to the yard and moves south to its IN coordinate.
+
+        Args:
+            QC_name (str): The name of the Quay Crane from which the path starts.
+            yard_name (str): The name of the yard to which the path should lead.
+
+        Returns:
+            List[Coordinate]: A list of coordinates representing the path from the QC to the yard.
+        """
+        west_lane_y, east_lane_y = self.select_lanes_to_yard()
+
+        def build() -> List[Coordinate]:
+            QC_out_coord = self.sector_map_snapshot.get_QC_sector(QC_name).out_coord
+            yard_in_coord = self.sector_map_snapshot.get_yard_sector(yard_name).in_coord
+            path_local = [QC_out_coord]
+            qc_travel_lane_y = 4
+            path_local.extend(
+                [
+                    Coordinate(x, qc_travel_lane_y)
+                    for x in range(QC_out_coord.x, self._east_edge_x + 1, 1)
+                ]
+            )
+            down_path_x = self._east_edge_x
+            path_local.extend(
+                [Coordinate(down_path_x, y) for y in range(5, west_lane_y + 1, 1)]
             )
-            down_path_x = 42
-            path_local.extend([Coordinate(down_path_x, y) for y in range(5, 8, 1)])
-            highway_lane_y = 7
             path_local.extend(
-                [Coordinate(x, highway_lane_y) for x in range(41, buffer_coord.x - 1, -1)]
+                self._get_loop_to_yard(
+                    west_lane_y, east_lane_y, self._east_edge_x - 1, yard_in_coord
+                )
             )
-            path_local.append(buffer_coord)
             return path_local
 
-        cache_key = ("qc_to_buffer", QC_name, buffer_coord.x, buffer_coord.y)
+        cache_key = ("qc_to_yard", QC_name, yard_name, west_lane_y, east_lane_y)
         return self._build_path_with_cache(cache_key, build)
 
+    def get_path_from_yard_to_QC(
+        self, yard_name: str, QC_name: str
+    ) -> List[Coordinate]:
+        """
+        Generates a path from a yard OUT area's coordinate to a Quay Crane (QC) input coordinate.
+
+        The path follows this route:
+        1. Starts at the yard OUT coordinate.
+        2. Moves east along the highway lane (y = 12) towards the second-to-right boundary.
+        3. Moves north to the Highway Left lane (y = 7).
+        4. Travels west along the highway left lane to the left boundary (x = 1).
+        5. Moves north to the upper lane (y = 4).
+        6. Travels east to the IN coordinate of the specified QC.
+
+        Args:
+            yard_name (str): The name of the yard from which the path starts.
+            QC_name (str): The name of the Quay Crane to which the path should lead.
+
+        Returns:
+            List[Coordinate]: A list of coordinates representing the path from the yard to the QC.
+        """
+
+        def build() -> List[Coordinate]:
+            yard_out_coord = self.sector_map_snapshot.get_yard_sector(
+                yard_name
+            ).out_coord
+            QC_in_coord = self.sector_map_snapshot.get_QC_sector(QC_name).in_coord
+            path_local = [yard_out_coord]
+            highway_lane_y = self._eastbound_lanes[-1]
+            path_local.extend(
+                [
+                    Coordinate(x, highway_lane_y)
+                    for x in range(yard_out_coord.x, self._climb_x + 1, 1)
+                ]
+            )
+            up_path_x = self._climb_x
+            first_west_lane_y = self._westbound_lanes[0]
+            path_local.extend(
+                [
+                    Coordinate(up_path_x, y)
+                    for y in range(highway_lane_y - 1, first_west_lane_y - 1, -1)
+                ]
+            )
+            highway_lane_y = first_west_lane_y
+            path_local.extend(
+                [Coordinate(x, highway_lane_y) for x in range(self._climb_x - 1, 0, -1)]
+            )
+            up_path_x = 1
+            path_local.extend([Coordinate(up_path_x, y) for y in range(6, 3, -1)])
+            qc_travel_lane_y = 4
+            path_local.extend(
+                [
+                    Coordinate(x, qc_travel_lane_y)
+                    for x in range(2, QC_in_coord.x + 1, 1)
+                ]
+            )
+            path_local.append(QC_in_coord)
+            return path_local
+
+        cache_key = ("yard_to_qc", yard_name, QC_name)
+        return self._build_path_with_cache(cache_key, build)
+
+    def get_path_from_buffer_to_buffer(
+        self, buffer_coord: Coordinate, target_coord: Coordinate
+    ) -> List[Coordinate]:
+        """
+        Generates a path between two buffer locations, for an idle HT repositioning.
+
+        The buffer lane only allows north/south moves, so the path:
+        1. Moves south to the westbound highway lane (y = 7) to go west, or north to
+           the eastbound QC travel lane (y = 5) to go east.
+        2. Travels along that lane to the target column and moves back to the buffer.
+
+        Args:
+            buffer_coord (Coordinate): The starting coordinate in the buffer zone.
+            target_coord (Coordinate): The destination coordinate in the buffer zone.
+
+        Returns:
+            List[Coordinate]: A list of coordinates representing the path between the buffer locations.
+        """
+
+        def build() -> List[Coordinate]:
+            if target_coord.x < buffer_coord.x:
+                lane_y, step = self._westbound_lanes[0], -1
+            else:
+                lane_y, step = 5, 1
+            path_local = [
+                Coordinate(x, lane_y)
+                for x in range(buffer_coord.x, target_coord.x + step, step)
+            ]
+            path_local.append(target_coord)
+            return path_local
+
+        cache_key = (
+            "buffer_to_buffer",
+            buffer_coord.x,
+            buffer_coord.y,
+            target_coord.x,
+            target_coord.y,
+        )
+        return self._build_path_with_cache(cache_key, build)
+
+    def get_path_from_yard_to_yard(
+        self, from_yard_name: str, to_yard_name: str
+    ) -> List[Coordinate]:
+        """
+        Generates a path from a yard OUT area's coordinate to another yard's IN coordinate.
+
+        The path follows this route:
+        1. Starts at the OUT coordinate of the first yard.
+        2. Moves east along the highway lane (y = 12); if the second yard lies ahead,
+           drives on to its IN coordinate.
+        3. Otherwise loops back: north on x = 41 to a westbound lane (y = 11), west to
+           the left boundary (x = 1), south to an eastbound lane (y = 12) and east to
+           the second yard (see ``select_lanes_to_yard``).
+
+        Args:
+            from_yard_name (str): The name of the yard from which the path starts.
+            to_yard_name (str): The name of the yard to which the path should lead.
+
+        Returns:
+            List[Coordinate]: A list of coordinates representing the path between the yards.
+        """
+        west_lane_y, east_lane_y = self.select_lanes_to_yard()
+
+        def build() -> List[Coordinate]:
+            yard_out_coord = self.sector_map_snapshot.get_yard_sector(
+                from_yard_name
+            ).out_coord
+            yard_in_coord = self.sector_map_snapshot.get_yard_sector(
+                to_yard_name
+            ).in_coord
+            path_local = [yard_out_coord]
+            highway_lane_y = self._eastbound_lanes[-1]
+            if yard_in_coord.x > yard_out_coord.x:
+                path_local.extend(
+                    [
+                        Coordinate(x, highway_lane_y)
+                        for x in range(yard_out_coord.x, yard_in_coord.x + 1, 1)
+                    ]
+                )
+                path_local.append(yard_in_coord)
+                return path_local
+            path_local.extend(
+                [
+                    Coordinate(x, highway_lane_y)
+                    for x in range(yard_out_coord.x, self._climb_x + 1, 1)
+                ]
+            )
+            up_path_x = self._climb_x
+            path_local.extend(
+                [
+                    Coordinate(up_path_x, y)
+                    for y in range(highway_lane_y - 1, west_lane_y - 1, -1)
+                ]
+            )
+            path_local.extend(
+                self._get_loop_to_yard(
+                    west_lane_y, east_lane_y, self._climb_x - 1, yard_in_coord
+                )
+            )
+            return path_local
+
+        cache_key = (
+            "yard_to_yard",
+            from_yard_name,
+            to_yard_name,
+            west_lane_y,
+            east_lane_y,
+        )
+        return self._build_path_with_cache(cache_key, build)
+
+    def _get_loop_to_yard(
+        self,
+        west_lane_y: int,
+        east_lane_y: int,
+        start_x: int,
+        yard_in_coord: Coordinate,
+    ) -> List[Coordinate]:
+        """West along ``west_lane_y`` from ``start_x`` to x = 1, south to
+        ``east_lane_y``, east to the yard and south to its IN coordinate."""
+        path_local = [Coordinate(x, west_lane_y) for x in range(start_x, 0, -1)]
+        turn_x = 1
+        path_local.extend(
+            [Coordinate(turn_x, y) for y in range(west_lane_y + 1, east_lane_y + 1, 1)]
+        )
+        path_local.extend(
+            [Coordinate(x, east_lane_y) for x in range(2, yard_in_coord.x + 1, 1)]
+        )
+        path_local.extend(
+            [
+                Coordinate(yard_in_coord.x, y)
+                for y in range(east_lane_y + 1, self._yard_y, 1)
+            ]
+        )
+        path_local.append(yard_in_coord)
+        return path_local
+
+    def _get_climb_to_buffer(
+        self, west_lane_y: int, buffer_coord: Coordinate
+    ) -> List[Coordinate]:
+        """North from ``west_lane_y`` to the buffer coordinate, in its column."""
+        path_local = [
+            Coordinate(buffer_coord.x, y)
+            for y in range(west_lane_y - 1, buffer_coord.y, -1)
+        ]
+        path_local.append(buffer_coord)
+        return path_local
+
     def _build_path_with_cache(
         self,
         cache_key: Tuple,
@@ -933,7 +2134,7 @@ class JobPlanner:
     def _corridor_side_from_coordinate(self, coord: Coordinate) -> Optional[str]:
         if coord is None:
             return None
-        return "west" if coord.x <= self._CORRIDOR_SPLIT_X else "east"
+        return "west" if coord.x <= self._corridor_split_x else "east"
 
     def _diverse_seed_choice(
         self, job_info: Dict[str, object], options: Sequence[str]
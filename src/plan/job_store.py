@@ -0,0 +1,95 @@
+from typing import Dict, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+from src.job import JOB_SEQ_NUMBER_BITS, Job
+from src.scenario import NO_YARD, CompiledScenario
+
+
+class JobStore(Mapping[int, Job]):
+    """
+    Jobs of a compiled scenario keyed by job ID, read from its memory-mapped records.
+
+    The records are not copied: a ``Job`` is built from its record the first time it
+    is looked up and kept from then on, as job statuses live on the ``Job``. Only the
+    sorted job IDs (8 bytes per job) are held in memory besides the jobs built so far.
+
+    Parameters
+    ----------
+    scenario : CompiledScenario
+        The compiled job manifest.
+    """
+
+    def __init__(self, scenario: CompiledScenario):
+        self.__scenario: CompiledScenario = scenario
+        records = scenario.records
+        QC_numbers = np.array(
+            [int(QC_name[2:]) for QC_name in scenario.QC_names], dtype=np.int64
+        )
+        job_ids = (QC_numbers[records["QC"]] << JOB_SEQ_NUMBER_BITS) | records[
+            "seq_number"
+        ].astype(np.int64)
+        self.__order: np.ndarray = np.argsort(job_ids, kind="stable")
+        self.__sorted_job_ids: np.ndarray = job_ids[self.__order]
+        self.__jobs: Dict[int, Job] = dict()
+
+    def __len__(self) -> int:
+        return len(self.__sorted_job_ids)
+
+    def __iter__(self) -> Iterator[int]:
+        # manifest order, as a dict built from the CSV
+        for index in np.argsort(self.__order, kind="stable"):
+            yield int(self.__sorted_job_ids[index])
+
+    def __contains__(self, job_id) -> bool:
+        return self.__find(job_id) is not None
+
+    def __getitem__(self, job_id: int) -> Job:
+        job = self.__jobs.get(job_id)
+        if job is not None:
+            return job
+        position = self.__find(job_id)
+        if position is None:
+            raise KeyError(job_id)
+        job = self.__make_job(self.__scenario.records[self.__order[position]])
+        self.__jobs[job_id] = job
+        return job
+
+    def __find(self, job_id) -> Optional[int]:
+        if not isinstance(job_id, (int, np.integer)):
+            return None
+        position = int(np.searchsorted(self.__sorted_job_ids, job_id))
+        if (position == len(self.__sorted_job_ids)) or (
+            self.__sorted_job_ids[position] != job_id
+        ):
+            return None
+        return position
+
+    def __make_job(self, record) -> Job:
+        scenario = self.__scenario
+        yard_names = scenario.yard_names
+        QC_name = scenario.QC_names[record["QC"]]
+        alt_yard_names: List[str] = [
+            yard_names[code] for code in record["alt_yards"] if code != NO_YARD
+        ]
+        return Job(
+            job_ID=record["job_ID"].decode(),
+            job_type=scenario.job_types[record["job_type"]],
+            container_number=record["container_number"].decode(),
+            QC_name=QC_name,
+            QC_job_sequence=scenario.format_job_seq(
+                record["QC"], int(record["seq_number"])
+            ),
+            yard_name=yard_names[record["yard"]],
+            alt_yard_names=alt_yard_names,
+        )
+
+    def get_last_seq_numbers(self) -> Dict[str, int]:
+        """Sequence number of the last job of every QC with jobs."""
+        records = self.__scenario.records
+        last_seq_numbers = np.zeros(len(self.__scenario.QC_names), dtype=np.int64)
+        np.maximum.at(last_seq_numbers, records["QC"], records["seq_number"])
+        return {
+            QC_name: int(last_seq_numbers[code])
+            for code, QC_name in enumerate(self.__scenario.QC_names)
+        }
@@ -1,186 +1,256 @@
-from typing import Dict, List, Tuple
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Union
 
 import pandas as pd
 from logzero import logger
 
 from src.constant import CONSTANT
-from src.job import Job, Status
-
-
-def parse_job_seq(job_seq: str) -> Tuple[str, int]:
-    QC_name, seq_number = job_seq.split("_")
-    seq_number = int(seq_number)
-    return QC_name, seq_number
+from src.job import (
+    Job,
+    Status,
+    format_job_seq,
+    get_QC_number,
+    get_seq_number,
+    make_job_id,
+)
+from src.plan.job_store import JobStore
+from src.scenario import CompiledScenario, CSVJobStream
 
 
 class JobTracker:
     """
-    Tracks and manages jobs parsed from a pandas.DataFrame, maintaining mappings between job sequences and job instances,
-    as well as tracking the latest completed job sequence per QC unit.
+    Tracks and manages jobs parsed from a pandas.DataFrame, maintaining mappings between job IDs and job instances,
+    as well as tracking the latest completed job sequence number per QC unit.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        A DataFrame containing job input data to be parsed into Job instances.
+    df : pd.DataFrame, CompiledScenario or CSVJobStream
+        A DataFrame containing job input data to be parsed into Job instances, a
+        compiled scenario whose memory-mapped records back the jobs (see ``JobStore``),
+        or a CSV manifest streamed QC by QC.
 
     Attributes
     ----------
-    job_sequence_map : Dict[str, Job]
-        A dictionary mapping job sequence identifiers (strings) to their corresponding Job objects.
-    qc_latest_completed_job_seq_map : Dict[str, Optional[str]]
-        A dictionary mapping QC unit names to the latest completed job sequence identifier.
-        Initialized with None values for each QC name.
+    job_sequence_map : Mapping[int, Job]
+        A dictionary mapping job IDs (packed QC job sequences, see ``src.job.make_job_id``)
+        to their corresponding Job objects (a ``JobStore`` for a compiled scenario).
+        For a streamed manifest, only the jobs read and not retired yet: a QC's jobs are
+        read as it gets to them (see ``get_next_n_job_sequences``), and retired once
+        completed in sequence (see ``pop_retired_job_report``).
+    qc_latest_completed_seq_number_map : Dict[str, int]
+        A dictionary mapping QC unit names to the sequence number of the latest completed job.
+        Initialized with 0 (no job completed) for each QC name.
+    qc_last_seq_number_map : Dict[str, int]
+        A dictionary mapping QC unit names to the sequence number of their last job
+        (0 for a QC without jobs), e.g. 2500 for each QC of the default manifest.
     """
 
-    def __init__(self, df: pd.DataFrame):
-        self.job_sequence_map: Dict[str, Job] = self.__parse_input_to_jobs(df)
-        self.qc_latest_completed_job_seq_map: Dict[str, str] = {
-            QC_name: None for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES
+    def __init__(self, df: Union[pd.DataFrame, CompiledScenario, CSVJobStream]):
+        self.qc_latest_completed_seq_number_map: Dict[str, int] = {
+            QC_name: 0 for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES
         }
+        self.qc_last_seq_number_map: Dict[str, int] = {
+            QC_name: 0 for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES
+        }
+        self.__job_stream: Optional[CSVJobStream] = None
+        self.__qc_loaded_seq_number_map: Dict[str, int] = dict()
+        self.__retired_jobs: List[Job] = list()
+        if isinstance(df, (CompiledScenario, CSVJobStream)):
+            if isinstance(df, CompiledScenario):
+                self.job_sequence_map: Mapping[int, Job] = JobStore(df)
+                last_seq_numbers = self.job_sequence_map.get_last_seq_numbers()
+            else:
+                self.__job_stream = df
+                self.job_sequence_map: Mapping[int, Job] = dict()
+                last_seq_numbers = df.last_seq_numbers
+            for QC_name, seq_number in last_seq_numbers.items():
+                if QC_name in self.qc_last_seq_number_map:
+                    self.qc_last_seq_number_map[QC_name] = seq_number
+            return
 
-    def __parse_input_to_jobs(self, df: pd.DataFrame) -> List[Job]:
+        self.job_sequence_map: Mapping[int, Job] = self.__parse_input_to_jobs(df)
+        for job_id in self.job_sequence_map:
+            QC_name = f"QC{get_QC_number(job_id)}"
+            if QC_name in self.qc_last_seq_number_map:
+                self.qc_last_seq_number_map[QC_name] = max(
+                    self.qc_last_seq_number_map[QC_name], get_seq_number(job_id)
+                )
+
+    def __parse_input_to_jobs(self, df: pd.DataFrame) -> Dict[int, Job]:
         job_sequence_map = dict()
         for index, row in df.iterrows():
-            alt_yard_names = []
-            if row["ALT_YARD_BLOCK_1"] != "":
-                alt_yard_names = [
-                    row["ALT_YARD_BLOCK_1"],
-                    row["ALT_YARD_BLOCK_2"],
-                    row["ALT_YARD_BLOCK_3"],
-                ]
-            job = Job(
-                job_ID=row["JOB_ID"],
-                job_type=row["JOB_TYPE"],
-                container_number=row["CONTAINER_NO"],
-                QC_name=row["QC_M"],
-                QC_job_sequence=row["QC_JOB_SEQ"],
-                yard_name=row["YARD_BLOCK"],
-                alt_yard_names=alt_yard_names,
-            )
-            job_sequence_map[row["QC_JOB_SEQ"]] = job
+            job = self.__make_job(row)
+            job_sequence_map[job.get_job_id()] = job
 
         return job_sequence_map
 
+    @staticmethod
+    def __make_job(row: Mapping[str, Any]) -> Job:
+        alt_yard_names = []
+        # an LO job has none: pandas reads the empty cells as NaN, the stream as ""
+        if pd.notna(row["ALT_YARD_BLOCK_1"]) and row["ALT_YARD_BLOCK_1"] != "":
+            alt_yard_names = [
+                row["ALT_YARD_BLOCK_1"],
+                row["ALT_YARD_BLOCK_2"],
+                row["ALT_YARD_BLOCK_3"],
+            ]
+        return Job(
+            job_ID=row["JOB_ID"],
+            job_type=row["JOB_TYPE"],
+            container_number=row["CONTAINER_NO"],
+            QC_name=row["QC_M"],
+            QC_job_sequence=row["QC_JOB_SEQ"],
+            yard_name=row["YARD_BLOCK"],
+            alt_yard_names=alt_yard_names,
+        )
+
+    def __load_jobs(self, QC_name: str, seq_number: int):
+        """Read the streamed jobs of the QC up to ``seq_number``."""
+        loaded_seq_number = self.__qc_loaded_seq_number_map.get(QC_name, 0)
+        reader = self.__job_stream.get_reader(QC_name)
+        while loaded_seq_number < seq_number:
+            row = next(reader, None)
+            if row is None:
+                break
+            job = self.__make_job(row)
+            self.job_sequence_map[job.get_job_id()] = job
+            loaded_seq_number = get_seq_number(job.get_job_id())
+        self.__qc_loaded_seq_number_map[QC_name] = loaded_seq_number
+
+    def is_streaming(self) -> bool:
+        """Whether jobs are streamed, i.e. only part of the manifest is in memory."""
+        return self.__job_stream is not None
+
+    def get_number_of_jobs(self) -> int:
+        if self.__job_stream is not None:
+            return len(self.__job_stream)
+        return len(self.job_sequence_map)
+
     def fetch_and_update_job_status(self):
         # for each QC, update their plannable jobs to completed (if applicable)
         for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES:
-            next_ten_job_seqs = self.get_next_n_job_sequences(
+            next_ten_job_ids = self.get_next_n_job_sequences(
                 QC_name=QC_name,
                 number_of_jobs=10,
             )
-            for job_seq in next_ten_job_seqs:
-                job = self.get_job(job_seq)
+            for job_id in next_ten_job_ids:
+                job = self.get_job(job_id)
                 job_status = job.get_job_info()["job_status"]
                 if (job_status == Status.COMPLETED) and (
-                    self.is_next_to_latest_completed_job(job_seq)
+                    self.is_next_to_latest_completed_job(QC_name, job_id)
                 ):
-                    self.update_latest_completed_job_seq(QC_name, job_seq)
+                    self.update_latest_completed_job_seq(QC_name, job_id)
                     logger.info(
-                        f"Updated latest completed job for {QC_name}: {job_seq}"
+                        f"Updated latest completed job for {QC_name}: {format_job_seq(job_id)}"
                     )
                 else:
                     break
 
     def get_next_n_job_sequences(
         self, QC_name: str, number_of_jobs: int = 10
-    ) -> List[str]:
-        latest_completed_job_seq = self.qc_latest_completed_job_seq_map.get(
-            QC_name, None
+    ) -> List[int]:
+        latest_seq_number = self.qc_latest_completed_seq_number_map.get(QC_name, 0)
+        last_possible_seq_number = self.qc_last_seq_number_map.get(QC_name, 0)
+        candidate_seq_numbers = range(
+            latest_seq_number + 1,
+            min(latest_seq_number + number_of_jobs, last_possible_seq_number) + 1,
         )
-        last_possible_seq_number = 2500
-        # if there is at least one job completed
-        if latest_completed_job_seq:
-            latest_job_seq = int(latest_completed_job_seq.split("_")[1])
-            candidate_seq_numbers = [
-                latest_job_seq + i for i in range(1, number_of_jobs + 1, 1)
-            ]
-            candidate_job_seqs = [
-                f"{QC_name}_{seq_number:04d}"
-                for seq_number in candidate_seq_numbers
-                if seq_number <= last_possible_seq_number
-            ]
-
-        # no job completed yet
-        else:
-            candidate_job_seqs = [
-                f"{QC_name}_{i:04d}" for i in range(1, number_of_jobs + 1, 1)
-            ]
-        return candidate_job_seqs
+        if (self.__job_stream is not None) and candidate_seq_numbers:
+            self.__load_jobs(QC_name, candidate_seq_numbers[-1])
+        return [
+            make_job_id(QC_name, seq_number) for seq_number in candidate_seq_numbers
+        ]
 
-    def update_latest_completed_job_seq(self, QC_name: str, job_seq: str):
+    def update_latest_completed_job_seq(self, QC_name: str, job_id: int):
         if QC_name not in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES:
             raise ValueError(f"{QC_name} not in QC list.")
 
-        self.qc_latest_completed_job_seq_map[QC_name] = job_seq
+        seq_number = get_seq_number(job_id)
+        previous_seq_number = self.qc_latest_completed_seq_number_map[QC_name]
+        self.qc_latest_completed_seq_number_map[QC_name] = seq_number
+        if self.__job_stream is not None:
+            self.__retired_jobs.extend(
+                self.job_sequence_map.pop(make_job_id(QC_name, retired_seq_number))
+                for retired_seq_number in range(previous_seq_number + 1, seq_number + 1)
+            )
 
-    def is_next_to_latest_completed_job(self, job_seq: str) -> bool:
-        QC_name, seq_number = parse_job_seq(job_seq)
-        latest_completed_job_seq = self.qc_latest_completed_job_seq_map.get(
-            QC_name, None
-        )
-        if latest_completed_job_seq:
-            _, latest_seq_number = parse_job_seq(latest_completed_job_seq)
-            if latest_seq_number + 1 == seq_number:
-                return True
-            else:
-                return False
-        return seq_number == 1
+    def is_next_to_latest_completed_job(self, QC_name: str, job_id: int) -> bool:
+        latest_seq_number = self.qc_latest_completed_seq_number_map.get(QC_name, 0)
+        return latest_seq_number + 1 == get_seq_number(job_id)
 
-    def get_plannable_job_sequences(self):
-        # get QC jobs seq that is 10-step ahead from current completed one
-        ahead_job_seqs = list()
+    def get_plannable_job_sequences(self) -> List[int]:
+        # get QC job IDs that are 10-step ahead from current completed one
+        ahead_job_ids = list()
         for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES:
             next_ten_jobs = self.get_next_n_job_sequences(
                 QC_name=QC_name,
                 number_of_jobs=10,
             )
-            ahead_job_seqs.extend(next_ten_jobs)
+            ahead_job_ids.extend(next_ten_jobs)
 
         # filter out those have been planned (in previous iteration)
-        plannable_job_seqs = list()
-        for job_seq in ahead_job_seqs:
-            job = self.get_job(job_seq)
+        plannable_job_ids = list()
+        for job_id in ahead_job_ids:
+            job = self.get_job(job_id)
             job_info = job.get_job_info()
             if job_info["job_status"] == Status.NOT_PLANNED:
-                plannable_job_seqs.append(job_seq)
+                plannable_job_ids.append(job_id)
 
-        return plannable_job_seqs
+        return plannable_job_ids
 
     def is_all_job_completed(self):
-        for (
-            QC_name,
-            latest_completed_job_seq,
-        ) in self.qc_latest_completed_job_seq_map.items():
-            last_possible_job_seq = f"{QC_name}_2500"
-            if last_possible_job_seq != latest_completed_job_seq:
+        for QC_name, last_seq_number in self.qc_last_seq_number_map.items():
+            if self.qc_latest_completed_seq_number_map[QC_name] != last_seq_number:
                 return False
 
         return True
 
-    def get_number_of_completed_jobs(self) -> Dict[str, int]:
-        total_completed_jobs = 0
-        for (
-            QC_name,
-            latest_completed_job_seq,
-        ) in self.qc_latest_completed_job_seq_map.items():
-            # when no job completed yet
-            if latest_completed_job_seq is None:
-                continue
-            # when at least one job completed
-            else:
-                # here we only take latest completed job that follow SEQUENCE
-                # it could be higher, but I concluded the mismatch is negligible
-                latest_job_seq = int(latest_completed_job_seq.split("_")[1])
-                total_completed_jobs += latest_job_seq
+    def get_number_of_completed_jobs(self) -> int:
+        # here we only take latest completed job that follow SEQUENCE
+        # it could be higher, but I concluded the mismatch is negligible
+        return sum(self.qc_latest_completed_seq_number_map.values())
 
-        return total_completed_jobs
+    def get_job(self, job_id: int):
+        return self.job_sequence_map.get(job_id, None)
 
-    def get_job(self, job_seq: str):
-        return self.job_sequence_map.get(job_seq, None)
+    def pop_retired_job_report(self) -> pd.DataFrame:
+        """
+        Report (see ``export_job_report``) of the streamed jobs retired since the last
+        call, which are then gone from the tracker.
+        """
+        retired_jobs, self.__retired_jobs = self.__retired_jobs, list()
+        return self.__make_job_report(retired_jobs)
 
     def export_job_report(self):
+        return self.__make_job_report(self.job_sequence_map.values())
+
+    def iter_unread_job_report(self, chunk_size: int = 4096) -> Iterator[pd.DataFrame]:
+        """
+        Report of the streamed jobs not read yet (never planned), ``chunk_size`` jobs
+        at a time. They are read to the end of the manifest, and not kept.
+        """
+        if self.__job_stream is None:
+            return
+        for QC_name in self.__job_stream.last_seq_numbers:
+            reader = self.__job_stream.get_reader(QC_name)
+            while True:
+                rows = list(itertools.islice(reader, chunk_size))
+                if not rows:
+                    break
+                yield self.__make_job_report([self.__make_job(row) for row in rows])
+
+    @staticmethod
+    def __make_job_report(jobs: Iterable[Job]) -> pd.DataFrame:
         data = list()
-        for job_seq, job in self.job_sequence_map.items():
-            data.append(job.get_job_info())
+        for job in jobs:
+            job_info = job.get_job_info()
+            # job IDs are internal, the report keeps QC_job_sequence
+            del job_info["job_id"]
+            data.append(job_info)
 
-        return pd.DataFrame(data=data)
+        report_df = pd.DataFrame(data=data)
+        # whole seconds, empty if not started/ended, whichever jobs this report holds
+        for column in ["start_time", "end_time"]:
+            if column in report_df:
+                report_df[column] = report_df[column].astype("Int64")
+        return report_df
@@ -0,0 +1,189 @@
+import hashlib
+import heapq
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from logzero import logger
+
+# default plan cache, under the project's data directory whatever the working directory
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache"
+
+
+class YardPrePlanner:
+    """
+    Computes a capacity-feasible yard target for every DI job of a manifest as a global
+    min-cost assignment (a transportation problem with one capacitated sink per yard).
+
+    Every job starts on its cheapest option. While a yard is over capacity, one job is
+    moved along the cheapest chain of reassignments from that yard to a yard with spare
+    capacity (successive shortest paths on the small yard-to-yard residual graph), which
+    keeps the assignment cost-optimal for the capacity already enforced.
+
+    Parameters
+    ----------
+    yard_capacity : int
+        Maximum number of DI jobs a yard can receive.
+    cost_fn : Callable[[Dict[str, object], str], float]
+        Cost of assigning a job (given its job info) to a yard.
+    cache_dir : Path, optional
+        Directory for cached plans keyed by input hash (default is ``data/cache`` of
+        the project). ``None`` disables caching.
+
+    Attributes
+    ----------
+    last_run_from_cache : bool
+        Whether the most recent call to ``plan`` was served from the cache.
+    """
+
+    def __init__(
+        self,
+        yard_capacity: int,
+        cost_fn: Callable[[Dict[str, object], str], float],
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+    ):
+        self.__yard_capacity: int = yard_capacity
+        self.__cost_fn = cost_fn
+        self.__cache_dir: Optional[Path] = cache_dir
+        self.last_run_from_cache: bool = False
+
+    def plan(
+        self, jobs: Sequence[Tuple[int, Dict[str, object], Sequence[str]]]
+    ) -> Dict[int, str]:
+        """Return a job ID -> target yard map for ``(job_id, job_info, options)`` jobs."""
+        costs = [
+            [self.__cost_fn(job_info, option) for option in options]
+            for _, job_info, options in jobs
+        ]
+        cache_path = self.__cache_path(jobs, costs)
+        if cache_path is not None and cache_path.exists():
+            with open(cache_path, "r") as f:
+                self.last_run_from_cache = True
+                # stored as pairs: JSON object keys would turn job IDs into strings
+                return {job_id: yard_name for job_id, yard_name in json.load(f)}
+
+        self.last_run_from_cache = False
+        targets = self.__solve(jobs, costs)
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(list(targets.items()), f)
+        return targets
+
+    def __cache_path(self, jobs, costs) -> Optional[Path]:
+        if self.__cache_dir is None:
+            return None
+        digest = hashlib.sha1(str(self.__yard_capacity).encode())
+        for (job_id, _, options), option_costs in zip(jobs, costs):
+            digest.update(str(job_id).encode())
+            for option, cost in zip(options, option_costs):
+                digest.update(f"|{option}:{cost:.6f}".encode())
+            digest.update(b"\n")
+        return self.__cache_dir / f"yard_preplan_{digest.hexdigest()[:16]}.json"
+
+    def __solve(self, jobs, costs) -> Dict[int, str]:
+        # job index -> option index currently assigned (cheapest first)
+        assigned: List[int] = [
+            min(range(len(option_costs)), key=lambda k: option_costs[k])
+            for option_costs in costs
+        ]
+        yard_load: Counter = Counter()
+        for job_index, (_, _, options) in enumerate(jobs):
+            yard_load[options[assigned[job_index]]] += 1
+        yards = sorted({option for _, _, options in jobs for option in options})
+
+        # (from_yard, to_yard) -> heap of (cost delta, job index); stale entries are
+        # skipped lazily when the job no longer sits on from_yard
+        move_heaps: Dict[Tuple[str, str], List[Tuple[float, int]]] = dict()
+
+        def push_moves(job_index: int):
+            options = jobs[job_index][2]
+            current = assigned[job_index]
+            for k, option in enumerate(options):
+                if k == current:
+                    continue
+                delta = costs[job_index][k] - costs[job_index][current]
+                heapq.heappush(
+                    move_heaps.setdefault((options[current], option), []),
+                    (delta, job_index),
+                )
+
+        def cheapest_move(from_yard: str, to_yard: str) -> Optional[Tuple[float, int]]:
+            heap = move_heaps.get((from_yard, to_yard))
+            while heap:
+                delta, job_index = heap[0]
+                if jobs[job_index][2][assigned[job_index]] == from_yard:
+                    return delta, job_index
+                heapq.heappop(heap)
+            return None
+
+        for job_index in range(len(jobs)):
+            push_moves(job_index)
+
+        unresolved = 0
+        while True:
+            overflowing = [y for y in yards if yard_load[y] > self.__yard_capacity]
+            if not overflowing:
+                break
+
+            # Bellman-Ford over yards from every overflowing yard at once
+            distance = {y: float("inf") for y in yards}
+            predecessor: Dict[str, Tuple[str, int]] = dict()
+            for y in overflowing:
+                distance[y] = 0.0
+            edges = list()
+            for from_yard in yards:
+                for to_yard in yards:
+                    if from_yard == to_yard:
+                        continue
+                    move = cheapest_move(from_yard, to_yard)
+                    if move is not None:
+                        edges.append((from_yard, to_yard, move[0], move[1]))
+            for _ in range(len(yards) - 1):
+                relaxed = False
+                for from_yard, to_yard, delta, job_index in edges:
+                    if distance[from_yard] + delta < distance[to_yard] - 1e-9:
+                        distance[to_yard] = distance[from_yard] + delta
+                        predecessor[to_yard] = (from_yard, job_index)
+                        relaxed = True
+                if not relaxed:
+                    break
+
+            sinks = [
+                y
+                for y in yards
+                if yard_load[y] < self.__yard_capacity and distance[y] < float("inf")
+            ]
+            if not sinks:
+                unresolved = sum(
+                    yard_load[y] - self.__yard_capacity for y in overflowing
+                )
+                break
+            sink = min(sinks, key=lambda y: (distance[y], y))
+
+            # walk the chain back and move one job along every edge of it
+            to_yard = sink
+            moved_jobs = list()
+            for _ in range(len(yards)):
+                from_yard, job_index = predecessor[to_yard]
+                options = jobs[job_index][2]
+                assigned[job_index] = options.index(to_yard)
+                yard_load[from_yard] -= 1
+                yard_load[to_yard] += 1
+                moved_jobs.append(job_index)
+                if from_yard in overflowing:
+                    break
+                to_yard = from_yard
+            for job_index in moved_jobs:
+                push_moves(job_index)
+
+        if unresolved:
+            logger.warning(
+                f"Yard pre-plan leaves {unresolved} DI jobs above yard capacity."
+            )
+
+        return {
+            job_id: options[assigned[job_index]]
+            for job_index, (job_id, _, options) in enumerate(jobs)
+        }
@@ -0,0 +1,101 @@
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, Optional
+
+from src.job import get_QC_number, get_seq_number
+
+# A job expected at a QC/yard operator: the HT driving it there, when the
+# reservation was made, the HT's estimated arrival time (revised on delays), and
+# whether the job has to reach its QC in sequence once served (QC work, LO pick-up)
+Reservation = namedtuple(
+    "Reservation", ["job_id", "HT_name", "reserved_at", "eta", "is_sequenced"]
+)
+
+
+class ReservationScheduler:
+    """
+    Arrival-time reservations on a QC or yard operator. A job holds one from the
+    moment its HT starts driving to the operator until the operator serves it, with
+    the estimated arrival time (ETA) of the HT, revised as the HT is delayed.
+
+    An operator serves its queue in booking order. With reservations, a job whose HT
+    has arrived may be served ahead of queued jobs whose HTs are still expected later
+    than ``overtake_margin`` seconds from now, so the operator does not sit idle while
+    a far-away HT drives in. A sequenced job (see ``Reservation``) never overtakes a
+    sequenced job of the same QC with a lower sequence number, since both have to
+    reach the QC in sequence; a QC queue is therefore always served in order.
+
+    Parameters
+    ----------
+    clock : Callable[[], int]
+        Current simulation time.
+    overtake_margin : int, optional
+        Seconds a queued job must still be away for others to be served ahead of it.
+
+    Attributes
+    ----------
+    number_of_overtakes : int
+        Jobs served ahead of the queue head so far.
+    """
+
+    def __init__(self, clock: Callable[[], int], overtake_margin: int = 0):
+        self.__clock: Callable[[], int] = clock
+        self.__overtake_margin: int = overtake_margin
+        self.__reservations: Dict[int, Reservation] = dict()
+        self.number_of_overtakes: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__reservations)
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self.__reservations
+
+    def get_reservation(self, job_id: int) -> Optional[Reservation]:
+        return self.__reservations.get(job_id)
+
+    def reserve(self, job_id: int, HT_name: str, eta: int, is_sequenced: bool = True):
+        self.__reservations[job_id] = Reservation(
+            job_id=job_id,
+            HT_name=HT_name,
+            reserved_at=self.__clock(),
+            eta=eta,
+            is_sequenced=is_sequenced,
+        )
+
+    def revise(self, job_id: int, eta: int) -> bool:
+        """Move the ETA of a reservation, return whether it changed."""
+        reservation = self.__reservations.get(job_id)
+        if (reservation is None) or (reservation.eta == eta):
+            return False
+        self.__reservations[job_id] = reservation._replace(eta=eta)
+        return True
+
+    def start_service(self, job_id: int, is_overtaking: bool):
+        """The operator serves the job: its reservation is fulfilled."""
+        self.__reservations.pop(job_id, None)
+        if is_overtaking:
+            self.number_of_overtakes += 1
+
+    def may_serve(self, job_id: int, queue: Iterable[int]) -> bool:
+        """
+        Whether the job, whose HT is at the operator, may be served before the jobs
+        ahead of it in ``queue``.
+        """
+        latest_eta = self.__clock() + self.__overtake_margin
+        own_reservation = self.__reservations.get(job_id)
+        is_sequenced = (own_reservation is None) or own_reservation.is_sequenced
+        QC_number, seq_number = get_QC_number(job_id), get_seq_number(job_id)
+        for queued_job_id in queue:
+            if queued_job_id == job_id:
+                return True
+            # jobs not on their way yet may be close: keep their turn
+            reservation = self.__reservations.get(queued_job_id)
+            if (reservation is None) or (reservation.eta <= latest_eta):
+                return False
+            if (
+                is_sequenced
+                and reservation.is_sequenced
+                and (get_QC_number(queued_job_id) == QC_number)
+                and (get_seq_number(queued_job_id) < seq_number)
+            ):
+                return False
+        return False
@@ -0,0 +1,332 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from logzero import logger
+
+# Compiled scenario: a job manifest as fixed-width binary records, memory-mapped at
+# load time. The file holds MAGIC, the length of a JSON header (8 bytes, little
+# endian), the header padded so records start on a RECORD_ALIGNMENT boundary, then
+# one record per job in manifest order. QC, yard and job type are codes into the
+# name tables of the header; an unused alternative yard is -1.
+SCENARIO_SUFFIX = ".scn"
+MAGIC = b"PSA-SCN1"
+RECORD_ALIGNMENT = 64
+NO_YARD = -1
+NUMBER_OF_ALT_YARDS = 3
+ALT_YARD_COLUMNS = ["ALT_YARD_BLOCK_1", "ALT_YARD_BLOCK_2", "ALT_YARD_BLOCK_3"]
+
+
+def make_record_dtype(job_ID_width: int, container_number_width: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("job_type", np.uint8),
+            ("QC", np.uint16),
+            ("seq_number", np.uint32),
+            ("yard", np.int16),
+            ("alt_yards", np.int16, (NUMBER_OF_ALT_YARDS,)),
+            ("job_ID", f"S{job_ID_width}"),
+            ("container_number", f"S{container_number_width}"),
+        ]
+    )
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_compiled_path(csv_path: Union[str, Path]) -> Path:
+    """Where the compiled scenario of a CSV manifest is kept by default."""
+    return Path(csv_path).with_suffix(SCENARIO_SUFFIX)
+
+
+class CompiledScenario:
+    """
+    A compiled job manifest, memory-mapped read-only (see ``compile_scenario``).
+
+    Parameters
+    ----------
+    path : str or Path
+        The compiled scenario file.
+
+    Attributes
+    ----------
+    records : np.memmap
+        One record per job, in manifest order (see ``make_record_dtype``).
+    job_types : List[str]
+        Job type of each code, e.g. ``["DI", "LO"]``.
+    QC_names : List[str]
+        QC name of each code.
+    yard_names : List[str]
+        Yard name of each code.
+    seq_width : int
+        Digits of the sequence number in QC job sequences, e.g. 4 for QC1_0001.
+    source_sha1 : str
+        SHA-1 of the CSV manifest it was compiled from.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        header, offset = self.__read_header(self.path)
+        self.job_types: List[str] = header["job_types"]
+        self.QC_names: List[str] = header["QC_names"]
+        self.yard_names: List[str] = header["yard_names"]
+        self.seq_width: int = header["seq_width"]
+        self.source_sha1: str = header["source_sha1"]
+        dtype = make_record_dtype(
+            header["job_ID_width"], header["container_number_width"]
+        )
+        number_of_jobs = header["number_of_jobs"]
+        # np.memmap cannot map an empty range
+        self.records: np.ndarray = (
+            np.memmap(
+                self.path, dtype=dtype, mode="r", offset=offset, shape=(number_of_jobs,)
+            )
+            if number_of_jobs
+            else np.empty(0, dtype=dtype)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def __read_header(path: Path) -> Tuple[Dict, int]:
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled scenario.")
+            header_length = int.from_bytes(file.read(8), "little")
+            header = json.loads(file.read(header_length))
+        return header, header["record_offset"]
+
+    def format_job_seq(self, QC_code: int, seq_number: int) -> str:
+        return f"{self.QC_names[QC_code]}_{seq_number:0{self.seq_width}d}"
+
+
+def compile_scenario(
+    csv_path: Union[str, Path],
+    output_path: Optional[Union[str, Path]] = None,
+    chunk_size: int = 65536,
+) -> Path:
+    """
+    Compile a CSV job manifest to the binary scenario format and return its path
+    (next to the CSV by default).
+
+    The CSV is read twice, in ``chunk_size`` rows at a time: once for the name tables
+    and field widths, once to write the records, so memory stays bounded. The file is
+    written to a temporary name first and moved into place, so concurrent runs never
+    see a partial scenario.
+    """
+    csv_path = Path(csv_path)
+    output_path = Path(output_path) if output_path else get_compiled_path(csv_path)
+    job_types: Dict[str, int] = dict()
+    QC_names: Dict[str, int] = dict()
+    yard_names: Dict[str, int] = dict()
+    job_ID_width = container_number_width = 1
+    seq_width = None
+    number_of_jobs = 0
+    with open(csv_path, newline="") as file:
+        for row in csv.DictReader(file):
+            job_types.setdefault(row["JOB_TYPE"], len(job_types))
+            QC_names.setdefault(row["QC_M"], len(QC_names))
+            for yard_name in [row["YARD_BLOCK"]] + [row[c] for c in ALT_YARD_COLUMNS]:
+                if yard_name:
+                    yard_names.setdefault(yard_name, len(yard_names))
+            job_ID_width = max(job_ID_width, len(row["JOB_ID"]))
+            container_number_width = max(
+                container_number_width, len(row["CONTAINER_NO"])
+            )
+            seq_digits = row["QC_JOB_SEQ"].split("_")[1]
+            seq_width = len(seq_digits) if seq_width is None else seq_width
+            if row["QC_JOB_SEQ"] != f"{row['QC_M']}_{int(seq_digits):0{seq_width}d}":
+                raise ValueError(
+                    f"QC job sequence {row['QC_JOB_SEQ']} does not match "
+                    f"{row['QC_M']}_<{seq_width}-digit sequence number>."
+                )
+            number_of_jobs += 1
+
+    dtype = make_record_dtype(job_ID_width, container_number_width)
+    header = {
+        "number_of_jobs": number_of_jobs,
+        "job_types": list(job_types),
+        "QC_names": list(QC_names),
+        "yard_names": list(yard_names),
+        "seq_width": seq_width or 4,
+        "job_ID_width": job_ID_width,
+        "container_number_width": container_number_width,
+        "source_sha1": hash_file(csv_path),
+    }
+    # the offset is part of the header: fix its width before measuring the header
+    header["record_offset"] = 10**9
+    header_length = len(json.dumps(header).encode())
+    record_offset = (
+        -(-(len(MAGIC) + 8 + header_length) // RECORD_ALIGNMENT) * RECORD_ALIGNMENT
+    )
+    header["record_offset"] = record_offset
+    header_bytes = json.dumps(header).encode().ljust(header_length)
+
+    temporary_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    with open(csv_path, newline="") as source, open(temporary_path, "wb") as target:
+        target.write(MAGIC + len(header_bytes).to_bytes(8, "little") + header_bytes)
+        target.write(b"\0" * (record_offset - target.tell()))
+        chunk = np.zeros(chunk_size, dtype=dtype)
+        size = 0
+        for row in csv.DictReader(source):
+            record = chunk[size]
+            record["job_type"] = job_types[row["JOB_TYPE"]]
+            record["QC"] = QC_names[row["QC_M"]]
+            record["seq_number"] = int(row["QC_JOB_SEQ"].split("_")[1])
+            record["yard"] = yard_names[row["YARD_BLOCK"]]
+            record["alt_yards"] = [
+                yard_names[row[c]] if row[c] else NO_YARD for c in ALT_YARD_COLUMNS
+            ]
+            record["job_ID"] = row["JOB_ID"].encode()
+            record["container_number"] = row["CONTAINER_NO"].encode()
+            size += 1
+            if size == chunk_size:
+                target.write(chunk.tobytes())
+                size = 0
+        target.write(chunk[:size].tobytes())
+    os.replace(temporary_path, output_path)
+    return output_path
+
+
+def find_compiled_scenario(csv_path: Union[str, Path]) -> Optional[CompiledScenario]:
+    """The compiled scenario next to a CSV manifest, if it is up to date with it."""
+    compiled_path = get_compiled_path(csv_path)
+    if not compiled_path.exists():
+        return None
+    try:
+        scenario = CompiledScenario(compiled_path)
+    except (ValueError, KeyError, OSError):
+        return None
+    if scenario.source_sha1 != hash_file(csv_path):
+        return None
+    return scenario
+
+
+class CSVJobStream:
+    """
+    A CSV job manifest read lazily, QC by QC, so that memory stays bounded however
+    large the manifest is (see ``JobTracker``).
+
+    A first pass over the file records the number of jobs, the sequence number of the
+    last job and the byte range of the rows of every QC. The rows of a QC are then read
+    on demand from that range, ``chunk_size`` lines at a time, each QC with its own
+    file handle. The rows of a QC must be in sequence order, as in every manifest.
+
+    Parameters
+    ----------
+    path : str or Path
+        The CSV job manifest.
+    chunk_size : int, optional
+        Lines read at a time by each QC.
+
+    Attributes
+    ----------
+    last_seq_numbers : Dict[str, int]
+        Sequence number of the last job of every QC with jobs.
+    """
+
+    def __init__(self, path: Union[str, Path], chunk_size: int = 4096):
+        self.path = Path(path)
+        self.chunk_size: int = chunk_size
+        self.last_seq_numbers: Dict[str, int] = dict()
+        self.__number_of_jobs: int = 0
+        self.__row_ranges: Dict[str, Tuple[int, int]] = dict()
+        self.__readers: Dict[str, Iterator[Dict[str, str]]] = dict()
+        self.__columns: List[str] = list()
+        self.__index_rows()
+
+    def __len__(self) -> int:
+        return self.__number_of_jobs
+
+    @staticmethod
+    def __split(line: bytes) -> List[str]:
+        text = line.decode().rstrip("\r\n")
+        return next(csv.reader([text])) if '"' in text else text.split(",")
+
+    def __index_rows(self):
+        with open(self.path, "rb") as file:
+            header = file.readline()
+            self.__columns = self.__split(header)
+            QC_column = self.__columns.index("QC_M")
+            seq_column = self.__columns.index("QC_JOB_SEQ")
+            offset = len(header)
+            for line in file:
+                if line.strip():
+                    values = self.__split(line)
+                    QC_name = values[QC_column]
+                    seq_number = int(values[seq_column].split("_")[1])
+                    if seq_number <= self.last_seq_numbers.get(QC_name, 0):
+                        raise ValueError(
+                            f"{values[seq_column]} of {self.path} is not in sequence."
+                        )
+                    self.last_seq_numbers[QC_name] = seq_number
+                    start, _ = self.__row_ranges.get(QC_name, (offset, None))
+                    self.__row_ranges[QC_name] = (start, offset + len(line))
+                    self.__number_of_jobs += 1
+                offset += len(line)
+
+    def __read_rows(self, QC_name: str) -> Iterator[Dict[str, str]]:
+        if QC_name not in self.__row_ranges:
+            return
+        start, end = self.__row_ranges[QC_name]
+        QC_column = self.__columns.index("QC_M")
+        with open(self.path, "rb") as file:
+            file.seek(start)
+            offset = start
+            while offset < end:
+                lines = list(itertools.islice(file, self.chunk_size))
+                if not lines:
+                    return
+                for line in lines:
+                    if offset >= end:
+                        return
+                    offset += len(line)
+                    values = self.__split(line)
+                    if line.strip() and values[QC_column] == QC_name:
+                        yield dict(zip(self.__columns, values))
+
+    def get_reader(self, QC_name: str) -> Iterator[Dict[str, str]]:
+        """
+        Rows of the QC, as dicts keyed by column, in sequence order. Every call
+        returns the same iterator: it goes on from the last row read.
+        """
+        if QC_name not in self.__readers:
+            self.__readers[QC_name] = self.__read_rows(QC_name)
+        return self.__readers[QC_name]
+
+
+def load_scenario(
+    input_path: Union[str, Path, TextIO],
+    stream: bool = False,
+    chunk_size: int = 4096,
+) -> Union[pd.DataFrame, CompiledScenario, CSVJobStream]:
+    """
+    Jobs of a manifest, for ``JobTracker``: a compiled scenario is memory-mapped; a
+    CSV manifest is streamed QC by QC with ``stream`` (see ``CSVJobStream``), read
+    from its compiled scenario when there is an up-to-date one next to it (see
+    ``compile_scenario``), and parsed with pandas otherwise. A file object is always
+    parsed with pandas.
+    """
+    if not isinstance(input_path, (str, Path)):
+        return pd.read_csv(input_path, header=0)
+    if Path(input_path).suffix == SCENARIO_SUFFIX:
+        return CompiledScenario(input_path)
+    if stream:
+        return CSVJobStream(input_path, chunk_size)
+    scenario = find_compiled_scenario(input_path)
+    if scenario is not None:
+        logger.info(f"Loading {input_path} from {scenario.path}.")
+        return scenario
+    return pd.read_csv(input_path, header=0)
@@ -1,5 +1,6 @@
 from collections import namedtuple
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO, Union
 
 import pandas as pd
 from logzero import logger
@@ -7,6 +8,7 @@ from logzero import logger
 from src.constant import CONSTANT
 from src.floor import Coordinate, SectorMap, SectorMapSnapshot
 from src.operate.engine import OperationEngine
+from src.operator_state import OperatorStateStore
 from src.operators import (
     HT_Coordinate_View,
     HTOperator,
@@ -14,6 +16,7 @@ from src.operators import (
     YardOperator,
 )
 from src.plan.engine import PlanningEngine
+from src.scenario import load_scenario
 
 
 class Simulation:
@@ -23,6 +26,28 @@ class Simulation:
     This class sets up the planning and operation engines using resources created for operations
     and monitoring. It also reads job data from an input CSV file to feed into the planning engine.
 
+    Parameters
+    ----------
+    input_path : str, Path or TextIO, optional
+        Job manifest CSV, or compiled scenario (default is ``data/input.csv``). A CSV
+        is loaded from its compiled scenario when it has an up-to-date one. An open
+        CSV file is read as it is.
+    seed : int, optional
+        Seed of the planner's random choices (default is 0).
+    planner_features : Dict[str, bool], optional
+        Planner feature toggles, on top of the ``JOB_PLANNER_FEATURES`` env var.
+    engine_features : Dict[str, bool], optional
+        Operation engine feature toggles, on top of ``OPERATION_ENGINE_FEATURES``.
+    output_path : str, Path or TextIO, optional
+        Where ``export_job_report`` writes the job report CSV (default is
+        ``data/output.csv``), a path or an open text file.
+    stream_input : bool, optional
+        Stream a CSV manifest QC by QC instead of loading it whole (default is False),
+        so memory stays bounded on large manifests (see ``CSVJobStream``). Jobs
+        completed in sequence are then written to the job report as the run goes.
+    stream_chunk_size : int, optional
+        Lines of the manifest read at a time by each QC when streaming.
+
     Attributes
     ----------
     planning_engine : PlanningEngine
@@ -37,17 +62,34 @@ class Simulation:
         A countdown timer used for scheduling planning operations.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        input_path: Union[str, Path, TextIO] = "data/input.csv",
+        seed: int = 0,
+        planner_features: Optional[Dict[str, bool]] = None,
+        engine_features: Optional[Dict[str, bool]] = None,
+        output_path: Union[str, Path, TextIO] = "data/output.csv",
+        stream_input: bool = False,
+        stream_chunk_size: int = 4096,
+    ):
         operation_resources = self.create_operation_resources()
         monitoring_resources = self.create_monitoring_resources(operation_resources)
 
-        input_df = pd.read_csv("data/input.csv", header=0)
+        self.output_path: Union[str, Path, TextIO] = output_path
+        self.__has_written_job_report: bool = False
+        self.__has_exported_streamed_job_report: bool = False
         self.planning_engine = PlanningEngine(
-            job_df=input_df, monitoring_resources=monitoring_resources
+            job_df=load_scenario(
+                input_path, stream=stream_input, chunk_size=stream_chunk_size
+            ),
+            monitoring_resources=monitoring_resources,
+            seed=seed,
+            feature_overrides=planner_features,
         )
         self.operation_engine = OperationEngine(
             operation_resources=operation_resources,
             monitoring_resources=monitoring_resources,
+            feature_overrides=engine_features,
         )
         self.operation_resources = operation_resources
         self.monitoring_resources = monitoring_resources
@@ -59,11 +101,18 @@ class Simulation:
             # PLANNING
             # logger.info("Planning -> Operating")
             self.planning_engine.fetch_job_status()
+            if (
+                self.planning_engine.is_streaming()
+                and not self.__has_exported_streamed_job_report
+            ):
+                self.__write_retired_job_report()
             new_jobs = self.planning_engine.plan()
+            repositions = self.planning_engine.plan_repositions()
 
             # OPERATING
             # logger.info("Entered operating")
             self.operation_engine.add_new_jobs(new_jobs)
+            self.operation_engine.add_repositions(repositions)
             self.operation_engine.operate()
         else:
             # logger.info("Operating(only)")
@@ -81,10 +130,23 @@ class Simulation:
         # create sectors
         sector_map = SectorMap()
 
+        # fleet-level operator state shared by all QC, yard and HT operators
+        operator_state_store = OperatorStateStore(
+            work_operator_names=CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES
+            + CONSTANT.YARD_FLOOR.YARD_NAMES,
+            work_time_required=[CONSTANT.JOB_PARAMETER.QC_WORK_TIME_REQUIRED]
+            * len(CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES)
+            + [CONSTANT.JOB_PARAMETER.YARD_WORK_TIME_REQUIRED]
+            * len(CONSTANT.YARD_FLOOR.YARD_NAMES),
+            HT_names=CONSTANT.HT_FLEET.HT_NAMES,
+        )
+
         # create HT resources
         HT_resource_group = {
             HT_name: HTOperator(
-                name=HT_name, coord=Coordinate(location[0], location[1])
+                name=HT_name,
+                coord=Coordinate(location[0], location[1]),
+                state_store=operator_state_store,
             )
             for HT_name, location in zip(
                 CONSTANT.HT_FLEET.HT_NAMES, CONSTANT.HT_FLEET.HT_INIT_COORDINATES
@@ -98,13 +160,13 @@ class Simulation:
 
         # create QC resources
         QC_resource_group = {
-            QC_name: QCOperator(name=QC_name)
+            QC_name: QCOperator(name=QC_name, state_store=operator_state_store)
             for QC_name in CONSTANT.QUAY_CRANE_FLOOR.QC_NAMES
         }
 
         # create Yard resources
         yard_resource_group = {
-            yard_name: YardOperator(name=yard_name)
+            yard_name: YardOperator(name=yard_name, state_store=operator_state_store)
             for yard_name in CONSTANT.YARD_FLOOR.YARD_NAMES
         }
 
@@ -115,10 +177,15 @@ class Simulation:
                 "HT_resource_group",
                 "QC_resource_group",
                 "yard_resource_group",
+                "operator_state_store",
             ],
         )
         return OperationResources(
-            sector_map, HT_resource_group, QC_resource_group, yard_resource_group
+            sector_map,
+            HT_resource_group,
+            QC_resource_group,
+            yard_resource_group,
+            operator_state_store,
         )
 
     def create_monitoring_resources(
@@ -139,20 +206,25 @@ class Simulation:
         return False
 
     def has_deadlock(self) -> bool:
+        # checked first: the no-movement tracker counts ticks on every call
         if self.planning_engine.is_deadlock():
             return True
+        # HTs stuck in a gridlock can never move again, no need to wait for the
+        # whole fleet to freeze
+        if self.operation_engine.has_gridlock():
+            return True
         return False
 
     def export_terminal_statistics(self) -> Dict[str, Dict[str, int]]:
         """Extract terminal status to feed into JobProgress in UI."""
         # jobs
-        number_of_total_jobs = 20000
+        number_of_total_jobs = self.planning_engine.get_number_of_jobs()
         number_of_completed_jobs = self.planning_engine.get_number_of_completed_jobs()
         number_of_remaining_jobs = number_of_total_jobs - number_of_completed_jobs
         current_time = self.operation_engine.get_current_time()
 
         # QC
-        number_of_total_QC = 8
+        number_of_total_QC = len(self.operation_resources.QC_resource_group)
         number_of_idle_QC = sum(
             [
                 not QC_ops.is_displayed_busy()
@@ -162,12 +234,12 @@ class Simulation:
         number_of_active_QC = number_of_total_QC - number_of_idle_QC
 
         # HT
-        number_of_total_HT = 80
+        number_of_total_HT = len(self.operation_resources.HT_resource_group)
         number_of_non_moving_HT = self.planning_engine.get_non_moving_HT()
         number_of_moving_HT = number_of_total_HT - number_of_non_moving_HT
 
         # Yard
-        number_of_total_yard = 16
+        number_of_total_yard = len(self.operation_resources.yard_resource_group)
         number_of_idle_yard = sum(
             [
                 not yard_ops.is_displayed_busy()
@@ -185,12 +257,12 @@ class Simulation:
         HT_at_yard_locations = [
             [HT_name, str(HT_ops.get_coordinate())]
             for HT_name, HT_ops in self.operation_resources.HT_resource_group.items()
-            if HT_ops.get_coordinate().y == 13
+            if HT_ops.get_coordinate().y == CONSTANT.YARD_FLOOR.START_SECTOR_Y
         ]
         HT_at_other_locations = [
             [HT_name, str(HT_ops.get_coordinate())]
             for HT_name, HT_ops in self.operation_resources.HT_resource_group.items()
-            if HT_ops.get_coordinate().y not in [3, 13]
+            if HT_ops.get_coordinate().y not in [3, CONSTANT.YARD_FLOOR.START_SECTOR_Y]
         ]
         HT_locations = HT_at_QC_locations + HT_at_yard_locations + HT_at_other_locations
 
@@ -236,11 +308,57 @@ class Simulation:
         return HT_name_coords_map
 
     def export_job_report(self):
-        """Export all jobs attributes with start/end time as report."""
-        output_df = self.planning_engine.export_job_report()
-        filepath = "data/output.csv"
-        output_df.to_csv(filepath, index=False)
-        logger.info(f"Output job report: {filepath}")
+        """
+        Export all jobs attributes with start/end time as report to ``output_path``.
+
+        When the input is streamed, the jobs retired so far are in the report already,
+        in the order they were retired (completed in sequence). This appends the jobs
+        still in the tracker, then the jobs never read from the manifest (in chunks),
+        QC by QC. It finishes the report, so it can only be called once, at the end of
+        the run; a second call raises ``RuntimeError``.
+        """
+        if self.planning_engine.is_streaming():
+            if self.__has_exported_streamed_job_report:
+                raise RuntimeError(
+                    "The job report of a streamed input is exported once."
+                )
+            self.__has_exported_streamed_job_report = True
+            self.__write_retired_job_report()
+        else:
+            self.__has_written_job_report = False
+        self.__write_job_report(self.planning_engine.export_job_report())
+        for report_df in self.planning_engine.iter_unread_job_report():
+            self.__write_job_report(report_df)
+        logger.info(f"Output job report: {self.output_path}")
+
+    def __write_retired_job_report(self):
+        retired_report_df = self.planning_engine.pop_retired_job_report()
+        if not retired_report_df.empty:
+            self.__write_job_report(retired_report_df)
+
+    def __write_job_report(self, report_df: pd.DataFrame):
+        """Write (the first time) or append report rows to ``output_path``."""
+        if report_df.empty and self.__has_written_job_report:
+            return
+        is_first = not self.__has_written_job_report
+        if isinstance(self.output_path, (str, Path)):
+            report_df.to_csv(
+                self.output_path,
+                mode="w" if is_first else "a",
+                header=is_first,
+                index=False,
+            )
+        else:
+            report_df.to_csv(self.output_path, header=is_first, index=False)
+        self.__has_written_job_report = True
+
+    def export_gridlock_statistics(self) -> Dict[str, float]:
+        """Gridlocks detected and resolved by re-routing so far."""
+        return self.operation_engine.get_gridlock_statistics()
+
+    def export_service_statistics(self) -> Dict[str, int]:
+        """Yard idle time and HT wait time at QCs and yards so far."""
+        return self.operation_engine.get_service_statistics()
 
     def get_current_time(self):
         return self.operation_engine.get_current_time()
@@ -242,7 +242,7 @@ class TerminalDisplay:
                 CONSTANT.TERMINAL_FLOOR.NUMBER_OF_SECTORS_X - 1,
                 yard_floor.NUMBER_OF_SECTORS_BETWEEN_YARD_BLOCK,
             )
-        )
+        )[: len(yard_floor.YARD_NAMES) // 2]
 
         for idx, sector_x in enumerate(sector_x_list):
             yard_names = [
@@ -0,0 +1,39 @@
+import os
+from typing import Dict, Optional
+
+
+def load_feature_flags(
+    env_var: str,
+    defaults: Dict[str, bool],
+    overrides: Optional[Dict[str, bool]] = None,
+) -> Dict[str, bool]:
+    """Resolve feature toggles from defaults, a comma-separated env var and overrides.
+
+    ``flag`` in the env var enables a feature and ``!flag`` disables it; unknown flags
+    are ignored. Explicit ``overrides`` win over the env var; an unknown feature in
+    them raises ``KeyError``, so a misspelled feature does not run the defaults.
+    """
+    features = dict(defaults)
+    for name, enabled in parse_feature_flags(os.getenv(env_var, "")).items():
+        if name in features:
+            features[name] = enabled
+    if overrides:
+        unknown = sorted(set(overrides) - set(features))
+        if unknown:
+            raise KeyError(f"Unknown features for {env_var}: {', '.join(unknown)}")
+        features.update(overrides)
+    return features
+
+
+def parse_feature_flags(flags: str) -> Dict[str, bool]:
+    """Parse a comma-separated ``flag``/``!flag`` list into feature toggles."""
+    features = dict()
+    for token in flags.split(","):
+        flag = token.strip()
+        if not flag:
+            continue
+        if flag.startswith("!"):
+            features[flag[1:]] = False
+        else:
+            features[flag] = True
+    return features